@@ -0,0 +1,285 @@
+# What needs to be done
+# 1) Draw candlesticks (wick = High/Low, body = Open/Close, width from the
+#    bar-to-bar time delta) with support/resistance zones as bands, like
+#    plot_candles_with_sr_zones in ds_research.ipynb, fast enough for an
+#    API that charts months or years of 5 minute bars.
+# 2) Never draw more candles than the viewport has pixels for.
+# 3) Offer the same chart as compact JSON for the frontend to draw.
+#
+# Brute-force approach (the notebook)
+# - One ax.vlines + one ax.bar call per candle: every call creates artists
+#   and updates the axes limits, so N candles cost N Python round trips
+#   and N artists to draw. 100k bars take minutes, and most candles end up
+#   narrower than a pixel anyway.
+#
+# Approach below
+# - downsample_ohlc: split the bars into `max_bars` runs of consecutive
+#   bars (one per candle slot of the target width; bar i goes to bucket
+#   i * max_bars // n) and aggregate each OHLC-aware: first Open, max High,
+#   min Low, last Close. Buckets follow bar position, not wall-clock time,
+#   so nights and weekends (no bars) do not use up slots and every slot
+#   gets a candle. The bucket starts are ceil(j * n / max_bars), and
+#   np.maximum/minimum.reduceat gives every aggregate. O(N).
+# - Rendering: all wicks in ONE LineCollection, all bodies in ONE
+#   PolyCollection (per-candle colors as arrays), zones in one more
+#   PolyCollection -> a constant number of artists, O(B) vertex arrays.
+#   Figure + Agg canvas directly (no pyplot state), so it is thread-safe
+#   and matplotlib is only imported when a PNG is requested.
+# - Time range: index.searchsorted on the sorted DatetimeIndex, O(log N).
+
+from __future__ import annotations
+
+import io
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .zones import SRZone, build_sr_zones
+
+
+_NS_PER_DAY = 86400 * 10**9
+
+UP_COLOR = "#26a69a"
+DOWN_COLOR = "#ef5350"
+ZONE_COLORS = {"support": "#2e7d32", "resistance": "#c62828"}
+
+
+def slice_range(
+  df: pd.DataFrame,
+  start: Optional[Any] = None,
+  end: Optional[Any] = None,
+) -> pd.DataFrame:
+  """
+  Rows with start <= index <= end (either bound optional) of a frame with
+  a sorted DatetimeIndex.
+
+  Time: O(log N)
+  """
+  index = df.index
+  lo = 0
+  hi = len(df)
+  if start is not None:
+    lo = index.searchsorted(_as_index_tz(pd.Timestamp(start), index), side="left")
+  if end is not None:
+    hi = index.searchsorted(_as_index_tz(pd.Timestamp(end), index), side="right")
+  return df.iloc[lo:hi]
+
+
+def _as_index_tz(ts: pd.Timestamp, index: pd.DatetimeIndex) -> pd.Timestamp:
+  if index.tz is None:
+    return ts.tz_convert(None) if ts.tz is not None else ts
+  return ts.tz_localize(index.tz) if ts.tz is None else ts.tz_convert(index.tz)
+
+
+def _ns(index: pd.DatetimeIndex) -> np.ndarray:
+  # Epoch nanoseconds whatever the index resolution (pandas may parse to s / us)
+  return index.as_unit("ns").asi8
+
+
+def downsample_ohlc(
+  df: pd.DataFrame,
+  max_bars: int,
+) -> pd.DataFrame:
+  """
+  Aggregate bars into exactly min(len(df), max_bars) candles of
+  consecutive bars, n // max_bars or one more each (open = first,
+  high = max, low = min, close = last). Buckets are by bar position, so
+  session gaps (nights, weekends) cost no candles. Frames that already
+  fit are returned with bars = 1.
+
+  Returns:
+    DataFrame indexed by each bucket's first bar time with Open, High,
+    Low, Close, bars (source bars per bucket) and end (last bar time)
+
+  Time: O(N)
+  """
+  o = df["Open"].to_numpy(dtype=float)
+  h = df["High"].to_numpy(dtype=float)
+  l = df["Low"].to_numpy(dtype=float)
+  c = df["Close"].to_numpy(dtype=float)
+  n = len(df)
+
+  if n <= max_bars:
+    return pd.DataFrame(
+      {"Open": o, "High": h, "Low": l, "Close": c, "bars": np.ones(n, dtype=np.int64), "end": df.index},
+      index=df.index,
+    )
+
+  # Bar i is in bucket i * max_bars // n, so bucket j starts at the first i
+  # with i * max_bars >= j * n. n > max_bars: every bucket is non-empty
+  starts = (np.arange(max_bars, dtype=np.int64) * n + max_bars - 1) // max_bars
+  last = np.r_[starts[1:], n] - 1
+
+  return pd.DataFrame(
+    {
+      "Open": o[starts],
+      "High": np.maximum.reduceat(h, starts),
+      "Low": np.minimum.reduceat(l, starts),
+      "Close": c[last],
+      "bars": np.diff(np.r_[starts, n]),
+      "end": df.index[last],
+    },
+    index=df.index[starts],
+  )
+
+
+def _candle_widths(t_ns: np.ndarray, fraction: float = 0.8) -> np.ndarray:
+  # Width from the delta to the next candle (last one reuses the previous),
+  # capped at the typical delta so a gap does not make one giant candle
+  if len(t_ns) < 2:
+    return np.full(len(t_ns), 1.0 / 24 / 12 * fraction)
+  deltas = np.diff(t_ns).astype(float)
+  deltas = np.minimum(np.append(deltas, deltas[-1]), np.median(deltas))
+  return deltas / _NS_PER_DAY * fraction
+
+
+def _select_zones(
+  zones: Dict[str, List[SRZone]],
+  max_support: int,
+  max_resistance: int,
+) -> List[SRZone]:
+  return (list(zones.get("support") or [])[:max_support]
+          + list(zones.get("resistance") or [])[:max_resistance])
+
+
+def render_chart(
+  df: pd.DataFrame,
+  zones: Optional[Dict[str, List[SRZone]]] = None,
+  title: str = "Candlesticks with Support / Resistance Zones",
+  width: int = 1200,
+  height: int = 600,
+  dpi: int = 100,
+  candle_px: int = 3,
+  max_support: int = 6,
+  max_resistance: int = 6,
+  zone_alpha: float = 0.12,
+):
+  """
+  Candlestick + SR zone chart as a matplotlib Figure (batched artists,
+  downsampled to about one candle per `candle_px` pixels).
+
+  Time: O(N) to downsample + O(B) to draw, B <= width / candle_px
+  """
+  # matplotlib is only needed for images
+  from matplotlib.backends.backend_agg import FigureCanvasAgg
+  from matplotlib.collections import LineCollection, PolyCollection
+  from matplotlib.figure import Figure
+  import matplotlib.dates as mdates
+
+  if len(df) == 0:
+    raise ValueError("Not enough data to plot candles")
+
+  bars = downsample_ohlc(df, max(1, width // max(1, candle_px)))
+  x = _ns(bars.index) / _NS_PER_DAY                 # matplotlib date units (days since epoch)
+  o = bars["Open"].to_numpy()
+  h = bars["High"].to_numpy()
+  l = bars["Low"].to_numpy()
+  c = bars["Close"].to_numpy()
+  half = _candle_widths(_ns(bars.index)) / 2
+  colors = np.where(c >= o, UP_COLOR, DOWN_COLOR)
+
+  fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+  FigureCanvasAgg(fig)
+  ax = fig.add_subplot(1, 1, 1)
+
+  # Wicks: (B, 2, 2) segments
+  wicks = np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1)
+  ax.add_collection(LineCollection(wicks, colors=colors, linewidths=1))
+
+  # Bodies: (B, 4, 2) rectangles; doji bodies still get a hairline
+  lo = np.minimum(o, c)
+  hi = np.maximum(o, c)
+  bodies = np.stack([
+    np.column_stack([x - half, lo]),
+    np.column_stack([x - half, hi]),
+    np.column_stack([x + half, hi]),
+    np.column_stack([x + half, lo]),
+  ], axis=1)
+  ax.add_collection(PolyCollection(bodies, facecolors=colors, edgecolors=colors, linewidths=0.3))
+
+  if zones:
+    selected = _select_zones(zones, max_support, max_resistance)
+    if selected:
+      x0, x1 = x[0] - half[0], x[-1] + half[-1]
+      bands = np.array([[(x0, z.low), (x0, z.high), (x1, z.high), (x1, z.low)] for z in selected])
+      ax.add_collection(PolyCollection(
+        bands, facecolors=[ZONE_COLORS.get(z.kind, "gray") for z in selected],
+        alpha=zone_alpha, linewidths=0,
+      ))
+
+  ax.set_xlim(x[0] - half[0], x[-1] + half[-1])
+  pad = (np.nanmax(h) - np.nanmin(l)) * 0.02 or 1.0
+  ax.set_ylim(np.nanmin(l) - pad, np.nanmax(h) + pad)
+  locator = mdates.AutoDateLocator()
+  ax.xaxis.set_major_locator(locator)
+  ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
+  ax.set_title(title)
+  ax.set_xlabel("Time")
+  ax.set_ylabel("Price")
+  ax.grid(True, alpha=0.25)
+  fig.tight_layout()
+  return fig
+
+
+def chart_png(
+  df: pd.DataFrame,
+  zones: Optional[Dict[str, List[SRZone]]] = None,
+  **kwargs,
+) -> bytes:
+  """
+  render_chart as PNG bytes.
+  """
+  fig = render_chart(df, zones, **kwargs)
+  buf = io.BytesIO()
+  fig.savefig(buf, format="png", dpi=fig.dpi)
+  return buf.getvalue()
+
+
+def chart_payload(
+  df: pd.DataFrame,
+  zones: Optional[Dict[str, List[SRZone]]] = None,
+  max_bars: int = 600,
+  max_support: int = 6,
+  max_resistance: int = 6,
+  decimals: int = 4,
+) -> Dict[str, Any]:
+  """
+  Downsampled chart as compact columnar JSON: t (bucket start, epoch ms),
+  o / h / l / c, n (source bars per candle) and the zones.
+
+  Time: O(N) to downsample + O(B) to serialize
+  """
+  bars = downsample_ohlc(df, max_bars)
+  payload: Dict[str, Any] = {
+    "bars": int(len(df)),
+    "candles": int(len(bars)),
+    "start": df.index[0].isoformat() if len(df) else None,
+    "end": df.index[-1].isoformat() if len(df) else None,
+    "t": (_ns(bars.index) // 10**6).tolist(),
+    "o": np.round(bars["Open"].to_numpy(), decimals).tolist(),
+    "h": np.round(bars["High"].to_numpy(), decimals).tolist(),
+    "l": np.round(bars["Low"].to_numpy(), decimals).tolist(),
+    "c": np.round(bars["Close"].to_numpy(), decimals).tolist(),
+    "n": bars["bars"].tolist(),
+  }
+  if zones is not None:
+    payload["zones"] = [
+      {"kind": z.kind, "low": round(z.low, decimals), "high": round(z.high, decimals),
+       "level": round(z.level, decimals), "touches": z.touches, "score": round(z.score, decimals)}
+      for z in _select_zones(zones, max_support, max_resistance)
+    ]
+  return payload
+
+
+def chart_zones(
+  df: pd.DataFrame,
+  **kwargs,
+) -> Dict[str, List[SRZone]]:
+  """
+  build_sr_zones over the charted bars (empty when there are too few).
+  """
+  if len(df) < 3:
+    return {"support": [], "resistance": []}
+  return build_sr_zones(df, **kwargs)
@@ -0,0 +1,353 @@
+# What this module does
+# 1) Take OHLC arrays plus a boolean signal array (True = enter at that
+#    bar's close, same fill assumption as the notebooks).
+# 2) Evaluate the exit of EVERY signal at once:
+#    - target (fraction above/below entry)
+#    - stop   (fraction below/above entry)
+#    - time exit at the close of the max_bars-th bar after entry
+#    - same-bar ambiguity when one bar touches both target and stop
+# 3) Return the trade list, an equity curve and summary stats.
+#
+# Brute-force approach (backtester.ipynb)
+# - For each signal: get_loc, slice the next H bars, scan them in Python.
+#   O(K * H) Python work, plus pandas indexing overhead per trade.
+#
+# Vectorized approach below
+# - Build a (K, H) matrix of bar indices (one row per signal), gather
+#   High/Low through it and find the first target/stop hit per row with
+#   argmax. All O(K * H) work happens inside NumPy, in chunks of signals
+#   to bound memory on multi-year 5-minute data.
+# - Optional single-position mode drops overlapping trades by jumping from
+#   each accepted trade's exit to the next signal (O(T log K), T trades).
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+SAME_BAR_RULES = ("stop", "target", "open")
+
+OUTCOMES = np.array(["target", "stop", "time"])
+
+
+def _first_true(hits: np.ndarray) -> np.ndarray:
+  """
+  Column of the first True in each row, or hits.shape[1] if none.
+  """
+  first = hits.argmax(axis=1)
+  first[~hits.any(axis=1)] = hits.shape[1]
+  return first
+
+
+def evaluate_exits(
+  open_: np.ndarray,
+  high: np.ndarray,
+  low: np.ndarray,
+  close: np.ndarray,
+  entry_idx: np.ndarray,
+  target: np.ndarray,
+  stop: np.ndarray,
+  max_bars: int,
+  direction: str = "long",
+  same_bar: str = "stop",
+  chunk_size: int = 65536,
+) -> Dict[str, np.ndarray]:
+  """
+  Exit bar, price and outcome for every entry at once.
+
+  entry_idx: (K,) bar index of each entry (filled at that bar's close)
+  target:    (K,) target price per entry (NaN = no target)
+  stop:      (K,) stop price per entry (NaN = no stop)
+  max_bars:  time exit at the close of bar entry_idx + max_bars
+  same_bar:  when one bar touches both levels:
+             "stop"   -> assume the stop filled first (conservative)
+             "target" -> assume the target filled first
+             "open"   -> whichever level is closer to that bar's open
+
+  Gaps through a level fill at the bar's open (worse for stops, better for
+  targets). Windows cut short by the end of data exit at the last close with
+  outcome "end".
+
+  Returns dict of (K,) arrays: exit_idx, exit_price, outcome
+
+  Time:  O(K * max_bars) in NumPy
+  Space: O(chunk_size * max_bars)
+  """
+  if same_bar not in SAME_BAR_RULES:
+    raise ValueError(f"same_bar must be one of {SAME_BAR_RULES}")
+  if direction not in ("long", "short"):
+    raise ValueError("direction must be 'long' or 'short'")
+  if max_bars < 1:
+    raise ValueError("max_bars must be >= 1")
+
+  n = len(close)
+  k = len(entry_idx)
+  exit_idx = np.empty(k, dtype=np.int64)
+  exit_price = np.empty(k, dtype=float)
+  outcome = np.empty(k, dtype=object)
+
+  steps = np.arange(1, max_bars + 1)
+
+  for lo in range(0, k, chunk_size):
+    hi = min(lo + chunk_size, k)
+    e = entry_idx[lo:hi]
+    tp = target[lo:hi, None]
+    sl = stop[lo:hi, None]
+
+    # (C, H) bar indices after each entry; past-the-end bars are masked
+    idx = e[:, None] + steps[None, :]
+    valid = idx < n
+    idx = np.minimum(idx, n - 1)
+
+    h = high[idx]
+    l = low[idx]
+    o = open_[idx]
+
+    # NaN levels never compare True, so "no target"/"no stop" falls out
+    if direction == "long":
+      tp_hit = (h >= tp) & valid
+      sl_hit = (l <= sl) & valid
+    else:
+      tp_hit = (l <= tp) & valid
+      sl_hit = (h >= sl) & valid
+
+    first_tp = _first_true(tp_hit)
+    first_sl = _first_true(sl_hit)
+
+    # Bars available after each entry (< max_bars near the end of data)
+    avail = valid.sum(axis=1)
+    time_step = np.minimum(avail, max_bars) - 1
+
+    rows = np.arange(hi - lo)
+    both = (first_tp == first_sl) & (first_tp < max_bars)
+    if same_bar == "stop":
+      tp_first = first_tp < first_sl
+    elif same_bar == "target":
+      tp_first = first_tp <= first_sl
+    else:
+      step = np.minimum(first_tp, max_bars - 1)
+      bar_open = o[rows, step]
+      closer_to_tp = np.abs(bar_open - tp[:, 0]) <= np.abs(bar_open - sl[:, 0])
+      tp_first = (first_tp < first_sl) | (both & closer_to_tp)
+
+    hit_step = np.where(tp_first, first_tp, first_sl)
+    level_hit = hit_step < max_bars
+    level_hit &= hit_step <= time_step
+
+    step = np.where(level_hit, hit_step, np.maximum(time_step, 0))
+    bars = idx[rows, step]
+    bar_open = o[rows, step]
+
+    if direction == "long":
+      tp_fill = np.maximum(tp[:, 0], bar_open)
+      sl_fill = np.minimum(sl[:, 0], bar_open)
+    else:
+      tp_fill = np.minimum(tp[:, 0], bar_open)
+      sl_fill = np.maximum(sl[:, 0], bar_open)
+
+    price = np.where(
+      level_hit,
+      np.where(tp_first, tp_fill, sl_fill),
+      close[bars],
+    )
+    out = np.where(level_hit, np.where(tp_first, "target", "stop"), "time").astype(object)
+    out[(~level_hit) & (avail < max_bars)] = "end"
+    # Entry on the very last bar: nothing to evaluate
+    no_bars = avail == 0
+    bars[no_bars] = e[no_bars]
+    price[no_bars] = close[e[no_bars]]
+
+    exit_idx[lo:hi] = bars
+    exit_price[lo:hi] = price
+    outcome[lo:hi] = out
+
+  return {"exit_idx": exit_idx, "exit_price": exit_price, "outcome": outcome}
+
+
+def _non_overlapping(entry_idx: np.ndarray, exit_idx: np.ndarray) -> np.ndarray:
+  """
+  Single-position filter: keep a trade only if it enters after the previous
+  kept trade exited. Jumps trade to trade with searchsorted, so the Python
+  loop runs once per KEPT trade, not once per bar or signal.
+  """
+  keep = []
+  i = 0
+  k = len(entry_idx)
+  while i < k:
+    keep.append(i)
+    i = int(np.searchsorted(entry_idx, exit_idx[i], side="right"))
+  return np.array(keep, dtype=np.int64)
+
+
+def backtest_signals(
+  df: pd.DataFrame,
+  signals: np.ndarray,
+  target_pct: Optional[float] = 0.02,
+  stop_pct: Optional[float] = None,
+  max_bars: int = 10,
+  direction: str = "long",
+  same_bar: str = "stop",
+  allow_overlap: bool = True,
+  drop_incomplete: bool = True,
+  chunk_size: int = 65536,
+) -> Dict[str, Any]:
+  """
+  Vectorized signal backtest.
+
+  df:              OHLC frame (load_prices_from_csv contract)
+  signals:         (N,) bool, True = enter at that bar's close
+  target_pct:      target distance as a fraction of entry (None = no target)
+  stop_pct:        stop distance as a fraction of entry (None = no stop)
+  max_bars:        time exit after this many bars
+  direction:       "long" or "short"
+  same_bar:        ambiguity rule, see evaluate_exits
+  allow_overlap:   False = single position (new signals ignored while in a trade).
+                   True = every signal trades; capital is split evenly
+                   across the most positions ever open at once
+  drop_incomplete: drop trades whose window runs past the end of data
+                   without hitting a level (backtester.ipynb skips these)
+
+  Returns dict:
+    trades: DataFrame, one row per trade
+    equity: Series of equity (starting at 1.0, compounded at each exit)
+            indexed like df. Each trade gets 1 / max_concurrent of the
+            capital, i.e. fully invested in single-position mode
+    stats:  summary dict
+
+  Time:  O(N + K * max_bars) in NumPy
+  """
+  open_ = df["Open"].to_numpy(dtype=float)
+  high = df["High"].to_numpy(dtype=float)
+  low = df["Low"].to_numpy(dtype=float)
+  close = df["Close"].to_numpy(dtype=float)
+
+  signals = np.asarray(signals, dtype=bool)
+  if signals.shape != close.shape:
+    raise ValueError("signals must have one entry per bar")
+
+  entry_idx = np.flatnonzero(signals)
+  entry = close[entry_idx]
+  sign = 1.0 if direction == "long" else -1.0
+
+  nan = np.full(len(entry_idx), np.nan)
+  target = entry * (1 + sign * target_pct) if target_pct is not None else nan
+  stop = entry * (1 - sign * stop_pct) if stop_pct is not None else nan
+
+  exits = evaluate_exits(
+    open_, high, low, close,
+    entry_idx=entry_idx,
+    target=target,
+    stop=stop,
+    max_bars=max_bars,
+    direction=direction,
+    same_bar=same_bar,
+    chunk_size=chunk_size,
+  )
+
+  keep = np.ones(len(entry_idx), dtype=bool)
+  if drop_incomplete:
+    keep &= exits["outcome"] != "end"
+  sel = np.flatnonzero(keep)
+  if not allow_overlap and len(sel):
+    sel = sel[_non_overlapping(entry_idx[sel], exits["exit_idx"][sel])]
+
+  entry_idx = entry_idx[sel]
+  entry = entry[sel]
+  target = target[sel]
+  stop = stop[sel]
+  exit_idx = exits["exit_idx"][sel]
+  exit_price = exits["exit_price"][sel]
+  outcome = exits["outcome"][sel]
+
+  pnl = sign * (exit_price - entry)
+  risk = sign * (entry - stop)
+  with np.errstate(divide="ignore", invalid="ignore"):
+    r_multiple = np.where(risk > 0, pnl / risk, np.nan)
+  ret = pnl / entry
+
+  index = df.index
+  trades = pd.DataFrame({
+    "entry_idx": entry_idx,
+    "exit_idx": exit_idx,
+    "entry_time": index[entry_idx],
+    "exit_time": index[exit_idx],
+    "entry": entry,
+    "target": target,
+    "stop": stop,
+    "exit_price": exit_price,
+    "outcome": outcome.astype(str),
+    "pnl_per_share": pnl,
+    "return_pct": ret * 100.0,
+    "r_multiple": r_multiple,
+    "bars_held": exit_idx - entry_idx,
+  })
+
+  # Equity: compound every trade's return at its exit bar. Overlapping
+  # trades share the capital instead of each compounding all of it
+  concurrent = max_concurrent(entry_idx, exit_idx, len(df))
+  log_growth = np.zeros(len(df))
+  np.add.at(log_growth, exit_idx, np.log1p(ret / max(concurrent, 1)))
+  equity = pd.Series(np.exp(np.cumsum(log_growth)), index=index, name="equity")
+
+  stats = summarize(trades, equity)
+  if len(trades):
+    stats["max_concurrent"] = concurrent
+  return {"trades": trades, "equity": equity, "stats": stats}
+
+
+def max_concurrent(entry_idx: np.ndarray, exit_idx: np.ndarray, n: int) -> int:
+  """
+  Most positions open on any bar (a trade is open from its entry bar
+  through its exit bar).
+  """
+  if len(entry_idx) == 0:
+    return 0
+  opened = np.zeros(n + 1, dtype=np.int64)
+  np.add.at(opened, entry_idx, 1)
+  np.add.at(opened, exit_idx + 1, -1)
+  return int(np.cumsum(opened).max())
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+  """
+  Largest peak-to-trough drop of an equity curve, as a positive fraction.
+  """
+  if len(equity) == 0:
+    return 0.0
+  peak = np.maximum.accumulate(equity)
+  return float(np.max(1.0 - equity / peak))
+
+
+def summarize(
+  trades: pd.DataFrame,
+  equity: pd.Series,
+) -> Dict[str, Any]:
+  """
+  Summary stats for a backtest_signals run.
+  """
+  n = len(trades)
+  if n == 0:
+    return {"trades": 0}
+
+  ret = trades["return_pct"].to_numpy()
+  wins = ret > 0
+  gross_win = ret[wins].sum()
+  gross_loss = -ret[~wins].sum()
+  r = trades["r_multiple"].to_numpy()
+  has_r = not np.isnan(r).all()
+
+  return {
+    "trades": n,
+    "win_rate": float(wins.mean() * 100.0),
+    "avg_return_pct": float(ret.mean()),
+    "total_return_pct": float((equity.iloc[-1] - 1.0) * 100.0),
+    "profit_factor": float(gross_win / gross_loss) if gross_loss > 0 else None,
+    "avg_r": float(np.nanmean(r)) if has_r else None,
+    "total_r": float(np.nansum(r)) if has_r else None,
+    "max_drawdown_pct": max_drawdown(equity.to_numpy()) * 100.0,
+    "avg_bars_held": float(trades["bars_held"].mean()),
+    "outcomes": trades["outcome"].value_counts().to_dict(),
+  }
@@ -0,0 +1,274 @@
+# What needs to be done
+# 1) Swing highs / lows (argrelextrema(..., np.less_equal / greater_equal,
+#    order=k) in backtester.ipynb) for MANY symbols at once.
+# 2) Regular and hidden RSI divergences between consecutive swings:
+#      regular bullish: price lower low,   RSI higher low
+#      hidden bullish:  price higher low,  RSI lower low
+#      regular bearish: price higher high, RSI lower high
+#      hidden bearish:  price lower high,  RSI higher high
+# 3) A causal mode: a swing at bar i needs `order` bars on its right, so it
+#    is only known at bar i + order. Causal signals fire on that bar, which
+#    makes them safe to pass to backtest_signals.
+#
+# Brute-force approach (backtester.ipynb)
+# - One ticker per run; argrelextrema, then a Python loop over swing pairs
+#   with spy.loc[date, ...].values[0] lookups. O(P) pandas lookups per
+#   ticker, and the swing window peeks `order` bars into the future.
+#
+# Vectorized approach below
+# - Symbols are rows of one (S, T) PricePanel (right-aligned, ragged
+#   histories masked). Swings: 2 * order shifted comparisons over the
+#   whole panel. O(S * T * order) in NumPy.
+# - Consecutive swings of the same symbol come from np.nonzero (row-major
+#   order), so "previous swing" is just the previous entry where the row
+#   matches; all divergence tests are array comparisons over those pairs.
+# - RSI: Wilder smoothing (ta.momentum.RSIIndicator, as in the notebook)
+#   via one pandas ewm over the (T, S) frame, or the screener's simple RSI.
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from screener.indicators import PricePanel, rsi as simple_rsi
+
+
+KINDS = ("regular_bullish", "hidden_bullish", "regular_bearish", "hidden_bearish")
+
+
+def _edge_filled(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+  """
+  Replace each row's left padding with its first valid value, so windows at
+  the start of a short history compare against that bar (argrelextrema's
+  mode="clip" on the symbol's own series).
+  """
+  first = mask.argmax(axis=1)
+  has_any = mask.any(axis=1)
+  cols = np.arange(values.shape[1])[None, :]
+  lead = (cols < first[:, None]) & has_any[:, None]
+  start = values[np.arange(len(values)), first]
+  return np.where(lead, start[:, None], values)
+
+
+def swing_points(
+  values: np.ndarray,
+  order: int = 5,
+  kind: str = "low",
+  causal: bool = False,
+  mask: Optional[np.ndarray] = None,
+) -> np.ndarray:
+  """
+  Swing lows / highs along axis 1 (argrelextrema with np.less_equal /
+  np.greater_equal and mode="clip", per row).
+
+  values: (S, T) or (T,) prices
+  kind:   "low" or "high"
+  causal: drop swings in the last `order` bars, whose right window is not
+          complete yet (the window is never clipped at the right edge)
+
+  Returns a bool array shaped like `values`, True ON the swing bar (in
+  causal mode the swing becomes known `order` bars later, see confirm()).
+
+  Time: O(S * T * order)
+  """
+  if kind not in ("low", "high"):
+    raise ValueError("kind must be 'low' or 'high'")
+  values = np.asarray(values, dtype=float)
+  one_d = values.ndim == 1
+  values = np.atleast_2d(values)
+  if mask is None:
+    mask = ~np.isnan(values)
+  t = values.shape[1]
+  v = _edge_filled(values, np.atleast_2d(mask))
+
+  better = np.less_equal if kind == "low" else np.greater_equal
+  cols = np.arange(t)
+  out = np.atleast_2d(mask).copy()
+  with np.errstate(invalid="ignore"):
+    for k in range(1, order + 1):
+      out &= better(v, v[:, np.minimum(cols + k, t - 1)])
+      out &= better(v, v[:, np.maximum(cols - k, 0)])
+  if causal:
+    out[:, max(t - order, 0):] = False
+  return out[0] if one_d else out
+
+
+def confirm(swings: np.ndarray, order: int) -> np.ndarray:
+  """
+  Move each swing from its own bar to the bar it is confirmed on (+order).
+  """
+  out = np.zeros_like(swings)
+  if order < swings.shape[-1]:
+    out[..., order:] = swings[..., :swings.shape[-1] - order]
+  return out
+
+
+def wilder_rsi(panel: PricePanel, period: int = 14) -> np.ndarray:
+  """
+  RSI with Wilder smoothing for every symbol and bar (same values as
+  ta.momentum.RSIIndicator(close, window=period).rsi() per symbol).
+
+  Returns:
+    (S, T) array, NaN before each symbol's first `period` bars
+  """
+  values, mask = panel.values, panel.mask
+  delta = np.full(values.shape, np.nan)
+  delta[:, 1:] = values[:, 1:] - values[:, :-1]
+
+  # ta: diff.where(diff > 0, 0.0) -> the first bar's NaN diff counts as 0
+  gain = np.where(mask, np.where(delta > 0, delta, 0.0), np.nan)
+  loss = np.where(mask, np.where(delta < 0, -delta, 0.0), np.nan)
+
+  ewm = dict(alpha=1.0 / period, min_periods=period, adjust=False)
+  up = pd.DataFrame(gain.T).ewm(**ewm).mean().to_numpy().T
+  down = pd.DataFrame(loss.T).ewm(**ewm).mean().to_numpy().T
+  with np.errstate(divide="ignore", invalid="ignore"):
+    out = np.where(down == 0, 100.0, 100.0 - 100.0 / (1.0 + up / down))
+  return np.where(np.isnan(up) | np.isnan(down) | ~mask, np.nan, out)
+
+
+def divergences(
+  price: np.ndarray,
+  osc: np.ndarray,
+  swings: np.ndarray,
+  side: str = "bullish",
+  hidden: bool = False,
+  prev_limit: Optional[float] = None,
+  curr_limit: Optional[float] = None,
+  max_gap: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+  """
+  Divergences between each swing and the previous swing of the same row.
+
+  price, osc: (S, T) price and oscillator (e.g. RSI) values
+  swings:     (S, T) swing bars (lows for bullish, highs for bearish)
+  prev_limit / curr_limit: oscillator must be below (bullish) / above
+              (bearish) these at the previous / current swing; e.g. the
+              notebook's prev_rsi < 35 and curr_rsi < 40
+  max_gap:    max bars between the two swings
+
+  Returns (row, prev_bar, swing_bar) arrays, one entry per divergence.
+
+  Time: O(S * T) to find swings, O(P) over P swing pairs
+  """
+  if side not in ("bullish", "bearish"):
+    raise ValueError("side must be 'bullish' or 'bearish'")
+
+  rows, cols = np.nonzero(swings)
+  same = rows[1:] == rows[:-1]
+  r = rows[1:][same]
+  prev = cols[:-1][same]
+  curr = cols[1:][same]
+
+  p0, p1 = price[r, prev], price[r, curr]
+  o0, o1 = osc[r, prev], osc[r, curr]
+
+  lower_price, higher_price = p1 < p0, p1 > p0
+  lower_osc, higher_osc = o1 < o0, o1 > o0
+  if side == "bullish":
+    hit = (higher_price & lower_osc) if hidden else (lower_price & higher_osc)
+    if prev_limit is not None:
+      hit &= o0 < prev_limit
+    if curr_limit is not None:
+      hit &= o1 < curr_limit
+  else:
+    hit = (lower_price & higher_osc) if hidden else (higher_price & lower_osc)
+    if prev_limit is not None:
+      hit &= o0 > prev_limit
+    if curr_limit is not None:
+      hit &= o1 > curr_limit
+  if max_gap is not None:
+    hit &= curr - prev <= max_gap
+
+  return r[hit], prev[hit], curr[hit]
+
+
+def divergence_signals(
+  history: Dict[str, pd.DataFrame],
+  order: int = 5,
+  rsi_period: int = 14,
+  rsi_method: str = "wilder",
+  causal: bool = True,
+  low_column: str = "Close",
+  high_column: str = "Close",
+  bullish_limits: Tuple[Optional[float], Optional[float]] = (None, None),
+  bearish_limits: Tuple[Optional[float], Optional[float]] = (None, None),
+  max_gap: Optional[int] = None,
+) -> Tuple[pd.DataFrame, Dict[str, Dict[str, np.ndarray]]]:
+  """
+  Swings and all four RSI divergence kinds for a universe in one pass.
+
+  history:        symbol -> OHLC frame
+  rsi_method:     "wilder" (notebook / ta) or "simple" (screener RSI)
+  causal:         signal on the confirmation bar (swing + order) instead of
+                  the swing bar; the window never looks past the data end
+  low/high_column: column used for swing lows / highs (notebook: Close)
+  *_limits:       (prev_limit, curr_limit), see divergences()
+
+  Returns:
+    events:  DataFrame, one row per divergence: symbol, kind, prev_time,
+             swing_time, signal_time (+ the price / RSI at both swings)
+    signals: symbol -> kind -> (N,) bool array aligned with history[symbol],
+             ready for backtest_signals
+  """
+  if rsi_method not in ("wilder", "simple"):
+    raise ValueError("rsi_method must be 'wilder' or 'simple'")
+
+  close = PricePanel.from_history(history, "Close")
+  lows = close if low_column == "Close" else PricePanel.from_history(history, low_column)
+  highs = close if high_column == "Close" else PricePanel.from_history(history, high_column)
+  osc = wilder_rsi(close, rsi_period) if rsi_method == "wilder" else simple_rsi(close, rsi_period)
+
+  swing_low = swing_points(lows.values, order, "low", causal, lows.mask)
+  swing_high = swing_points(highs.values, order, "high", causal, highs.mask)
+  shift = order if causal else 0
+
+  symbols = close.symbols
+  width = close.values.shape[1]
+  offsets = width - close.lengths          # panel column of each symbol's bar 0
+  signals = {s: {k: np.zeros(int(n), dtype=bool) for k in KINDS} for s, n in zip(symbols, close.lengths)}
+  frames = []
+
+  for kind in KINDS:
+    hidden = kind.startswith("hidden")
+    bullish = kind.endswith("bullish")
+    panel, swings = (lows, swing_low) if bullish else (highs, swing_high)
+    prev_limit, curr_limit = bullish_limits if bullish else bearish_limits
+    r, prev, curr = divergences(
+      panel.values, osc, swings,
+      side="bullish" if bullish else "bearish", hidden=hidden,
+      prev_limit=prev_limit, curr_limit=curr_limit, max_gap=max_gap,
+    )
+    fire = curr + shift
+    keep = fire < width
+    r, prev, curr, fire = r[keep], prev[keep], curr[keep], fire[keep]
+
+    for row in np.unique(r):
+      signals[symbols[row]][kind][fire[r == row] - offsets[row]] = True
+
+    frames.append(pd.DataFrame({
+      "symbol": np.array(symbols, dtype=object)[r] if len(r) else np.array([], dtype=object),
+      "kind": kind,
+      "prev_bar": prev - offsets[r],
+      "swing_bar": curr - offsets[r],
+      "signal_bar": fire - offsets[r],
+      "prev_price": panel.values[r, prev],
+      "swing_price": panel.values[r, curr],
+      "prev_rsi": osc[r, prev],
+      "swing_rsi": osc[r, curr],
+    }))
+
+  events = pd.concat(frames, ignore_index=True)
+  events = events.sort_values(["symbol", "signal_bar", "kind"], ignore_index=True)
+
+  # Bar positions -> timestamps, one vectorized take per symbol
+  times = {col: [] for col in ("prev", "swing", "signal")}
+  for symbol, rows in events.groupby("symbol", sort=False).indices.items():
+    index = history[symbol].index
+    for col in times:
+      times[col].append(pd.Series(index[events[f"{col}_bar"].to_numpy()[rows]], index=rows))
+  for col, parts in times.items():
+    events[f"{col}_time"] = pd.concat(parts) if parts else pd.Series([], dtype=object)
+  return events, signals
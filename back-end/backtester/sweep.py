@@ -0,0 +1,331 @@
+# What this module does
+# 1) Expand a parameter grid (dict of lists -> list of dicts).
+# 2) Cut the price history into walk-forward train/test windows
+#    (rolling or anchored).
+# 3) Run strategy(train_df, test_df, params) for every (params, split)
+#    pair on a process pool and collect the metrics into one table.
+#
+# Sharing price data
+# - OHLC + timestamps are written ONCE as .npy files in the sweep's work
+#   directory. Workers np.load them with mmap_mode="r", so every process
+#   reads the same page-cache pages and tasks only pickle a few ints.
+#
+# Resuming / dedup
+# - Each run is keyed by sha1(strategy, params, split bounds, data hash).
+# - Finished runs are appended to results.jsonl as they complete; a
+#   restarted sweep skips every key already in the file, and duplicate
+#   grid entries collapse to one key.
+# - Runs whose strategy raised are written with an "error" column but do
+#   not count as finished, so the next run() retries them.
+#
+# Result rows
+# - Params are stored as param_<name> columns, so a parameter can never
+#   overwrite a split bound or a metric of the same name (and vice versa).
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .engine import backtest_signals
+from .zones import build_sr_zones
+
+
+Strategy = Callable[[pd.DataFrame, pd.DataFrame, Dict[str, Any]], Dict[str, Any]]
+
+COLUMNS = ["Open", "High", "Low", "Close"]
+
+PARAM_PREFIX = "param_"
+# Row fields written by the runner itself; a strategy may not return these
+RESERVED = ("key", "split", "train_start", "train_end", "test_start", "test_end")
+
+
+@dataclass(frozen=True)
+class Split:
+  """
+  Row-position bounds of one walk-forward window ([start, end) each).
+  """
+  train_start: int
+  train_end: int
+  test_start: int
+  test_end: int
+
+
+def walk_forward_splits(
+  n: int,
+  train: int,
+  test: int,
+  step: Optional[int] = None,
+  anchored: bool = False,
+) -> List[Split]:
+  """
+  Walk-forward windows over n bars.
+
+  train:    bars in each training window (the first one when anchored)
+  test:     bars in each test window
+  step:     bars to advance between splits (default: test)
+  anchored: True = training always starts at bar 0 and grows;
+            False = fixed-length rolling training window
+  """
+  if train <= 0 or test <= 0:
+    raise ValueError("train and test must be > 0")
+  step = step or test
+
+  splits = []
+  train_end = train
+  while train_end + test <= n:
+    train_start = 0 if anchored else train_end - train
+    splits.append(Split(train_start, train_end, train_end, train_end + test))
+    train_end += step
+  return splits
+
+
+def param_grid(
+  grid: Dict[str, Iterable[Any]],
+) -> List[Dict[str, Any]]:
+  """
+  Cartesian product of a dict of lists.
+  """
+  names = sorted(grid)
+  return [dict(zip(names, values)) for values in itertools.product(*(grid[k] for k in names))]
+
+
+def _run_key(strategy: str, params: Dict[str, Any], split: Split, data_hash: str) -> str:
+  payload = json.dumps(
+    {"strategy": strategy, "params": params, "split": list(split.__dict__.values()), "data": data_hash},
+    sort_keys=True,
+    default=str,
+  )
+  return hashlib.sha1(payload.encode()).hexdigest()
+
+
+# -------------------------
+# Worker side
+# -------------------------
+
+_ARRAYS: Dict[str, Dict[str, np.ndarray]] = {}
+
+
+def _arrays(data_dir: str) -> Dict[str, np.ndarray]:
+  # One set of read-only memory maps per worker process
+  arrays = _ARRAYS.get(data_dir)
+  if arrays is None:
+    arrays = {
+      name: np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode="r")
+      for name in COLUMNS + ["Date"]
+    }
+    _ARRAYS[data_dir] = arrays
+  return arrays
+
+
+def _frame(arrays: Dict[str, np.ndarray], start: int, end: int) -> pd.DataFrame:
+  index = pd.DatetimeIndex(pd.to_datetime(np.asarray(arrays["Date"][start:end]), utc=True), name="Date")
+  return pd.DataFrame({c: np.asarray(arrays[c][start:end]) for c in COLUMNS}, index=index)
+
+
+def _run_one(
+  data_dir: str,
+  strategy: Strategy,
+  params: Dict[str, Any],
+  split: Split,
+) -> Dict[str, Any]:
+  arrays = _arrays(data_dir)
+  train = _frame(arrays, split.train_start, split.train_end)
+  test = _frame(arrays, split.test_start, split.test_end)
+  try:
+    metrics = dict(strategy(train, test, params))
+  except Exception as e:
+    return {"error": f"{type(e).__name__}: {e}"}
+  clash = sorted(k for k in metrics if k in RESERVED or str(k).startswith(PARAM_PREFIX))
+  if clash:
+    return {"error": f"strategy returned reserved column names: {', '.join(map(str, clash))}"}
+  return metrics
+
+
+def _row(key: str, params: Dict[str, Any], i: int, split: Split, metrics: Dict[str, Any]) -> Dict[str, Any]:
+  row = {"key": key}
+  row.update((PARAM_PREFIX + name, value) for name, value in params.items())
+  row["split"] = i
+  row.update(split.__dict__)
+  row.update(metrics)
+  return row
+
+
+# -------------------------
+# Runner
+# -------------------------
+
+class SweepRunner:
+  """
+  Parallel, resumable walk-forward parameter sweep.
+
+  Usage:
+    runner = SweepRunner(df, zone_reclaim_strategy, "sweeps/spy_5m")
+    table = runner.run(
+      param_grid({"left": [3, 5], "right": [3, 5], "zone_width_atr": [0.2, 0.3]}),
+      walk_forward_splits(len(df), train=1000, test=250),
+    )
+  """
+
+  def __init__(
+    self,
+    df: pd.DataFrame,
+    strategy: Strategy,
+    work_dir: str,
+    max_workers: Optional[int] = None,
+  ):
+    """
+    df:          OHLC frame (load_prices_from_csv contract)
+    strategy:    module-level function (must be picklable)
+    work_dir:    holds the memory-mapped data and results.jsonl
+    max_workers: process count (default: os.cpu_count())
+    """
+    self.strategy = strategy
+    self.strategy_name = f"{strategy.__module__}.{strategy.__qualname__}"
+    self.work_dir = work_dir
+    self.max_workers = max_workers
+    self.results_path = os.path.join(work_dir, "results.jsonl")
+    self.data_hash, self.data_dir = self._share(df)
+
+  def _share(self, df: pd.DataFrame):
+    arrays = {c: np.ascontiguousarray(df[c].to_numpy(dtype=np.float64)) for c in COLUMNS}
+    arrays["Date"] = np.ascontiguousarray(pd.DatetimeIndex(df.index).asi8.astype(np.int64))
+
+    h = hashlib.sha1()
+    for name in COLUMNS + ["Date"]:
+      h.update(arrays[name].tobytes())
+    data_hash = h.hexdigest()
+
+    data_dir = os.path.join(self.work_dir, "data", data_hash[:16])
+    os.makedirs(data_dir, exist_ok=True)
+    for name, values in arrays.items():
+      path = os.path.join(data_dir, f"{name}.npy")
+      if not os.path.exists(path):
+        tmp = path + ".tmp.npy"
+        np.save(tmp, values)
+        os.replace(tmp, path)
+    return data_hash, data_dir
+
+  def completed(self, include_errors: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Rows already in results.jsonl, by run key. A torn last line from a
+    crash is ignored (that run simply reruns), and so are rows with an
+    "error" unless include_errors is set: a failed run is retried, not
+    treated as finished.
+    """
+    done = {}
+    if not os.path.exists(self.results_path):
+      return done
+    with open(self.results_path) as f:
+      for line in f:
+        try:
+          row = json.loads(line)
+        except json.JSONDecodeError:
+          continue
+        if "error" in row and not include_errors:
+          continue
+        done[row["key"]] = row
+    return done
+
+  def _end_torn_line(self) -> None:
+    # Appending after a torn line would glue the first new row onto it
+    if not os.path.exists(self.results_path) or os.path.getsize(self.results_path) == 0:
+      return
+    with open(self.results_path, "rb+") as f:
+      f.seek(-1, os.SEEK_END)
+      if f.read(1) != b"\n":
+        f.write(b"\n")
+
+  def run(
+    self,
+    grid: List[Dict[str, Any]],
+    splits: List[Split],
+  ) -> pd.DataFrame:
+    """
+    Run every (params, split) pair that has no successful row in
+    results.jsonl yet.
+
+    Returns one row per pair: run key, params (as param_<name>), split
+    index and bounds, and the strategy's metrics (or an "error" column).
+    """
+    done = self.completed()
+
+    tasks = {}
+    for params in grid:
+      for i, split in enumerate(splits):
+        key = _run_key(self.strategy_name, params, split, self.data_hash)
+        tasks.setdefault(key, (params, i, split))
+
+    pending = {k: t for k, t in tasks.items() if k not in done}
+
+    if pending:
+      self._end_torn_line()
+      with ProcessPoolExecutor(max_workers=self.max_workers) as pool, \
+           open(self.results_path, "a") as out:
+        futures = {
+          pool.submit(_run_one, self.data_dir, self.strategy, params, split): key
+          for key, (params, _, split) in pending.items()
+        }
+        for future in as_completed(futures):
+          key = futures[future]
+          params, i, split = pending[key]
+          row = _row(key, params, i, split, future.result())
+          out.write(json.dumps(row, default=str) + "\n")
+          out.flush()
+          done[key] = row
+
+    return pd.DataFrame([done[k] for k in tasks])
+
+
+# -------------------------
+# Example strategy
+# -------------------------
+
+def zone_reclaim_strategy(
+  train: pd.DataFrame,
+  test: pd.DataFrame,
+  params: Dict[str, Any],
+) -> Dict[str, Any]:
+  """
+  Build SR zones on the training window, then trade zone reclaims on the
+  test window (bar low inside a zone, close above its high), as in
+  backtester.ipynb.
+
+  params: left, right, zone_width_atr, max_zones_each,
+          target_pct, stop_pct, max_bars
+  """
+  zones = build_sr_zones(
+    train,
+    left=params.get("left", 5),
+    right=params.get("right", 5),
+    zone_width_atr=params.get("zone_width_atr", 0.30),
+    max_zones_each=params.get("max_zones_each", 8),
+  )
+  zones = zones["support"] + zones["resistance"]
+  if not zones:
+    return {"trades": 0}
+
+  z_low = np.array([z.low for z in zones])
+  z_high = np.array([z.high for z in zones])
+  low = test["Low"].to_numpy()[:, None]
+  close = test["Close"].to_numpy()[:, None]
+  signals = ((z_low <= low) & (low <= z_high) & (close > z_high)).any(axis=1)
+
+  result = backtest_signals(
+    test,
+    signals,
+    target_pct=params.get("target_pct", 0.003),
+    stop_pct=params.get("stop_pct", 0.002),
+    max_bars=params.get("max_bars", 24),
+    allow_overlap=False,
+  )
+  stats = result["stats"]
+  return {k: v for k, v in stats.items() if k != "outcomes"}
@@ -0,0 +1,351 @@
+# What needs to be done
+# 1) Tag every bar with its nearest / containing / next-above / next-below
+#    SR zone without a Python call per bar.
+# 2) Do it point-in-time: a bar may only see zones built from pivots that
+#    had been confirmed by its close (no lookahead).
+#
+# Brute-force approach
+# - nearest_zone(price, zones) per bar: min() over Z zones -> O(N * Z)
+#   Python work.
+#
+# Approach below
+# - ZoneIndex sorts one zone set by level / low / high once (O(Z log Z))
+#   and answers each query for a whole price array with np.searchsorted
+#   (O(N log Z) in NumPy).
+# - Containment: zone boundaries split the price axis into elementary
+#   segments; the best containing zone is precomputed per segment, so a
+#   lookup is one searchsorted as well.
+# - PointInTimeZones keeps one ZoneIndex per pivot-confirmation event and
+#   queries each contiguous run of bars with the index that was live for
+#   it: the Python loop is over zone-set versions, not bars.
+# - Versions are built incrementally: pivots are sorted by price once, and
+#   each confirmation only switches its pivots on in that sorted order (no
+#   re-filtering or re-sorting). Clustering is one NumPy pass; SRZone
+#   objects are only made for the max_zones_each strongest groups.
+
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .zones import SRZone, compute_atr, find_pivots, make_zones
+
+
+Zones = Union[Sequence[SRZone], Dict[str, List[SRZone]]]
+
+
+class ZoneIndex:
+  """
+  Sorted, array-backed index over one set of zones.
+
+  Every query takes a price array and returns int positions into
+  `self.zones` (-1 where there is no answer).
+
+  Usage:
+    index = ZoneIndex(build_sr_zones(df))
+    nearest = index.nearest(df["Close"].to_numpy())
+  """
+
+  def __init__(self, zones: Zones):
+    if isinstance(zones, dict):
+      zones = list(zones.get("support", [])) + list(zones.get("resistance", []))
+    self.zones: List[SRZone] = list(zones)
+
+    z = len(self.zones)
+    self.level = np.array([zz.level for zz in self.zones], dtype=float)
+    self.low = np.array([zz.low for zz in self.zones], dtype=float)
+    self.high = np.array([zz.high for zz in self.zones], dtype=float)
+    self.score = np.array([zz.score for zz in self.zones], dtype=float)
+    rank = np.arange(z)
+
+    # Nearest: sort by (level, original position). For a run of equal
+    # levels, point at its first member so ties resolve to the zone listed
+    # first, like min() in nearest_zone.
+    self._by_level = np.lexsort((rank, self.level))
+    self._levels_sorted = self.level[self._by_level]
+    first = np.arange(z)
+    if z:
+      same = np.concatenate([[False], self._levels_sorted[1:] == self._levels_sorted[:-1]])
+      first = np.maximum.accumulate(np.where(same, 0, np.arange(z)))
+    self._level_first = self._by_level[first] if z else self._by_level
+
+    # Above / below: first zone entirely above, last zone entirely below
+    self._by_low = np.argsort(self.low, kind="stable")
+    self._lows_sorted = self.low[self._by_low]
+    self._by_high = np.argsort(self.high, kind="stable")
+    self._highs_sorted = self.high[self._by_high]
+
+    self._build_segments()
+
+  def __len__(self) -> int:
+    return len(self.zones)
+
+  def _build_segments(self) -> None:
+    """
+    Precompute the best containing zone (highest score, then listed first)
+    for every boundary point and every open segment between boundaries.
+
+    Time: O(B * Z) with B <= 2Z boundaries
+    """
+    bounds = np.unique(np.concatenate([self.low, self.high]))
+    self._bounds = bounds
+    z = len(self.zones)
+
+    # Evaluate containment at each boundary and at each open segment midpoint
+    mids = (bounds[:-1] + bounds[1:]) / 2.0 if len(bounds) > 1 else np.empty(0)
+
+    def best(points: np.ndarray) -> np.ndarray:
+      if z == 0 or len(points) == 0:
+        return np.full(len(points), -1, dtype=np.int64)
+      inside = (self.low[None, :] <= points[:, None]) & (points[:, None] <= self.high[None, :])
+      # Highest score wins; argmax returns the first (listed first) on ties
+      scores = np.where(inside, self.score[None, :], -np.inf)
+      out = scores.argmax(axis=1)
+      out[~inside.any(axis=1)] = -1
+      return out
+
+    self._best_at_bound = best(bounds)
+    # Segment j is the open interval (bounds[j-1], bounds[j]); pad both ends
+    self._best_in_segment = np.concatenate([[-1], best(mids), [-1]]).astype(np.int64)
+
+  # -------------------------
+  # Queries
+  # -------------------------
+
+  def nearest(self, prices: np.ndarray) -> np.ndarray:
+    """
+    Zone with the closest level to each price (nearest_zone, vectorized).
+    """
+    prices = np.asarray(prices, dtype=float)
+    z = len(self.zones)
+    if z == 0:
+      return np.full(prices.shape, -1, dtype=np.int64)
+
+    right = np.searchsorted(self._levels_sorted, prices, side="left")
+    left = np.searchsorted(self._levels_sorted, prices, side="right") - 1
+
+    r = np.minimum(right, z - 1)
+    l = np.maximum(left, 0)
+    r_zone = self._level_first[r]
+    l_zone = self._level_first[l]
+
+    d_r = np.where(right < z, np.abs(prices - self.level[r_zone]), np.inf)
+    d_l = np.where(left >= 0, np.abs(prices - self.level[l_zone]), np.inf)
+
+    # Equal distance: the zone listed first wins
+    take_left = (d_l < d_r) | ((d_l == d_r) & (l_zone < r_zone))
+    out = np.where(take_left, l_zone, r_zone)
+    out[np.isnan(prices)] = -1
+    return out
+
+  def containing(self, prices: np.ndarray) -> np.ndarray:
+    """
+    Zone whose [low, high] contains each price. When zones overlap, the
+    highest-scoring one wins.
+    """
+    prices = np.asarray(prices, dtype=float)
+    if len(self.zones) == 0:
+      return np.full(prices.shape, -1, dtype=np.int64)
+
+    j = np.searchsorted(self._bounds, prices, side="left")
+    jc = np.minimum(j, len(self._bounds) - 1)
+    on_bound = (j < len(self._bounds)) & (self._bounds[jc] == prices)
+    return np.where(on_bound, self._best_at_bound[jc], self._best_in_segment[j])
+
+  def above(self, prices: np.ndarray) -> np.ndarray:
+    """
+    Closest zone entirely above each price (lowest low > price).
+    """
+    prices = np.asarray(prices, dtype=float)
+    z = len(self.zones)
+    j = np.searchsorted(self._lows_sorted, prices, side="right")
+    out = self._by_low[np.minimum(j, max(z - 1, 0))] if z else np.zeros(prices.shape, dtype=np.int64)
+    return np.where(j < z, out, -1)
+
+  def below(self, prices: np.ndarray) -> np.ndarray:
+    """
+    Closest zone entirely below each price (highest high < price).
+    """
+    prices = np.asarray(prices, dtype=float)
+    z = len(self.zones)
+    j = np.searchsorted(self._highs_sorted, prices, side="left") - 1
+    out = self._by_high[np.maximum(j, 0)] if z else np.zeros(prices.shape, dtype=np.int64)
+    return np.where(j >= 0, out, -1)
+
+  def features(self, prices: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Zone-distance features for each price (NaN where there is no zone).
+    """
+    prices = np.asarray(prices, dtype=float)
+    nearest = self.nearest(prices)
+    above = self.above(prices)
+    below = self.below(prices)
+    inside = self.containing(prices)
+
+    def pick(values: np.ndarray, idx: np.ndarray) -> np.ndarray:
+      if len(values) == 0:
+        return np.full(idx.shape, np.nan)
+      return np.where(idx >= 0, values[np.maximum(idx, 0)], np.nan)
+
+    return {
+      "nearest_zone": nearest,
+      "nearest_level": pick(self.level, nearest),
+      "nearest_dist": prices - pick(self.level, nearest),
+      "in_zone": inside >= 0,
+      "containing_zone": inside,
+      "zone_above": above,
+      "dist_to_above": pick(self.low, above) - prices,
+      "zone_below": below,
+      "dist_to_below": prices - pick(self.high, below),
+    }
+
+
+def _strongest_groups(
+  prices: np.ndarray,
+  idxs: np.ndarray,
+  tolerance: float,
+  max_groups: int,
+) -> List[tuple]:
+  """
+  cluster_sorted_pivots, keeping only the groups make_zones would keep
+  (highest score first, ties in price order), in price order.
+
+  Time: O(P) in NumPy, O(max_groups) Python
+  """
+  if prices.size == 0:
+    return []
+  breaks = np.flatnonzero(prices[1:] > prices[:-1] + tolerance) + 1
+  starts = np.concatenate([[0], breaks])
+  ends = np.concatenate([breaks, [prices.size]])
+  touches = ends - starts
+  # make_zones' score, in the same float arithmetic
+  score = touches * (1.0 / (1 + touches / 50.0))
+  keep = np.sort(np.argsort(-score, kind="stable")[:max_groups])
+  last_touch = np.maximum.reduceat(idxs, starts)
+  return [
+    (float(prices[starts[g]]), float(prices[ends[g] - 1]), int(touches[g]), int(last_touch[g]))
+    for g in keep
+  ]
+
+
+class PointInTimeZones:
+  """
+  Zone sets as they were known at each bar.
+
+  A new version starts at every bar on which at least one pivot is
+  confirmed (pivot bar + `right`); each version is built with the ATR
+  tolerance of that bar, exactly as build_sr_zones would on the history up
+  to and including it. Between confirmations the zone set is held fixed.
+
+  Usage:
+    pit = PointInTimeZones.from_frame(df, left=5, right=5)
+    feats = pit.features(df["Close"].to_numpy())   # no lookahead
+  """
+
+  def __init__(self, starts: np.ndarray, indexes: List[ZoneIndex], n: int):
+    """
+    starts:  (V,) first bar each version applies to (ascending)
+    indexes: (V,) ZoneIndex per version
+    n:       total bars
+    """
+    self.starts = np.asarray(starts, dtype=np.int64)
+    self.indexes = indexes
+    self.n = n
+
+  @classmethod
+  def from_frame(
+    cls,
+    df: pd.DataFrame,
+    left: int = 5,
+    right: int = 5,
+    atr_period: int = 14,
+    zone_width_atr: float = 0.30,
+    min_zone_width: float = 0.05,
+    max_zones_each: int = 8,
+  ) -> "PointInTimeZones":
+    """
+    Build every version from one vectorized ATR/pivot pass.
+
+    Time: O(N + P log P) + O(V * P) NumPy work for V versions over P
+    pivots; Python work is O(V * max_zones_each)
+    """
+    n = len(df)
+    atr = compute_atr(df, period=atr_period).to_numpy()
+    # Latest ATR known at each bar (NaN until the first full window)
+    known_atr = pd.Series(atr).ffill().to_numpy()
+    tol = np.maximum(min_zone_width, np.nan_to_num(known_atr, nan=0.0) * zone_width_atr)
+
+    ph, pl = find_pivots(df, left=left, right=right)
+    pivots = {
+      "resistance": np.flatnonzero(~np.isnan(ph.to_numpy())),
+      "support": np.flatnonzero(~np.isnan(pl.to_numpy())),
+    }
+    prices = {
+      "resistance": ph.to_numpy(),
+      "support": pl.to_numpy(),
+    }
+
+    # find_pivots tests bar i against [i-left, i+right]: the pivot is
+    # known at the close of the window's last bar
+    lag = right
+    confirm_bars = np.unique(np.concatenate([p + lag for p in pivots.values()]))
+
+    # Per kind: pivots sorted by price once (stable, so equal prices keep
+    # bar order), the sorted slot of each pivot in bar order, and which
+    # slots are confirmed so far
+    sorted_prices, sorted_pos, slot, active, seen = {}, {}, {}, {}, {}
+    for kind, pos in pivots.items():
+      order = np.argsort(prices[kind][pos], kind="stable")
+      sorted_prices[kind] = prices[kind][pos][order]
+      sorted_pos[kind] = pos[order]
+      slot[kind] = np.empty(len(pos), dtype=np.int64)
+      slot[kind][order] = np.arange(len(pos))
+      active[kind] = np.zeros(len(pos), dtype=bool)
+      seen[kind] = 0
+
+    starts = [0]
+    indexes = [ZoneIndex([])]
+    for t in confirm_bars:
+      version = {}
+      for kind, pos in pivots.items():
+        confirmed = int(np.searchsorted(pos, t - lag, side="right"))
+        active[kind][slot[kind][seen[kind]:confirmed]] = True
+        seen[kind] = confirmed
+        on = active[kind]
+        groups = _strongest_groups(sorted_prices[kind][on], sorted_pos[kind][on], tol[t],
+                                   max_zones_each)
+        version[kind] = make_zones(groups, kind, tol[t], max_zones_each)
+      starts.append(int(t))
+      indexes.append(ZoneIndex(version))
+
+    return cls(np.array(starts), indexes, n)
+
+  def version_at(self, bar: int) -> ZoneIndex:
+    """
+    ZoneIndex live at the close of `bar`.
+    """
+    return self.indexes[int(np.searchsorted(self.starts, bar, side="right")) - 1]
+
+  def features(self, prices: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    ZoneIndex.features for a price per bar (len == n), each bar queried
+    against the zone set known at its close. Zone positions in the output
+    refer to that bar's version (see version_at).
+    """
+    prices = np.asarray(prices, dtype=float)
+    if len(prices) != self.n:
+      raise ValueError("prices must have one entry per bar")
+
+    out: Dict[str, np.ndarray] = {}
+    bounds = np.append(self.starts, self.n)
+    for v, index in enumerate(self.indexes):
+      a, b = int(bounds[v]), int(bounds[v + 1])
+      if a >= b:
+        continue
+      for key, values in index.features(prices[a:b]).items():
+        if key not in out:
+          out[key] = np.empty(self.n, dtype=values.dtype)
+        out[key][a:b] = values
+    return out
@@ -0,0 +1,208 @@
+# What needs to be done
+# 1) Maintain support/resistance zones on a LIVE feed, one bar at a time,
+#    with the same output as build_sr_zones on the full history.
+#
+# Brute-force approach (what build_sr_zones costs per bar)
+# - Copy the frame, recompute ATR, re-detect pivots with centered rolling
+#   max/min, rebuild idx_to_pos, recluster: O(N) per bar.
+#
+# Incremental approach below
+# - ATR: ring of the last `atr_period` true ranges. O(1) per bar.
+# - Pivots: monotonic deques over the last left+right+1 highs/lows give the
+#   window max/min in O(1) amortized. The bar `right` bars back is a pivot
+#   when it equals that max/min -> pivots are confirmed `right` bars late,
+#   over the same [i-left, i+right] window as find_pivots.
+# - Zones: confirmed pivot prices are kept sorted (bisect insert,
+#   O(log P) search). zones() groups them with cluster_sorted_pivots (one
+#   vectorized pass over the sorted arrays), and caches the
+#   result until a new pivot arrives or the tolerance (latest ATR) changes.
+#
+# Edge cases
+# - Ties: equal highs/lows inside one window are all pivots (same as ==
+#   against rolling max/min in find_pivots).
+# - Before atr_period bars the tolerance is min_zone_width, matching the
+#   batch function's "no ATR yet" fallback.
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from collections import deque
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .zones import SRZone, cluster_sorted_pivots, make_zones
+
+
+class SRZoneTracker:
+  """
+  Streaming equivalent of build_sr_zones.
+
+  Usage:
+    tracker = SRZoneTracker(left=5, right=5)
+    for bar in feed:
+      tracker.update(bar)          # Mapping with High / Low / Close
+    zones = tracker.zones()        # {"support": [...], "resistance": [...]}
+
+  Replaying a whole frame gives the same zones as build_sr_zones(df, ...).
+  """
+
+  __slots__ = (
+    "left", "right", "atr_period", "zone_width_atr", "min_zone_width", "max_zones_each",
+    "n", "_window", "_highs", "_lows", "_max_q", "_min_q",
+    "_prev_close", "_trs", "_atr",
+    "_prices", "_idxs", "_cache", "_cache_key",
+  )
+
+  def __init__(
+    self,
+    left: int = 5,
+    right: int = 5,
+    atr_period: int = 14,
+    zone_width_atr: float = 0.30,
+    min_zone_width: float = 0.05,
+    max_zones_each: int = 8,
+  ):
+    self.left = left
+    self.right = right
+    self.atr_period = atr_period
+    self.zone_width_atr = zone_width_atr
+    self.min_zone_width = min_zone_width
+    self.max_zones_each = max_zones_each
+
+    self.n = 0
+    self._window = left + right + 1
+
+    # Last `window` highs/lows, plus monotonic deques of (pos, value)
+    self._highs: deque = deque(maxlen=self._window)
+    self._lows: deque = deque(maxlen=self._window)
+    self._max_q: deque = deque()
+    self._min_q: deque = deque()
+
+    self._prev_close: Optional[float] = None
+    self._trs: deque = deque(maxlen=atr_period)
+    self._atr: Optional[float] = None
+
+    # Sorted pivot prices and their bar positions, per kind
+    self._prices: Dict[str, List[float]] = {"support": [], "resistance": []}
+    self._idxs: Dict[str, List[int]] = {"support": [], "resistance": []}
+
+    self._cache: Optional[Dict[str, List[SRZone]]] = None
+    self._cache_key: Optional[Tuple[int, int, float]] = None
+
+  # -------------------------
+  # Ingest
+  # -------------------------
+
+  def update(self, bar: Mapping[str, Any]) -> None:
+    """
+    Ingest the next bar (any mapping with High, Low, Close, e.g. a
+    DataFrame row or a dict from a live feed).
+    """
+    self.update_hlc(float(bar["High"]), float(bar["Low"]), float(bar["Close"]))
+
+  def update_hlc(self, high: float, low: float, close: float) -> None:
+    """
+    Ingest the next bar as plain floats.
+
+    Time: O(1) amortized, plus O(log P) when a pivot is confirmed
+    """
+    pos = self.n
+    self.n += 1
+
+    # ATR (SMA of true range). fsum keeps it exactly rounded, so the
+    # replayed value does not drift from the batch rolling mean.
+    if self._prev_close is None:
+      tr = high - low
+    else:
+      tr = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+    self._prev_close = close
+    self._trs.append(tr)
+    if len(self._trs) == self.atr_period:
+      self._atr = math.fsum(self._trs) / self.atr_period
+
+    # Window max of highs / min of lows (ties kept so equal values survive)
+    self._highs.append(high)
+    self._lows.append(low)
+    while self._max_q and self._max_q[-1][1] < high:
+      self._max_q.pop()
+    self._max_q.append((pos, high))
+    while self._min_q and self._min_q[-1][1] > low:
+      self._min_q.pop()
+    self._min_q.append((pos, low))
+
+    oldest = pos - self._window + 1
+    while self._max_q[0][0] < oldest:
+      self._max_q.popleft()
+    while self._min_q[0][0] < oldest:
+      self._min_q.popleft()
+
+    if oldest < 0:
+      return
+
+    # The bar `right` bars back now has its complete [center-left, center+right] window
+    center = pos - self.right
+    c_high = self._highs[self.left]
+    c_low = self._lows[self.left]
+    if c_high == self._max_q[0][1]:
+      self._add_pivot("resistance", c_high, center)
+    if c_low == self._min_q[0][1]:
+      self._add_pivot("support", c_low, center)
+
+  def _add_pivot(self, kind: str, price: float, idx: int) -> None:
+    prices = self._prices[kind]
+    at = bisect_right(prices, price)
+    prices.insert(at, price)
+    self._idxs[kind].insert(at, idx)
+
+  @classmethod
+  def replay(cls, df: pd.DataFrame, **kwargs) -> "SRZoneTracker":
+    """
+    Feed every bar of an OHLC frame through a new tracker.
+    """
+    tracker = cls(**kwargs)
+    for h, l, c in zip(
+      df["High"].to_numpy(dtype=float),
+      df["Low"].to_numpy(dtype=float),
+      df["Close"].to_numpy(dtype=float),
+    ):
+      tracker.update_hlc(h, l, c)
+    return tracker
+
+  # -------------------------
+  # Query
+  # -------------------------
+
+  @property
+  def atr(self) -> Optional[float]:
+    return self._atr
+
+  @property
+  def tolerance(self) -> float:
+    recent_atr = self._atr if self._atr is not None else 0.0
+    return max(self.min_zone_width, recent_atr * self.zone_width_atr)
+
+  def pivots(self, kind: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Confirmed pivot (prices, bar positions) for "support" or "resistance",
+    sorted by price.
+    """
+    return np.array(self._prices[kind], dtype=float), np.array(self._idxs[kind], dtype=np.int64)
+
+  def zones(self) -> Dict[str, List[SRZone]]:
+    """
+    Current zones, same shape as build_sr_zones.
+
+    Time: O(P) vectorized when pivots or tolerance changed, O(1) otherwise
+    """
+    tolerance = self.tolerance
+    key = (len(self._prices["support"]), len(self._prices["resistance"]), tolerance)
+    if self._cache is None or self._cache_key != key:
+      self._cache = {
+        kind: make_zones(cluster_sorted_pivots(*self.pivots(kind), tolerance), kind, tolerance, self.max_zones_each)
+        for kind in ("support", "resistance")
+      }
+      self._cache_key = key
+    return self._cache
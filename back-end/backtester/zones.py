@@ -0,0 +1,321 @@
+# What needs to be done
+# 1) Find swing highs/lows ("pivots") from OHLC data.
+# 2) Turn pivot prices into support/resistance "zones" by clustering
+#    nearby prices (because levels are fuzzy, not exact).
+# 3) Score zones (touches + recency), and return a compact set of
+#    strongest zones you can use in a backtester.
+#
+# Brute-force approach (for intuition)
+# - For each bar, look back/forward W bars and declare a pivot if it's
+#   the max/min in that window (O(N*W)).
+# - Put every pivot price into a list, then compare each pivot to every
+#   other pivot and group if within some tolerance (O(P^2)).
+# - This works but gets slow and messy as P grows.
+#
+# Edge cases
+# - Flat regions (many equal highs/lows) -> duplicates; handle ties.
+# - Very low volatility -> tolerance too small; clamp minimum tolerance.
+# - Gaps / split-adjusted data -> verify data is adjusted/consistent.
+# - Early bars (not enough window) -> pivots undefined.
+# - If data has missing candles -> drop/forward-fill carefully.
+#
+# Optimal-ish approach below
+# - Pivot detection: O(N) using rolling max/min (with pandas).
+# - Clustering: sort pivots then single pass merge by tolerance O(P log P).
+# - Scoring: O(P) per zone aggregation.
+#
+# Notes
+# - This produces "zones" as [zone_low, zone_high] with a "level"
+#   (center) and metadata. Zones are stable and easy to backtest.
+# - Uses ATR to scale tolerance automatically to volatility regime.
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Dict
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class SRZone:
+  kind: str                  # "support" or "resistance"
+  level: float               # center price of the zone
+  low: float                 # zone lower bound
+  high: float                # zone upper bound
+  touches: int               # how many pivots contributed
+  last_touch_idx: int        # index (row number) of last touch pivot
+  score: float               # computed strength score
+
+
+def compute_atr(
+  df: pd.DataFrame,
+  period: int = 14,
+) -> pd.Series:
+  """
+  ATR (SMA of True Range).
+
+  Time:  O(N)
+  Space: O(N)
+  """
+  high = df["High"].astype(float)
+  low = df["Low"].astype(float)
+  close = df["Close"].astype(float)
+
+  prev_close = close.shift(1)
+
+  tr1 = (high - low).abs()
+  tr2 = (high - prev_close).abs()
+  tr3 = (low - prev_close).abs()
+
+  tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+
+  atr = tr.rolling(period, min_periods=period).mean()
+  return atr
+
+
+def find_pivots(
+  df: pd.DataFrame,
+  left: int = 5,
+  right: int = 5,
+  high_col: str = "High",
+  low_col: str = "Low",
+) -> Tuple[pd.Series, pd.Series]:
+  """
+  Pivot highs/lows over the window [i-left, i+right]:
+  - pivot high at i if High[i] is the max in [i-left, i+right]
+  - pivot low  at i if Low[i]  is the min in [i-left, i+right]
+
+  The window is a trailing rolling window ending at i+right, shifted back
+  by `right` (a centered window would be symmetric even when left != right).
+
+  Complexity:
+  - Rolling max/min: ~O(N) (pandas optimized)
+  """
+  high = df[high_col].astype(float)
+  low = df[low_col].astype(float)
+
+  window = left + right + 1
+
+  roll_max = high.rolling(window, min_periods=window).max().shift(-right)
+  roll_min = low.rolling(window, min_periods=window).min().shift(-right)
+
+  pivot_high = (high == roll_max)
+  pivot_low = (low == roll_min)
+
+  # Convert booleans to price series (NaN where not a pivot)
+  pivot_high_price = high.where(pivot_high, np.nan)
+  pivot_low_price = low.where(pivot_low, np.nan)
+
+  return pivot_high_price, pivot_low_price
+
+
+def _cluster_prices_into_zones(
+  prices: np.ndarray,
+  idxs: np.ndarray,
+  tolerance: float,
+) -> List[Tuple[float, float, int, int]]:
+  """
+  Cluster sorted pivot prices into contiguous groups if gap <= tolerance.
+
+  Returns list of tuples:
+  (group_low, group_high, touches, last_touch_idx)
+
+  Complexity:
+  - Sort: O(P log P)
+  - Single pass merge: O(P)
+  """
+  if prices.size == 0:
+    return []
+
+  order = np.argsort(prices)
+  prices_sorted = prices[order]
+  idxs_sorted = idxs[order]
+
+  groups: List[Tuple[float, float, int, int]] = []
+
+  g_low = prices_sorted[0]
+  g_high = prices_sorted[0]
+  touches = 1
+  last_touch_idx = int(idxs_sorted[0])
+
+  for p, i in zip(prices_sorted[1:], idxs_sorted[1:]):
+    # O(1)
+    if p <= g_high + tolerance:
+      # Merge into current group
+      g_high = max(g_high, p)
+      g_low = min(g_low, p)
+      touches += 1
+      last_touch_idx = max(last_touch_idx, int(i))
+    else:
+      # Close group, start new
+      groups.append((float(g_low), float(g_high), touches, last_touch_idx))
+      g_low = p
+      g_high = p
+      touches = 1
+      last_touch_idx = int(i)
+
+  groups.append((float(g_low), float(g_high), touches, last_touch_idx))
+  return groups
+
+
+def cluster_sorted_pivots(
+  prices: np.ndarray,
+  idxs: np.ndarray,
+  tolerance: float,
+) -> List[Tuple[float, float, int, int]]:
+  """
+  Vectorized _cluster_prices_into_zones for prices that are ALREADY sorted.
+
+  The merge test p <= g_high + tolerance only ever compares a price with
+  its sorted predecessor, so groups break exactly where
+  prices[i] > prices[i-1] + tolerance.
+
+  Complexity: O(P) in NumPy
+  """
+  if prices.size == 0:
+    return []
+
+  breaks = np.flatnonzero(prices[1:] > prices[:-1] + tolerance) + 1
+  starts = np.concatenate([[0], breaks])
+  ends = np.concatenate([breaks, [prices.size]])
+  last_touch = np.maximum.reduceat(idxs, starts)
+
+  return [
+    (float(prices[s]), float(prices[e - 1]), int(e - s), int(t))
+    for s, e, t in zip(starts, ends, last_touch)
+  ]
+
+
+def make_zones(
+  groups: List[Tuple[float, float, int, int]],
+  kind: str,
+  tolerance: float,
+  max_zones_each: int,
+) -> List[SRZone]:
+  """
+  Turn clustered pivot groups into scored SRZones, strongest first.
+  Shared by build_sr_zones and SRZoneTracker.
+  """
+  zones: List[SRZone] = []
+  for g_low, g_high, touches, last_touch_pos in groups:
+    level = (g_low + g_high) / 2.0
+
+    # Optional: widen to a consistent band so zones are not razor thin.
+    # O(1)
+    half_width = max((g_high - g_low) / 2.0, tolerance / 2.0)
+    low = level - half_width
+    high = level + half_width
+
+    # Recency: newer touches matter more. O(1)
+    recency_weight = 1.0 / (1+touches / 50.0)
+
+    score = float(touches) * float(recency_weight)
+
+    zones.append(
+      SRZone(
+        kind=kind,
+        level=float(level),
+        low=float(low),
+        high=float(high),
+        touches=int(touches),
+        last_touch_idx=int(last_touch_pos),
+        score=float(score),
+      )
+    )
+
+  # Keep strongest zones first
+  zones.sort(key=lambda z: z.score, reverse=True)
+  return zones[:max_zones_each]
+
+
+def build_sr_zones(
+  df: pd.DataFrame,
+  left: int = 5,
+  right: int = 5,
+  atr_period: int = 14,
+  zone_width_atr: float = 0.30,
+  min_zone_width: float = 0.05,
+  max_zones_each: int = 8,
+  high_col: str = "High",
+  low_col: str = "Low",
+  close_col: str = "Close",
+) -> Dict[str, List[SRZone]]:
+  """
+  Build support/resistance zones from pivot lows/highs.
+
+  Tolerance / zone width:
+  - Use ATR * zone_width_atr as the merge tolerance (vol-adjusted).
+  - Also enforce a minimum width to avoid tiny tolerance in quiet markets.
+
+  Scoring:
+  - score = touches * recency_weight
+  - recency_weight decays with how long since last touch.
+
+  Complexity:
+  - ATR: O(N)
+  - Pivots: ~O(N)
+  - Clustering: O(P log P)
+  """
+  df = df.copy()
+
+  atr = compute_atr(
+    df,
+    period=atr_period,
+  )
+
+  # Use the most recent ATR as a scaling value
+  recent_atr = float(atr.dropna().iloc[-1]) if atr.dropna().size else 0.0
+  tolerance = max(min_zone_width, recent_atr * zone_width_atr)
+
+  pivot_high_price, pivot_low_price = find_pivots(
+    df,
+    left=left,
+    right=right,
+    high_col=high_col,
+    low_col=low_col,
+  )
+
+  # Extract pivot arrays (prices + integer row positions for scoring).
+  # Positions come straight from the NaN mask: mapping index labels back
+  # to rows with a dict costs a Python iteration over every timestamp.
+  ph_values = pivot_high_price.to_numpy(dtype=float)
+  pl_values = pivot_low_price.to_numpy(dtype=float)
+
+  ph_pos = np.flatnonzero(~np.isnan(ph_values))
+  pl_pos = np.flatnonzero(~np.isnan(pl_values))
+
+  ph_prices = ph_values[ph_pos]
+  pl_prices = pl_values[pl_pos]
+
+  res_groups = _cluster_prices_into_zones(
+    prices=ph_prices,
+    idxs=ph_pos,
+    tolerance=tolerance,
+  )
+  sup_groups = _cluster_prices_into_zones(
+    prices=pl_prices,
+    idxs=pl_pos,
+    tolerance=tolerance,
+  )
+
+  support_zones = make_zones(sup_groups, "support", tolerance, max_zones_each)
+  resistance_zones = make_zones(res_groups, "resistance", tolerance, max_zones_each)
+
+  return {"support": support_zones, "resistance": resistance_zones}
+
+
+def nearest_zone(
+  price: float,
+  zones: List[SRZone],
+) -> Optional[SRZone]:
+  """
+  Find the closest zone by distance to its center (level).
+  Complexity: O(Z)
+  """
+  if not zones:
+    return None
+
+  best = min(zones, key=lambda z: abs(price - z.level))
+  return best
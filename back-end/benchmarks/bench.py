@@ -0,0 +1,338 @@
+"""
+Benchmarks for the indicator, zone, sizing and screening hot paths.
+
+Every benchmark runs at several input sizes (bars, pivots, scenarios or
+symbols) on synthetic data, records wall time and peak traced memory, and
+fits a scaling exponent (slope of log time vs. log size) so complexity
+claims such as "O(P log P) clustering" can be checked on real numbers.
+
+Usage (from back-end/):
+    python -m benchmarks.bench                          # quick sizes
+    python -m benchmarks.bench --full --out bench.json  # up to 10^7 bars / 5,000 symbols
+    python -m benchmarks.bench --only zones --compare baseline.json
+
+--compare exits with status 1 if any (benchmark, size) is slower, or uses
+more memory, than the baseline by more than --tolerance.
+"""
+
+import argparse
+import gc
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtester.zones import _cluster_prices_into_zones, build_sr_zones, compute_atr, find_pivots
+from riskcalculator.batch_sizer import size_contracts_batch
+from riskcalculator.option_position_sizer import SizingInput, size_contracts
+from screener.providers import FetchStage, LocalDataProvider
+from screener.screener import StockScreener
+from screener.snapshot import build_snapshot
+
+BAR_SIZES = [10**3, 10**4, 10**5]
+BAR_SIZES_FULL = [10**3, 10**4, 10**5, 10**6, 10**7]
+UNIVERSE_SIZES = [10, 100, 1000]
+UNIVERSE_SIZES_FULL = [10, 100, 1000, 5000]
+
+
+def synthetic_ohlc(n: int, seed: int = 0, freq: str = "5min") -> pd.DataFrame:
+    """
+    Random-walk OHLC frame in the load_prices_from_csv contract.
+
+    Args:
+        n: Number of bars
+        seed: Seed for the random generator
+        freq: Bar spacing of the UTC index
+    """
+    rng = np.random.default_rng(seed)
+    close = 400.0 * np.exp(np.cumsum(rng.normal(0.0, 0.001, size=n)))
+    open_ = np.empty(n)
+    open_[0] = close[0]
+    open_[1:] = close[:-1]
+    wick = np.abs(rng.normal(0.0, 0.0008, size=(2, n)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    index = pd.date_range("2000-01-03 14:30", periods=n, freq=freq, tz="UTC", name="Date")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close}, index=index)
+
+
+def synthetic_sizing(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    n random size_contracts scenarios as SizingInput-named columns.
+    """
+    rng = np.random.default_rng(seed)
+    entry_low = rng.uniform(100.0, 500.0, size=n)
+    return pd.DataFrame({
+        "account_size": rng.choice([5000.0, 25000.0, 100000.0], size=n),
+        "risk_pct": rng.uniform(0.005, 0.03, size=n),
+        "direction": np.where(rng.random(n) < 0.5, "call", "put"),
+        "entry_low": entry_low,
+        "entry_high": entry_low + rng.uniform(0.05, 0.5, size=n),
+        "stop": np.nan,
+        "delta": rng.uniform(0.2, 0.7, size=n),
+        "buffer": 1.10,
+        "est_entry_premium": rng.uniform(0.5, 8.0, size=n),
+        "pct_drawdown_cap": rng.choice([np.nan, 0.10, 0.25], size=n),
+    }).assign(stop=lambda d: np.where(d["direction"] == "call",
+                                      d["entry_low"] - rng.uniform(0.2, 3.0, size=n),
+                                      d["entry_high"] + rng.uniform(0.2, 3.0, size=n)))
+
+
+@dataclass
+class Benchmark:
+    """
+    One benchmarked function.
+
+    setup(n) builds the inputs outside the timed region; run(state) is timed.
+    claim is the documented complexity, recorded next to the fitted exponent.
+    """
+    name: str
+    group: str
+    unit: str
+    setup: Callable[[int], Any]
+    run: Callable[[Any], Any]
+    claim: str
+    max_size: Optional[int] = None
+
+
+def _pivot_inputs(n: int):
+    rng = np.random.default_rng(n)
+    return rng.uniform(390.0, 410.0, size=n), rng.permutation(n), 0.05
+
+
+def _rsi_input(n: int):
+    return StockScreener(symbols=["X"], provider=LocalDataProvider({}, {})), synthetic_ohlc(n)["Close"]
+
+
+def _scalar_sizing(n: int) -> List[SizingInput]:
+    rows = synthetic_sizing(n).to_dict("records")
+    return [SizingInput(**{k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()})
+            for row in rows]
+
+
+def _is_call_sizing(n: int) -> pd.DataFrame:
+    # Boolean direction column: the batch sizer's no-string-matching path
+    df = synthetic_sizing(n)
+    return df.drop(columns="direction").assign(is_call=(df["direction"] == "call").to_numpy())
+
+
+def _screen_input(n: int):
+    symbols = [f"S{i:05d}" for i in range(n)]
+    provider = LocalDataProvider.synthetic(symbols, n_bars=260, seed=n)
+    return StockScreener(symbols=symbols, fetcher=FetchStage(provider, max_workers=8))
+
+
+SCREEN_CRITERIA = dict(pe_ratio_max=40, rsi_threshold_lower=30, sma_200_above=True)
+
+
+def _screen(screener: StockScreener):
+    return screener.screen(**SCREEN_CRITERIA)
+
+
+def _snapshot_input(n: int):
+    return build_snapshot(_screen_input(n))
+
+
+BENCHMARKS = [
+    Benchmark("compute_atr", "zones", "bars", synthetic_ohlc, lambda df: compute_atr(df), "O(N)"),
+    Benchmark("find_pivots", "zones", "bars", synthetic_ohlc, lambda df: find_pivots(df), "O(N * window)"),
+    Benchmark("_cluster_prices_into_zones", "zones", "pivots", _pivot_inputs,
+              lambda a: _cluster_prices_into_zones(*a), "O(P log P)"),
+    Benchmark("build_sr_zones", "zones", "bars", synthetic_ohlc, lambda df: build_sr_zones(df), "O(N + P log P)"),
+    Benchmark("StockScreener._calculate_rsi", "indicators", "bars", _rsi_input,
+              lambda a: a[0]._calculate_rsi(a[1]), "O(N)"),
+    Benchmark("size_contracts", "sizing", "scenarios", _scalar_sizing,
+              lambda inputs: [size_contracts(inp) for inp in inputs], "O(N)", max_size=10**5),
+    Benchmark("size_contracts_batch", "sizing", "scenarios", synthetic_sizing,
+              size_contracts_batch, "O(N)"),
+    Benchmark("size_contracts_batch[is_call]", "sizing", "scenarios", _is_call_sizing,
+              size_contracts_batch, "O(N)"),
+    Benchmark("StockScreener.screen", "screener", "symbols", _screen_input, _screen, "O(S)"),
+    Benchmark("ScreenSnapshot.query", "screener", "symbols", _snapshot_input,
+              lambda snapshot: snapshot.query(SCREEN_CRITERIA), "O(S)"),
+]
+
+
+def _timed(bench: Benchmark, state: Any, repeat: int, min_seconds: float) -> Dict[str, Any]:
+    # Best of `repeat` runs; stop early once a single run is slow enough
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        bench.run(state)
+        times.append(time.perf_counter() - start)
+        if times[-1] >= min_seconds:
+            break
+
+    # Peak memory from a separate traced run (tracing slows the code down)
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    bench.run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(times), "repeats": len(times), "peak_bytes": peak}
+
+
+def scaling_exponent(sizes: List[int], seconds: List[float], tail: int = 3) -> Optional[float]:
+    """
+    Least-squares slope of log(seconds) vs. log(size) over the `tail`
+    largest sizes: ~1 for O(N), slightly above 1 for O(N log N), ~2 for
+    O(N^2). Small sizes are dominated by fixed per-call overhead and would
+    pull the slope towards 0, and runs under 1 ms are too noisy to use.
+    """
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, seconds) if t >= 1e-3][-tail:]
+    if len(points) < 2:
+        return None
+    x, y = np.array(points).T
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def run(benchmarks: List[Benchmark],
+        bar_sizes: List[int],
+        universe_sizes: List[int],
+        repeat: int = 5,
+        min_seconds: float = 0.5,
+        budget: float = 60.0) -> Dict[str, Any]:
+    """
+    Run benchmarks over their size ladders.
+
+    Args:
+        benchmarks: Benchmarks to run
+        bar_sizes: Sizes for bar / pivot / scenario benchmarks
+        universe_sizes: Sizes for the screener benchmark
+        repeat: Max timed runs per size (best is kept)
+        min_seconds: Stop repeating once one run takes this long
+        budget: Skip the remaining (larger) sizes of a benchmark once one
+            size took longer than this many seconds
+
+    Returns:
+        JSON-serializable report: meta, results (one row per benchmark and
+        size) and per-benchmark scaling
+    """
+    results = []
+    scaling = {}
+    for bench in benchmarks:
+        sizes = universe_sizes if bench.unit == "symbols" else bar_sizes
+        if bench.max_size is not None:
+            sizes = [n for n in sizes if n <= bench.max_size]
+
+        rows = []
+        for n in sizes:
+            state = bench.setup(n)
+            row = {"name": bench.name, "group": bench.group, "unit": bench.unit, "n": n,
+                   **_timed(bench, state, repeat, min_seconds)}
+            del state
+            rows.append(row)
+            print(f"{bench.name:<30} n={n:>10,}  {row['seconds'] * 1e3:>10.2f} ms  "
+                  f"peak {row['peak_bytes'] / 2**20:>9.1f} MiB", file=sys.stderr)
+            if row["seconds"] > budget:
+                print(f"{bench.name:<30} over the {budget:.0f}s budget, skipping larger sizes", file=sys.stderr)
+                break
+
+        results.extend(rows)
+        scaling[bench.name] = {
+            "claim": bench.claim,
+            "exponent": scaling_exponent([r["n"] for r in rows], [r["seconds"] for r in rows]),
+        }
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+        "scaling": scaling,
+    }
+
+
+def compare(report: Dict[str, Any],
+            baseline: Dict[str, Any],
+            tolerance: float = 0.25,
+            min_seconds: float = 1e-3) -> List[Dict[str, Any]]:
+    """
+    (benchmark, size) pairs that got slower or use more peak memory than the
+    baseline by more than `tolerance` (0.25 = 25%). Timings under
+    `min_seconds` in both runs are too noisy to judge and are ignored.
+
+    Returns:
+        One dict per regression: name, n, metric, baseline, current, ratio
+    """
+    base = {(r["name"], r["n"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for row in report["results"]:
+        old = base.get((row["name"], row["n"]))
+        if old is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if metric == "seconds" and max(old[metric], row[metric]) < min_seconds:
+                continue
+            if old[metric] <= 0:
+                continue
+            ratio = row[metric] / old[metric]
+            if ratio > 1 + tolerance:
+                regressions.append({"name": row["name"], "n": row["n"], "metric": metric,
+                                    "baseline": old[metric], "current": row[metric], "ratio": ratio})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the back-end hot paths.")
+    parser.add_argument("--full", action="store_true", help="Bars up to 10^7 and universes up to 5,000 symbols.")
+    parser.add_argument("--only", nargs="*", default=None,
+                        help="Benchmark names or groups (zones, indicators, sizing, screener).")
+    parser.add_argument("--repeat", type=int, default=5, help="Max timed runs per size (best is kept).")
+    parser.add_argument("--budget", type=float, default=60.0,
+                        help="Skip larger sizes once one size takes longer than this (seconds).")
+    parser.add_argument("--out", default=None, help="Write the JSON report here (default: stdout).")
+    parser.add_argument("--compare", default=None, help="Baseline JSON report to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown / memory growth vs. the baseline (0.25 = 25%%).")
+    args = parser.parse_args(argv)
+
+    benchmarks = [b for b in BENCHMARKS
+                  if not args.only or b.name in args.only or b.group in args.only]
+    report = run(
+        benchmarks,
+        bar_sizes=BAR_SIZES_FULL if args.full else BAR_SIZES,
+        universe_sizes=UNIVERSE_SIZES_FULL if args.full else UNIVERSE_SIZES,
+        repeat=args.repeat,
+        budget=args.budget,
+    )
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(report, baseline, args.tolerance)
+        for r in report["regressions"]:
+            print(f"REGRESSION {r['name']} n={r['n']:,} {r['metric']}: "
+                  f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['ratio']:.2f}x)", file=sys.stderr)
+        status = 1 if report["regressions"] else 0
+
+    for name, s in report["scaling"].items():
+        exponent = "n/a" if s["exponent"] is None else f"{s['exponent']:.2f}"
+        print(f"{name:<30} claimed {s['claim']:<16} fitted exponent {exponent}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
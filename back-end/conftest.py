@@ -0,0 +1,2 @@
+# Lets pytest (run from back-end/) import the top-level packages
+# (backtester, marketdata, screener, ...) the same way main.py does.
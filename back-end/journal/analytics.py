@@ -0,0 +1,481 @@
+"""
+Trade-journal analytics over the access-control exports
+(access-control/trade-export-<userId>.csv).
+
+Trades are loaded into a typed columnar table (categorical user / symbol /
+strategy columns, nullable booleans for the rule-adherence flags, UTC
+timestamps) and summarised with vectorized groupbys per strategy, symbol,
+weekday and rule-adherence combination. TradeJournal keeps those summaries
+as additive sums, so appending trades only aggregates the new rows.
+"""
+
+from typing import Dict, Iterable, List, Optional, Union
+import glob
+import io
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+RULES = ["properEntry", "alignedWithTrend", "followedTpPlan", "properConditions", "properSize"]
+CATEGORICAL = ["userId", "symbol", "strategyId", "strategyName"]
+NUMERIC = ["entryPrice", "exitPrice", "quantity", "pnl", "R"]
+TIMESTAMPS = ["entryDate", "exitDate", "createdAt", "updatedAt"]
+COLUMNS = ["id"] + CATEGORICAL + NUMERIC + TIMESTAMPS + RULES
+REQUIRED = ["id", "userId", "pnl"]
+
+# Trade dates are stored as local midnight in New York (04:00Z / 05:00Z)
+TIMEZONE = "America/New_York"
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+WEEKDAY_ORDER = {day: i for i, day in enumerate(WEEKDAYS)}
+
+# Rule-adherence combination: one letter per rule in RULES order,
+# Y = followed, N = broken, - = not recorded (e.g. "YYNY-")
+RULE_STATES = "YN-"
+RULE_COMBOS = ["".join(c) for c in itertools.product(RULE_STATES, repeat=len(RULES))]
+
+# Grouping name -> table column ("all" = one group per user)
+DIMENSIONS = {
+    "all": None,
+    "strategy": "strategyName",
+    "symbol": "symbol",
+    "weekday": "weekday",
+    "rules": "rules",
+}
+
+# R-multiple histogram: [edge_i, edge_i+1) with open-ended outer bins
+R_EDGES = np.array([-np.inf, -2.0, -1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5, 2.0, 3.0, np.inf])
+
+
+def _bin_label(lo: float, hi: float) -> str:
+    if np.isinf(lo):
+        return f"<{hi:g}"
+    if np.isinf(hi):
+        return f">={lo:g}"
+    return f"[{lo:g},{hi:g})"
+
+
+R_BINS = [_bin_label(lo, hi) for lo, hi in zip(R_EDGES[:-1], R_EDGES[1:])]
+
+# TradeJournal id lookup default (below every int64 timestamp, including NaT)
+NOT_SEEN = np.iinfo(np.int64).min + 1
+
+# Additive per-group sums; everything in summarize() is derived from them
+SUMS = ["trades", "wins", "losses", "pnl", "win_pnl", "loss_pnl", "r_trades", "r_sum", "r_sumsq"]
+
+
+def _rule_combos(df: pd.DataFrame) -> pd.Categorical:
+    # Base-3 code per row (digit i = state of rule i, most significant first)
+    # so the code indexes RULE_COMBOS directly
+    code = np.zeros(len(df), dtype=np.int16)
+    for rule in RULES:
+        values = df[rule]
+        state = np.where(values.isna().to_numpy(), 2, np.where(values.fillna(False).to_numpy(bool), 0, 1))
+        code = code * 3 + state
+    return pd.Categorical.from_codes(code, categories=RULE_COMBOS)
+
+
+def prepare_trades(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Coerce a raw export frame into the typed trade table and add the derived
+    columns: `time` (exit, else entry, timestamp used for ordering),
+    `weekday` (entry day in New York) and `rules` (adherence combination).
+
+    Args:
+        df: Export rows with (a subset of) COLUMNS
+
+    Returns:
+        New DataFrame with COLUMNS (missing ones filled) + time, weekday, rules
+
+    Raises:
+        ValueError: If one of the REQUIRED columns is missing
+    """
+    missing = [c for c in REQUIRED if c not in df]
+    if missing:
+        raise ValueError(f"Trade export is missing columns: {missing}")
+    out = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    out["id"] = df["id"].astype(str).to_numpy()
+    for col in CATEGORICAL:
+        values = df[col].to_numpy() if col in df else np.full(len(df), None)
+        out[col] = pd.Categorical(values)
+    for col in NUMERIC:
+        values = df[col] if col in df else pd.Series(np.nan, index=df.index)
+        out[col] = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    for col in TIMESTAMPS:
+        values = df[col].to_numpy() if col in df else np.full(len(df), None)
+        out[col] = pd.DatetimeIndex(pd.to_datetime(values, utc=True, errors="coerce", format="ISO8601"))
+    for col in RULES:
+        values = df[col] if col in df else pd.Series(pd.NA, index=df.index)
+        if values.dtype != "boolean":
+            values = values.map(lambda v: v if isinstance(v, (bool, np.bool_)) or pd.isna(v)
+                                else str(v).strip().lower() in ("true", "1", "yes"))
+        out[col] = pd.array(values.to_numpy(), dtype="boolean")
+
+    out["time"] = out["exitDate"].fillna(out["entryDate"])
+    weekday = out["entryDate"].dt.tz_convert(TIMEZONE).dt.dayofweek
+    out["weekday"] = pd.Categorical.from_codes(weekday.fillna(-1).astype(int).to_numpy(),
+                                               categories=WEEKDAYS)
+    out["rules"] = _rule_combos(out)
+    return out
+
+
+def load_export(source: Union[str, io.IOBase]) -> pd.DataFrame:
+    """
+    Load one trade export (path or file-like) into the typed trade table.
+    Free-text and image columns are not read.
+    """
+    dtypes = {c: "category" for c in CATEGORICAL}
+    dtypes.update({c: "float64" for c in NUMERIC})
+    dtypes.update({c: "boolean" for c in RULES})
+    dtypes["id"] = "str"
+    df = pd.read_csv(source, usecols=lambda c: c in COLUMNS, dtype=dtypes)
+    return prepare_trades(df)
+
+
+def load_exports(paths: Iterable[str]) -> pd.DataFrame:
+    """
+    Load and concatenate several exports (e.g. one per user).
+    """
+    return concat_trades([load_export(p) for p in paths])
+
+
+def concat_trades(parts: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate trade tables, keeping categorical columns categorical
+    (plain pd.concat falls back to object when the categories differ).
+    """
+    parts = [p for p in parts if len(p)]
+    if not parts:
+        return prepare_trades(pd.DataFrame(columns=COLUMNS))
+    if len(parts) == 1:
+        return parts[0]
+    out = pd.concat(parts, ignore_index=True)
+    for col in CATEGORICAL:
+        out[col] = union_categoricals([p[col] for p in parts])
+    return out
+
+
+def _group_codes(df: pd.DataFrame, dimension: str):
+    # Row -> group number, and the (userId[, group]) index of the groups,
+    # from the categorical codes (missing values become a None group)
+    columns = ["userId"] if DIMENSIONS[dimension] is None else ["userId", DIMENSIONS[dimension]]
+    combined = np.zeros(len(df), dtype=np.int64)
+    labels = []
+    for col in columns:
+        cat = df[col].cat
+        size = len(cat.categories) + 1
+        combined = combined * size + np.where(cat.codes.to_numpy() < 0, size - 1, cat.codes.to_numpy())
+        labels.append((np.append(cat.categories.to_numpy(dtype=object), None), size))
+    codes, uniques = pd.factorize(combined, sort=False)
+
+    levels = []
+    for values, size in reversed(labels):
+        levels.append(values[uniques % size])
+        uniques = uniques // size
+    levels.reverse()
+    if len(levels) == 1:
+        return codes, pd.Index(levels[0], name=columns[0])
+    return codes, pd.MultiIndex.from_arrays(levels, names=columns)
+
+
+def _stamps(values: pd.Series) -> np.ndarray:
+    # UTC timestamps as int64 ns; NaT is int64 min
+    return values.dt.tz_convert(None).to_numpy().view("i8")
+
+
+def _chronological(df: pd.DataFrame) -> pd.DataFrame:
+    # By time, then creation (same-day trades); NaT is int64 min, so first
+    keys = [_stamps(df[c]) for c in ("createdAt", "time")]
+    order = np.lexsort(keys)
+    if (np.diff(order) > 0).all():
+        return df
+    return df.take(order)
+
+
+def aggregate(df: pd.DataFrame, dimension: str, prior: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Additive sums, R histogram and drawdown state per (userId, group).
+
+    Args:
+        df: Trade table rows to aggregate
+        dimension: Key of DIMENSIONS
+        prior: Result of an earlier aggregate() over trades that all come
+            before `df` in time; its equity state is carried forward and its
+            sums are added in
+
+    Returns:
+        DataFrame indexed by (userId[, group]) with SUMS, one column per
+        R_BINS bin, and peak / max_drawdown / last_time / last_created
+        (the chronological key of the group's latest trade)
+    """
+    df = _chronological(df)
+    codes, index = _group_codes(df, dimension)
+    pnl = df["pnl"].fillna(0.0).to_numpy()
+    r = df["R"].to_numpy()
+    has_r = ~np.isnan(r)
+    r0 = np.where(has_r, r, 0.0)
+    bins = np.searchsorted(R_EDGES, r0, side="right") - 1
+
+    columns = [np.ones(len(pnl)), pnl > 0, pnl < 0, pnl, np.where(pnl > 0, pnl, 0.0),
+               np.where(pnl < 0, pnl, 0.0), has_r, r0, r0 * r0]
+    columns += [has_r & (bins == i) for i in range(len(R_BINS))]
+    sums = pd.DataFrame({name: np.bincount(codes, weights=c, minlength=len(index))
+                         for name, c in zip(SUMS + R_BINS, columns)}, index=index)
+    counts = ["trades", "wins", "losses", "r_trades"] + R_BINS
+    sums[counts] = sums[counts].astype(np.int64)
+
+    # Rows grouped together (stable, so each group stays in time order):
+    # every group is one segment for the running equity / peak
+    order = np.argsort(codes, kind="stable")
+    grouped = codes[order]
+    starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]]) if len(grouped) else grouped
+    p = pnl[order]
+
+    # Equity per group, continuing from the prior state of the same group
+    start = np.zeros(len(sums))
+    start_peak = np.zeros(len(sums))
+    start_dd = np.zeros(len(sums))
+    position = np.full(len(sums), -1)
+    if prior is not None and len(prior):
+        position = prior.index.get_indexer(sums.index)
+        hit = position >= 0
+        start[hit] = prior["pnl"].to_numpy()[position[hit]]
+        start_peak[hit] = prior["peak"].to_numpy()[position[hit]]
+        start_dd[hit] = prior["max_drawdown"].to_numpy()[position[hit]]
+
+    lengths = np.diff(np.r_[starts, len(p)])
+    running = np.cumsum(p)
+    equity = running - np.repeat(running[starts] - p[starts], lengths) + start[grouped]
+    peak = np.maximum(pd.Series(equity).groupby(grouped, sort=False).cummax().to_numpy(), start_peak[grouped])
+    if len(p):
+        sums["peak"] = np.maximum.reduceat(peak, starts)
+        sums["max_drawdown"] = np.maximum(np.maximum.reduceat(peak - equity, starts), start_dd)
+    else:
+        sums["peak"] = sums["max_drawdown"] = np.zeros(0)
+    # Last row of each segment = the group's latest trade
+    sums["last_time"] = df["time"].array.take(order[starts + lengths - 1])
+    sums["last_created"] = df["createdAt"].array.take(order[starts + lengths - 1])
+
+    if prior is None or not len(prior):
+        return sums
+    return _merge(prior, sums, position)
+
+
+def _merge(prior: pd.DataFrame, new: pd.DataFrame, position: np.ndarray) -> pd.DataFrame:
+    # Sums add up; the equity state of a group in `new` already continues
+    # from the prior state, so it replaces it. position: row of each `new`
+    # group in `prior`, -1 for groups seen for the first time
+    hit = position >= 0
+    rows = position[hit]
+    merged = prior.copy()
+    for col in SUMS + R_BINS:
+        values = merged[col].to_numpy(copy=True)
+        values[rows] += new[col].to_numpy()[hit]
+        merged[col] = values
+    for col in ("peak", "max_drawdown", "last_time", "last_created"):
+        merged.iloc[rows, merged.columns.get_loc(col)] = new[col].to_numpy()[hit]
+    if hit.all():
+        return merged
+    return pd.concat([merged, new[~hit]])
+
+
+def summarize(sums: pd.DataFrame, histogram: bool = True) -> pd.DataFrame:
+    """
+    Per-group statistics from aggregate() sums.
+
+    Returns:
+        DataFrame with trades, wins, losses, win_rate, total_pnl, avg_win,
+        avg_loss, expectancy (average pnl per trade), profit_factor,
+        r_trades, avg_r (expectancy in R), r_std, max_drawdown, peak_equity
+        and, with `histogram`, the R_BINS counts
+    """
+    s = sums
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trades = s["trades"].to_numpy(dtype=float)
+        r_n = s["r_trades"].to_numpy(dtype=float)
+        avg_r = s["r_sum"].to_numpy() / r_n
+        r_var = (s["r_sumsq"].to_numpy() - r_n * avg_r ** 2) / (r_n - 1)
+        out = pd.DataFrame({
+            "trades": s["trades"].astype(np.int64),
+            "wins": s["wins"].astype(np.int64),
+            "losses": s["losses"].astype(np.int64),
+            "win_rate": s["wins"].to_numpy() / trades,
+            "total_pnl": s["pnl"],
+            "avg_win": s["win_pnl"].to_numpy() / s["wins"].to_numpy(),
+            "avg_loss": s["loss_pnl"].to_numpy() / s["losses"].to_numpy(),
+            "expectancy": s["pnl"].to_numpy() / trades,
+            "profit_factor": s["win_pnl"].to_numpy() / -s["loss_pnl"].to_numpy(),
+            "r_trades": s["r_trades"].astype(np.int64),
+            "avg_r": avg_r,
+            "r_std": np.sqrt(np.maximum(r_var, 0.0)),
+            "max_drawdown": s["max_drawdown"],
+            "peak_equity": s["peak"],
+        }, index=s.index)
+    if histogram:
+        out = pd.concat([out, s[R_BINS].astype(np.int64)], axis=1)
+    return out.replace([np.inf, -np.inf], np.nan)
+
+
+def equity_curve(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Trade-by-trade equity curve of a trade table (one user, or a filtered
+    subset), in time order.
+
+    Returns:
+        DataFrame with id, time, symbol, strategyName, pnl, R, equity,
+        peak, drawdown and cum_r
+    """
+    df = _chronological(df)
+    pnl = df["pnl"].fillna(0.0).to_numpy()
+    equity = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0)) if len(equity) else equity
+    out = df[["id", "time", "symbol", "strategyName", "pnl", "R"]].reset_index(drop=True)
+    out["equity"] = equity
+    out["peak"] = peak
+    out["drawdown"] = peak - equity
+    out["cum_r"] = np.cumsum(df["R"].fillna(0.0).to_numpy())
+    return out
+
+
+class TradeJournal:
+    """
+    Trade table plus per-dimension aggregates that are updated incrementally.
+
+    - append() aggregates only the new rows and adds them to the stored
+      sums; drawdown state carries over as long as each user's new trades
+      come after the ones already loaded.
+    - Trades already in the journal (same id) are skipped, or replaced when
+      their updatedAt is newer; a replacement or an out-of-order trade
+      rebuilds the aggregates from the full table.
+
+    Usage:
+        journal = TradeJournal.from_directory("../access-control")
+        journal.stats("strategy", user_id="...")
+        journal.append(load_export("trade-export-new.csv"))
+    """
+
+    def __init__(self, trades: Optional[pd.DataFrame] = None):
+        self._parts: List[pd.DataFrame] = []
+        self._table: Optional[pd.DataFrame] = None
+        self._aggregates: Dict[str, pd.DataFrame] = {}
+        # id -> updatedAt (int64) of every trade in the table
+        self._ids: Dict[str, int] = {}
+        self.rebuilds = 0
+        if trades is not None:
+            self.append(trades)
+
+    @classmethod
+    def from_directory(cls, directory: str, pattern: str = "trade-export-*.csv") -> "TradeJournal":
+        return cls(load_exports(sorted(glob.glob(os.path.join(directory, pattern)))))
+
+    @property
+    def table(self) -> pd.DataFrame:
+        if self._table is None:
+            self._table = concat_trades(self._parts)
+            self._parts = [self._table] if len(self._table) else []
+        return self._table
+
+    def __len__(self) -> int:
+        return sum(len(p) for p in self._parts) if self._table is None else len(self._table)
+
+    def _rebuild(self) -> None:
+        self.rebuilds += 1
+        table = self._table = _chronological(self.table)
+        self._parts = [table]
+        self._aggregates = {dim: aggregate(table, dim) for dim in DIMENSIONS}
+
+    def append(self, trades: pd.DataFrame) -> Dict[str, int]:
+        """
+        Add trades (a prepare_trades / load_export table).
+
+        Returns:
+            {"added": new trades, "updated": replaced trades, "trades": total}
+        """
+        trades = trades.drop_duplicates("id", keep="last")
+        ids = trades["id"].tolist()
+        # updatedAt as int64 (NaT = int64 min, never newer than anything)
+        stamps = trades["updatedAt"].dt.tz_convert(None).to_numpy().view("i8")
+        seen = self._ids
+        previous = np.fromiter((seen.get(i, NOT_SEEN) for i in ids), dtype=np.int64, count=len(ids))
+        known = previous != NOT_SEEN
+        newer = known & (stamps > previous)
+
+        fresh = trades[~known]
+        changed = trades[newer]
+        seen.update(zip(itertools.compress(ids, ~known | newer), stamps[~known | newer].tolist()))
+
+        if len(changed):
+            table = self.table
+            table = table[~table["id"].isin(changed["id"])]
+            self._parts = [table]
+        if len(fresh) or len(changed):
+            self._parts.extend(p for p in (fresh, changed) if len(p))
+            self._table = None
+
+        if len(changed) or not self._aggregates:
+            self._rebuild()
+        elif len(fresh):
+            # Incremental only if every user's new trades follow their last
+            # one in _chronological's (time, createdAt) order; trade times
+            # are dates, so same-day trades are ordered by createdAt
+            last = self._aggregates["all"].reindex(fresh["userId"].astype(object))
+            time, created = _stamps(fresh["time"]), _stamps(fresh["createdAt"])
+            last_time, last_created = _stamps(last["last_time"]), _stamps(last["last_created"])
+            late = (time < last_time) | ((time == last_time) & (created < last_created))
+            if late.any():
+                self._rebuild()
+            else:
+                self._aggregates = {dim: aggregate(fresh, dim, prior=agg)
+                                    for dim, agg in self._aggregates.items()}
+        return {"added": len(fresh), "updated": len(changed), "trades": len(self)}
+
+    def users(self) -> List[str]:
+        return [str(u) for u in self._aggregates.get("all", pd.DataFrame()).index]
+
+    def stats(self,
+              by: str = "strategy",
+              user_id: Optional[str] = None,
+              histogram: bool = True) -> pd.DataFrame:
+        """
+        Statistics per group (see summarize()).
+
+        Args:
+            by: "all", "strategy", "symbol", "weekday" or "rules"
+            user_id: Only this user's groups (None = every user)
+            histogram: Include the R distribution columns
+
+        Raises:
+            ValueError: For an unknown grouping
+        """
+        if by not in DIMENSIONS:
+            raise ValueError(f"Unknown grouping {by!r}; expected one of {list(DIMENSIONS)}")
+        sums = self._aggregates.get(by)
+        if sums is None or not len(sums):
+            return summarize(aggregate(prepare_trades(pd.DataFrame(columns=COLUMNS)), by), histogram)
+        if user_id is not None:
+            level = sums.index if sums.index.nlevels == 1 else sums.index.get_level_values(0)
+            sums = sums[np.asarray(level == user_id)]
+        out = summarize(sums, histogram)
+        names = ["userId"] if by == "all" else ["userId", by]
+        out.index = out.index.set_names(names)
+        # Weekdays in calendar order, everything else alphabetical
+        return out.sort_index(key=lambda level: level.map(WEEKDAY_ORDER) if level.name == "weekday" else level)
+
+    def equity(self,
+               user_id: str,
+               strategy: Optional[str] = None,
+               symbol: Optional[str] = None) -> pd.DataFrame:
+        """
+        Equity curve and drawdown for one user's trades, optionally only one
+        strategy and / or symbol.
+        """
+        table = self.table
+        mask = (table["userId"] == user_id).to_numpy(copy=True)
+        if strategy is not None:
+            mask &= (table["strategyName"] == strategy).to_numpy()
+        if symbol is not None:
+            mask &= (table["symbol"] == symbol).to_numpy()
+        return equity_curve(table[mask])
@@ -1,8 +1,75 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, List, Dict, Any
+import hmac
+import io
+import json
+import os
+import re
+import threading
+import time
 
-app = FastAPI(title="Edge Finder API", description="Trading platform API for screening and backtesting")
+import numpy as np
+
+from backtester.charts import chart_payload, chart_png, chart_zones, slice_range
+from backtester.engine import backtest_signals
+from journal.analytics import DIMENSIONS, TradeJournal, load_export
+from marketdata.barfile import load_prices_from_bars
+from marketdata.barstore import DEFAULT_TTL, BarStore
+from marketdata.prices import load_prices_from_csv
+from screener.indicators import PricePanel, rsi
+from screener.service import MAX_PAGE_SIZE, ScreenerService
+from screener.snapshot import SnapshotStore
+from telemetry import metrics, profiler
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Screens are answered from a snapshot that is rebuilt in the background
+    snapshots.start()
+    yield
+    snapshots.stop()
+
+app = FastAPI(title="Edge Finder API", description="Trading platform API for screening and backtesting",
+              lifespan=lifespan)
+
+# Responses that get a Server-Timing stage breakdown
+TIMED_PATHS = {"/screener", "/screener/live", "/backtester", "/chart"}
+
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    start = time.perf_counter()
+    profiled = profiler.requested(request.headers, request.query_params)
+    with metrics.request_timings() as timings:
+        if profiled:
+            with profiler.profiling() as prof:
+                response = await call_next(request)
+        else:
+            response = await call_next(request)
+    total = time.perf_counter() - start
+
+    # Label by route template, not the raw path, to keep label sets bounded
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    metrics.HTTP_SECONDS.observe(total, method=request.method, path=path, status=str(response.status_code))
+    if path in TIMED_PATHS:
+        response.headers["Server-Timing"] = metrics.server_timing(timings, total)
+    if profiled:
+        response.headers["X-Profile-Id"] = profiler.PROFILES.add({"path": path, **prof.result()})
+    return response
+
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError):
+    # An out-of-range page size is a 400 like a bad cursor; other
+    # validation errors keep FastAPI's 422
+    if any(tuple(err.get("loc", ()))[-1:] == ("limit",) for err in exc.errors()):
+        return JSONResponse(status_code=400, content={"detail": jsonable_encoder(exc.errors())})
+    return await request_validation_exception_handler(request, exc)
 
 class ScreenerRequest(BaseModel):
     pe_ratio_max: Optional[float] = None
@@ -13,16 +80,203 @@ class ScreenerRequest(BaseModel):
     rsi_threshold_lower: Optional[float] = None
     sma_200_above: Optional[bool] = None
     sma_200_below: Optional[bool] = None
+    # Pagination
+    limit: Optional[int] = Field(None, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+
+    def criteria(self) -> dict:
+        return self.model_dump(exclude={"limit", "cursor"})
 
 class ScreenerResponse(BaseModel):
     symbols: List[str]
     total_matches: int
+    next_cursor: Optional[str] = None
+    snapshot_version: Optional[str] = None
+    snapshot_age_seconds: Optional[float] = None
+
+screener_service = ScreenerService()
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backtester", "data")
+
+snapshots = SnapshotStore(
+    screener_service.screener,
+    directory=os.environ.get("SCREENER_SNAPSHOT_DIR", os.path.join(DATA_DIR, "snapshots")),
+    interval=float(os.environ.get("SCREENER_SNAPSHOT_INTERVAL", 24 * 3600)),
+)
+
+CSV_SUFFIX = {"5m": "5min", "1h": "hourly"}
+# Symbols and intervals end up in file paths and provider requests
+SYMBOL_PATTERN = re.compile(r"\^?[A-Za-z0-9]+(?:[.=-][A-Za-z0-9]+)*")
+BAR_INTERVALS = set(CSV_SUFFIX) | set(DEFAULT_TTL)
+
+bar_store = BarStore(os.path.join(DATA_DIR, "bars"))
 
 class BacktesterRequest(BaseModel):
-    pass
+    symbol: str = "SPY"
+    interval: str = "5m"
+    start: Optional[str] = None
+    end: Optional[str] = None
+    # Entry signal: RSI crossing below (rsi_below) or above (rsi_above) a threshold
+    signal: str = "rsi_below"
+    signal_threshold: float = 30.0
+    rsi_period: int = 14
+    # Exits
+    direction: str = "long"
+    target_pct: Optional[float] = 0.02
+    stop_pct: Optional[float] = None
+    max_bars: int = 10
+    same_bar: str = "stop"
+    # Single position by default; overlapping trades split the capital
+    allow_overlap: bool = False
+    include_trades: bool = True
 
 class BacktesterResponse(BaseModel):
-    message: str
+    symbol: str
+    interval: str
+    bars: int
+    stats: Dict[str, Any]
+    trades: List[Dict[str, Any]] = []
+    equity_curve: List[Dict[str, Any]] = []
+
+def _load_bars(symbol: str, interval: str):
+    if len(symbol) > 15 or not SYMBOL_PATTERN.fullmatch(symbol):
+        raise ValueError(f"Invalid symbol: {symbol!r}")
+    if interval not in BAR_INTERVALS:
+        raise ValueError(f"interval must be one of {sorted(BAR_INTERVALS)}")
+    # Research data first (converted .bars file, else the CSV), then the local bar store
+    suffix = CSV_SUFFIX.get(interval)
+    base = os.path.join(DATA_DIR, f"{symbol.lower()}_{suffix}") if suffix else None
+    if base and os.path.exists(base + ".bars"):
+        return load_prices_from_bars(base + ".bars")
+    if base and os.path.exists(base + ".csv"):
+        return load_prices_from_csv(base + ".csv")
+    return bar_store.get(symbol, interval)
+
+def _signals(df, request: BacktesterRequest) -> np.ndarray:
+    values = rsi(PricePanel.from_history({request.symbol: df}), request.rsi_period)[0]
+    prev = np.roll(values, 1)
+    prev[0] = np.nan
+    if request.signal == "rsi_below":
+        return (values < request.signal_threshold) & (prev >= request.signal_threshold)
+    if request.signal == "rsi_above":
+        return (values > request.signal_threshold) & (prev <= request.signal_threshold)
+    raise ValueError(f"Unknown signal: {request.signal}")
+
+def _run_backtest(request: BacktesterRequest) -> BacktesterResponse:
+    with profiler.worker_thread():
+        with metrics.stage("load"):
+            df = _load_bars(request.symbol, request.interval)
+            if request.start:
+                df = df[df.index >= request.start]
+            if request.end:
+                df = df[df.index <= request.end]
+
+        with metrics.stage("signals"):
+            signals = _signals(df, request)
+
+        with metrics.stage("backtest"):
+            result = backtest_signals(
+                df,
+                signals,
+                target_pct=request.target_pct,
+                stop_pct=request.stop_pct,
+                max_bars=request.max_bars,
+                direction=request.direction,
+                same_bar=request.same_bar,
+                allow_overlap=request.allow_overlap,
+            )
+
+        with metrics.stage("serialize"):
+            trades = result["trades"]
+            equity = result["equity"].iloc[trades["exit_idx"].to_numpy()]
+            return BacktesterResponse(
+                symbol=request.symbol,
+                interval=request.interval,
+                bars=len(df),
+                stats=result["stats"],
+                trades=json.loads(trades.to_json(orient="records", date_format="iso")) if request.include_trades else [],
+                equity_curve=[{"time": t.isoformat(), "equity": float(v)} for t, v in equity.items()],
+            )
+
+def _chart(symbol: str, interval: str, start: Optional[str], end: Optional[str], format: str,
+           width: int, height: int, zones: bool):
+    with profiler.worker_thread():
+        with metrics.stage("load"):
+            df = slice_range(_load_bars(symbol, interval), start, end)
+            if df.empty:
+                raise ValueError("No bars in the requested range")
+        with metrics.stage("zones"):
+            sr_zones = chart_zones(df) if zones else None
+        with metrics.stage("render"):
+            if format == "png":
+                title = f"{symbol} {interval}"
+                return Response(chart_png(df, sr_zones, title=title, width=width, height=height),
+                                media_type="image/png")
+            return {"symbol": symbol, "interval": interval,
+                    **chart_payload(df, sr_zones, max_bars=max(1, width // 3))}
+
+# The journal holds every user's trades, so it is opt-in: the /journal
+# endpoints are disabled unless JOURNAL_DIR is set, and they are meant to be
+# reached only through the access-control service, which authenticates the
+# user, passes their id as user_id and sends JOURNAL_API_TOKEN as a bearer token
+JOURNAL_DIR = os.environ.get("JOURNAL_DIR")
+JOURNAL_API_TOKEN = os.environ.get("JOURNAL_API_TOKEN")
+JOURNAL_MAX_UPLOAD_BYTES = int(os.environ.get("JOURNAL_MAX_UPLOAD_BYTES", 5 * 1024 * 1024))
+_journal: Optional[TradeJournal] = None
+# TradeJournal is not thread-safe and its handlers run on the threadpool
+_journal_lock = threading.Lock()
+
+def _get_journal() -> TradeJournal:
+    # Loaded on first use from the trade-export-*.csv files in JOURNAL_DIR
+    global _journal
+    if _journal is None:
+        _journal = TradeJournal.from_directory(JOURNAL_DIR)
+    return _journal
+
+def _journal_access(request: Request) -> None:
+    if not JOURNAL_DIR:
+        raise HTTPException(status_code=404, detail="Journal endpoints are disabled (JOURNAL_DIR is not set)")
+    if JOURNAL_API_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token, JOURNAL_API_TOKEN):
+            raise HTTPException(status_code=401, detail="Invalid journal API token")
+
+async def _read_limited(request: Request, limit: int) -> bytes:
+    # Checked on the declared length and again while reading (chunked bodies)
+    too_large = HTTPException(status_code=413, detail=f"Request body exceeds {limit} bytes")
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+def _records(df) -> List[Dict[str, Any]]:
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+def _journal_stats(by: str, user_id: Optional[str], histogram: bool) -> Dict[str, Any]:
+    with _journal_lock, metrics.stage("journal"):
+        stats = _get_journal().stats(by, user_id=user_id, histogram=histogram)
+        return {"by": by, "groups": _records(stats.reset_index())}
+
+def _journal_equity(user_id: str, strategy: Optional[str], symbol: Optional[str]) -> Dict[str, Any]:
+    with _journal_lock, metrics.stage("journal"):
+        curve = _get_journal().equity(user_id, strategy=strategy, symbol=symbol)
+        return {
+            "user_id": user_id,
+            "trades": len(curve),
+            "max_drawdown": float(curve["drawdown"].max()) if len(curve) else 0.0,
+            "points": _records(curve),
+        }
+
+def _journal_append(body: bytes) -> Dict[str, int]:
+    with metrics.stage("parse"):
+        trades = load_export(io.BytesIO(body))
+    with _journal_lock, metrics.stage("journal"):
+        return _get_journal().append(trades)
 
 @app.get("/")
 async def root():
@@ -30,25 +284,169 @@ async def root():
 
 @app.post("/screener", response_model=ScreenerResponse)
 async def screen_stocks(request: ScreenerRequest):
+    # Vectorized masks over the in-memory snapshot: no fetching, no thread hop.
+    # Until a snapshot with the requested criteria's columns is built, screen live
+    snapshot = snapshots.current
+    if snapshot is None or snapshot.missing_columns(request.criteria()):
+        return await screen_stocks_live(request)
+    try:
+        with metrics.stage("snapshot_query"):
+            symbols, total, next_cursor = snapshot.page(
+                request.criteria(), limit=request.limit, cursor=request.cursor
+            )
+        return ScreenerResponse(
+            symbols=symbols,
+            total_matches=total,
+            next_cursor=next_cursor,
+            snapshot_version=snapshot.version,
+            snapshot_age_seconds=round(snapshot.age(), 3),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/screener/live", response_model=ScreenerResponse)
+async def screen_stocks_live(request: ScreenerRequest):
+    """
+    Screen against freshly fetched data instead of the snapshot.
+    """
     try:
-        # TODO: Implement screener logic using screen/screener.py
+        # Runs on the service's worker pool; identical in-flight requests
+        # share one screen and finished results are cached
+        symbols, total, next_cursor = await screener_service.page(
+            request.criteria(), limit=request.limit, cursor=request.cursor
+        )
         return ScreenerResponse(
-            symbols=["AAPL", "MSFT", "GOOGL"],
-            total_matches=3
+            symbols=symbols,
+            total_matches=total,
+            next_cursor=next_cursor
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/screener/stream")
+async def stream_screen(request: ScreenerRequest):
+    """
+    Newline-delimited JSON stream of match, progress and summary events,
+    sent as each chunk of the universe is screened. With a snapshot loaded,
+    the matches come straight from it.
+    """
+    async def events():
+        try:
+            snapshot = snapshots.current
+            if snapshot is not None and not snapshot.missing_columns(request.criteria()):
+                start = time.perf_counter()
+                symbols = snapshot.query(request.criteria())
+                for data in snapshot.records(symbols):
+                    yield json.dumps({"type": "match", **data}) + "\n"
+                yield json.dumps({"type": "summary", "total_matches": len(symbols), "symbols": symbols,
+                                  "errors": len(snapshot.errors), "seconds": time.perf_counter() - start,
+                                  "snapshot_version": snapshot.version,
+                                  "snapshot_age_seconds": round(snapshot.age(), 3)}) + "\n"
+                return
+            async for event in screener_service.stream(request.criteria()):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.get("/screener/snapshot")
+async def snapshot_status():
+    snapshot = snapshots.current
+    return {
+        "snapshot": snapshot.info() if snapshot is not None else None,
+        "refresh_interval_seconds": snapshots.interval,
+        "last_error": snapshots.last_error,
+    }
+
+@app.post("/screener/snapshot/refresh")
+async def refresh_snapshot():
+    """
+    Rebuild the snapshot now (fetches the whole universe) and swap it in.
+    """
+    try:
+        snapshot = await run_in_threadpool(snapshots.refresh)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return snapshot.info()
+
 @app.post("/backtester", response_model=BacktesterResponse)
 async def backtest_strategy(request: BacktesterRequest):
     try:
-        # TODO: Implement backtesting logic
-        return BacktesterResponse(
-            message="Backtester endpoint placeholder - implementation pending"
-        )
+        # CPU-bound: keep it off the event loop
+        return await run_in_threadpool(_run_backtest, request)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/chart")
+async def chart(symbol: str = "SPY", interval: str = "5m", start: Optional[str] = None, end: Optional[str] = None,
+                format: str = "json", width: int = 1200, height: int = 600, zones: bool = True):
+    """
+    Candlestick chart of a stored series with its support / resistance
+    zones, downsampled to about one candle per 3 pixels of `width`:
+    a PNG (format=png) or columnar OHLC + zones JSON (format=json).
+    """
+    if format not in ("json", "png"):
+        raise HTTPException(status_code=400, detail="format must be json or png")
+    if not (50 <= width <= 4000 and 50 <= height <= 4000):
+        raise HTTPException(status_code=400, detail="width and height must be between 50 and 4000")
+    try:
+        return await run_in_threadpool(_chart, symbol, interval, start, end, format, width, height, zones)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/journal/analytics", dependencies=[Depends(_journal_access)])
+async def journal_analytics(by: str = "strategy", user_id: Optional[str] = None, histogram: bool = True):
+    """
+    Win rate, expectancy, R distribution and max drawdown per group of the
+    loaded trade journals. `by`: all, strategy, symbol, weekday or rules.
+    """
+    if by not in DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"by must be one of {list(DIMENSIONS)}")
+    return await run_in_threadpool(_journal_stats, by, user_id, histogram)
+
+@app.get("/journal/equity", dependencies=[Depends(_journal_access)])
+async def journal_equity(user_id: str, strategy: Optional[str] = None, symbol: Optional[str] = None):
+    return await run_in_threadpool(_journal_equity, user_id, strategy, symbol)
+
+@app.post("/journal/trades", dependencies=[Depends(_journal_access)])
+async def journal_trades(request: Request):
+    """
+    Append a trade export (raw CSV body, at most JOURNAL_MAX_UPLOAD_BYTES).
+    Known trade ids are skipped unless their updatedAt is newer.
+    """
+    body = await _read_limited(request, JOURNAL_MAX_UPLOAD_BYTES)
+    try:
+        return await run_in_threadpool(_journal_append, body)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Counters, gauges and latency histograms in the Prometheus text format.
+    """
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/debug/profiles")
+async def list_profiles():
+    return {"enabled": profiler.ENABLED, "profiles": profiler.PROFILES.ids()}
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(profile_id: str, top: Optional[int] = None):
+    profile = profiler.PROFILES.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return {**profile, "stacks": profile["stacks"][:top] if top else profile["stacks"]}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,249 @@
+# What this module does
+# 1) Store one OHLC series as a compact binary file:
+#      [header, 128 bytes][Date int64 ns][Open f8][High f8][Low f8][Close f8]
+#    Columnar and little-endian. The OHLC columns are back to back, so they
+#    form one (4, N) float64 block starting on a 64-byte boundary.
+# 2) Load it with np.memmap: the arrays and the DataFrame are VIEWS of the
+#    mapped file, so opening costs a header read and pages are only pulled
+#    in when touched (and shared between processes through the page cache).
+#
+# Header (struct HEADER):
+#   magic "EFBARS01", version, header size, row count, data offset,
+#   CRC32 of the data section, symbol (16 bytes), interval (8 bytes)
+#
+# Validation (OHLC contract via normalize_ohlc, sorted unique UTC
+# timestamps) happens ONCE, in write_bars. open_bars trusts the file; pass
+# verify=True (or call BarFile.verify()) to re-check the checksum.
+#
+# Brute-force approach it replaces
+# - load_prices_from_csv: parse every date string, then astype(float)
+#   copies the frame. O(N) text parsing per load.
+
+from __future__ import annotations
+
+import os
+import re
+import struct
+import zlib
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .prices import REQUIRED_COLUMNS, load_prices_from_csv, normalize_ohlc
+
+
+MAGIC = b"EFBARS01"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQI16s8s")
+HEADER_SIZE = 128
+ALIGN = 64
+
+# Research CSV names are <symbol>_<suffix>.csv (see ingest_data.ipynb)
+CSV_INTERVALS: Dict[str, str] = {"5min": "5m", "hourly": "1h"}
+
+
+def _aligned(offset: int) -> int:
+  return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _column_offsets(rows: int) -> Dict[str, int]:
+  offsets = {"Date": HEADER_SIZE}
+  block = _aligned(HEADER_SIZE + rows * 8)
+  for i, name in enumerate(REQUIRED_COLUMNS):
+    offsets[name] = block + i * rows * 8
+  offsets["end"] = block + len(REQUIRED_COLUMNS) * rows * 8
+  return offsets
+
+
+def _checksum(columns) -> int:
+  crc = 0
+  for values in columns:
+    crc = zlib.crc32(memoryview(values).cast("B"), crc)
+  return crc
+
+
+def write_bars(
+  path: str,
+  df: pd.DataFrame,
+  symbol: str,
+  interval: str,
+) -> str:
+  """
+  Validate an OHLC frame and write it as a bar file (atomically: temp file
+  + rename).
+
+  Time: O(N)
+  """
+  if len(symbol.encode()) > 16 or len(interval.encode()) > 8:
+    raise ValueError("symbol must fit in 16 bytes and interval in 8")
+
+  df = normalize_ohlc(df)
+  rows = len(df)
+  dates = np.ascontiguousarray(df.index.as_unit("ns").asi8, dtype="<i8")
+  columns = [dates] + [np.ascontiguousarray(df[c].to_numpy(), dtype="<f8") for c in REQUIRED_COLUMNS]
+
+  offsets = _column_offsets(rows)
+  header = HEADER.pack(
+    MAGIC, VERSION, HEADER_SIZE, rows, offsets["Date"], _checksum(columns),
+    symbol.upper().encode(), interval.encode(),
+  )
+
+  tmp = path + ".tmp"
+  with open(tmp, "wb") as f:
+    f.write(header.ljust(HEADER_SIZE, b"\0"))
+    for name, values in zip(["Date"] + REQUIRED_COLUMNS, columns):
+      f.seek(offsets[name])
+      f.write(values.tobytes())
+    f.truncate(offsets["end"])
+  os.replace(tmp, path)
+  return path
+
+
+class BarFile:
+  """
+  Memory-mapped, read-only view of a bar file.
+
+  Usage:
+    bars = open_bars("backtester/data/spy_5min.bars")
+    bars.close              # np.ndarray view, no copy
+    df = bars.frame()       # DataFrame over the same memory
+  """
+
+  def __init__(self, path: str, verify: bool = False):
+    self.path = path
+    with open(path, "rb") as f:
+      raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size:
+      raise ValueError(f"{path}: truncated header")
+
+    magic, version, header_size, rows, data_offset, crc, symbol, interval = HEADER.unpack(raw)
+    if magic != MAGIC:
+      raise ValueError(f"{path}: not a bar file")
+    if version != VERSION or header_size != HEADER_SIZE:
+      raise ValueError(f"{path}: unsupported bar file version {version}")
+
+    self.rows = int(rows)
+    self.crc = crc
+    self.symbol = symbol.rstrip(b"\0").decode()
+    self.interval = interval.rstrip(b"\0").decode()
+
+    offsets = _column_offsets(self.rows)
+    end = offsets["end"]
+    if os.path.getsize(path) < end:
+      raise ValueError(f"{path}: truncated data ({self.rows} rows expected)")
+
+    # One read-only map of the whole file; every array below is a view of it
+    # (np.memmap cannot map an empty file, so a 0-row file gets a dummy)
+    self._map = np.memmap(path, dtype=np.uint8, mode="r") if self.rows else np.zeros(end, np.uint8)
+    self.dates = self._map[offsets["Date"]:offsets["Date"] + self.rows * 8].view("<i8")
+    self._ohlc = self._map[offsets["Open"]:end].view("<f8").reshape(len(REQUIRED_COLUMNS), self.rows)
+    self.open, self.high, self.low, self.close = self._ohlc
+
+    if verify:
+      self.verify()
+
+  def __len__(self) -> int:
+    return self.rows
+
+  def verify(self) -> None:
+    """
+    Recompute the data checksum (reads every page).
+    """
+    if _checksum([self.dates, self.open, self.high, self.low, self.close]) != self.crc:
+      raise ValueError(f"{self.path}: checksum mismatch")
+
+  def index(self) -> pd.DatetimeIndex:
+    """
+    UTC DatetimeIndex "Date" over the mapped timestamps.
+    """
+    # The public constructors (DatetimeIndex(..., dtype=UTC), tz_localize)
+    # copy the int64 data; _simple_new wraps it as-is. It is private API, so
+    # if a pandas release changes or drops it, fall back to the copying path.
+    dtype = pd.DatetimeTZDtype(unit="ns", tz="UTC")
+    try:
+      values = pd.arrays.DatetimeArray._simple_new(self.dates.view("M8[ns]"), dtype=dtype)
+    except (AttributeError, TypeError, ValueError):
+      return pd.DatetimeIndex(self.dates.view("M8[ns]"), copy=True).tz_localize("UTC").rename("Date")
+    return pd.DatetimeIndex(values, name="Date", copy=False)
+
+  def frame(self) -> pd.DataFrame:
+    """
+    OHLC DataFrame (load_prices_from_csv contract, UTC index). Read-only:
+    the values are views of the mapped file, so take .copy() before
+    modifying it in place.
+    """
+    # pandas keeps a 2-D float block as (columns, rows), so the transposed
+    # (4, N) view becomes its block without a copy
+    return pd.DataFrame(self._ohlc.T, index=self.index(), columns=REQUIRED_COLUMNS, copy=False)
+
+  def arrays(self) -> Dict[str, np.ndarray]:
+    """
+    Date (int64 ns) and OHLC views by name.
+    """
+    return {"Date": self.dates, "Open": self.open, "High": self.high, "Low": self.low, "Close": self.close}
+
+
+def open_bars(
+  path: str,
+  verify: bool = False,
+) -> BarFile:
+  """
+  Memory-map a bar file.
+
+  Time: O(1) (O(N) with verify=True)
+  """
+  return BarFile(path, verify=verify)
+
+
+def load_prices_from_bars(
+  path: str,
+) -> pd.DataFrame:
+  """
+  Drop-in for load_prices_from_csv on a bar file.
+  """
+  return open_bars(path).frame()
+
+
+def parse_csv_name(path: str) -> Tuple[Optional[str], Optional[str]]:
+  """
+  (symbol, interval) from a research CSV name like spy_5min.csv.
+  """
+  m = re.match(r"([A-Za-z0-9.\-^]+)_([A-Za-z0-9]+)\.csv$", os.path.basename(path))
+  if not m:
+    return None, None
+  return m.group(1).upper(), CSV_INTERVALS.get(m.group(2), m.group(2))
+
+
+def convert_csv(
+  csv_path: str,
+  out_path: Optional[str] = None,
+  symbol: Optional[str] = None,
+  interval: Optional[str] = None,
+) -> str:
+  """
+  Convert a load_prices_from_csv file to a bar file next to it
+  (spy_5min.csv -> spy_5min.bars).
+  """
+  guess_symbol, guess_interval = parse_csv_name(csv_path)
+  symbol = symbol or guess_symbol
+  interval = interval or guess_interval
+  if not symbol or not interval:
+    raise ValueError(f"Cannot infer symbol/interval from {csv_path}; pass them explicitly")
+
+  out_path = out_path or os.path.splitext(csv_path)[0] + ".bars"
+  return write_bars(out_path, load_prices_from_csv(csv_path), symbol, interval)
+
+
+if __name__ == "__main__":
+  import argparse
+
+  parser = argparse.ArgumentParser(description="Convert OHLC CSV files to memory-mappable bar files.")
+  parser.add_argument("csv", nargs="+", help="CSV files (Date,Open,High,Low,Close)")
+  parser.add_argument("--symbol", default=None, help="Symbol (default: from the file name)")
+  parser.add_argument("--interval", default=None, help="Interval (default: from the file name)")
+  args = parser.parse_args()
+
+  for path in args.csv:
+    out = convert_csv(path, symbol=args.symbol, interval=args.interval)
+    print(f"{path} -> {out} ({len(open_bars(out, verify=True))} bars)")
@@ -0,0 +1,400 @@
+# What this module does
+# 1) Keep OHLC bars on disk, keyed by (symbol, interval), as Parquet parts:
+#      <root>/<SYMBOL>/<interval>/part-000001.parquet
+#      <root>/<SYMBOL>/<interval>/meta.json
+# 2) Refresh incrementally: only ask the network for bars from the last
+#    stored timestamp onward, and write them as a new part file instead of
+#    rewriting everything (parts are compacted once there are too many).
+# 3) Skip the network entirely while a key is younger than its TTL.
+# 4) Keep the store under a byte budget by evicting least recently used keys.
+#
+# The read API returns the same frame contract as load_prices_from_csv
+# (DatetimeIndex "Date", float Open/High/Low/Close), normalized to UTC.
+#
+# Parquet needs pyarrow (or fastparquet) installed alongside pandas.
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from .prices import REQUIRED_COLUMNS, load_prices_from_csv, normalize_ohlc
+
+
+# fetcher(symbol, interval, start) -> OHLC DataFrame
+# start is None for a key that has never been stored.
+Fetcher = Callable[[str, str, Optional[pd.Timestamp]], pd.DataFrame]
+
+
+# Default freshness per interval (seconds)
+DEFAULT_TTL: Dict[str, float] = {
+  "1m": 60,
+  "5m": 5 * 60,
+  "15m": 15 * 60,
+  "1h": 60 * 60,
+  "1d": 12 * 60 * 60,
+}
+
+# Lookback used the first time a key is fetched (yfinance intraday limits)
+DEFAULT_PERIOD: Dict[str, str] = {
+  "1m": "7d",
+  "5m": "60d",
+  "15m": "60d",
+  "1h": "730d",
+  "1d": "5y",
+}
+
+# Reads only persist a key's LRU access time when the stored one is older
+# than this (seconds); in between it is kept in memory
+ATIME_FLUSH_SECONDS = 60.0
+
+
+def yfinance_fetcher(
+  symbol: str,
+  interval: str,
+  start: Optional[pd.Timestamp],
+) -> pd.DataFrame:
+  """
+  Default fetcher: same download as download_and_save_spy in
+  ingest_data.ipynb, but starting at `start` when given.
+  """
+  import yfinance as yf
+
+  kwargs = {"start": start} if start is not None else {"period": DEFAULT_PERIOD.get(interval, "1y")}
+  df = yf.download(
+    symbol,
+    interval=interval,
+    auto_adjust=True,
+    progress=False,
+    **kwargs,
+  )
+  if df is None or df.empty:
+    return pd.DataFrame(columns=REQUIRED_COLUMNS)
+
+  # yfinance sometimes returns a multi-index column
+  if isinstance(df.columns, pd.MultiIndex):
+    df.columns = df.columns.get_level_values(0)
+
+  return df[REQUIRED_COLUMNS]
+
+
+class BarStore:
+  """
+  On-disk OHLC bar store with incremental refresh, TTL and LRU eviction.
+
+  Usage:
+    store = BarStore("data/bars")
+    df = store.get("SPY", "5m")       # network only if stale / missing
+    df = store.read("SPY", "5m")      # disk only
+  """
+
+  def __init__(
+    self,
+    root: str,
+    fetcher: Optional[Fetcher] = None,
+    ttl: Optional[Dict[str, float]] = None,
+    max_bytes: Optional[int] = None,
+    max_parts: int = 16,
+  ):
+    """
+    root:      directory holding the store (created if missing)
+    fetcher:   network source, defaults to yfinance_fetcher
+    ttl:       seconds a key stays fresh, per interval (merged over DEFAULT_TTL)
+    max_bytes: evict least recently used keys beyond this size (None = unbounded)
+    max_parts: compact a key into one file once it has more parts than this
+    """
+    self.root = root
+    self.fetcher = fetcher or yfinance_fetcher
+    self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+    self.max_bytes = max_bytes
+    self.max_parts = max(1, max_parts)
+    self._accessed: Dict[Tuple[str, str], float] = {}
+    os.makedirs(root, exist_ok=True)
+
+  # -------------------------
+  # Paths / metadata
+  # -------------------------
+
+  def _dir(self, symbol: str, interval: str) -> str:
+    return os.path.join(self.root, symbol.upper(), interval)
+
+  def _meta_path(self, symbol: str, interval: str) -> str:
+    return os.path.join(self._dir(symbol, interval), "meta.json")
+
+  def _read_meta(self, symbol: str, interval: str) -> Optional[dict]:
+    path = self._meta_path(symbol, interval)
+    if not os.path.exists(path):
+      return None
+    with open(path) as f:
+      return json.load(f)
+
+  def _write_meta(self, symbol: str, interval: str, meta: dict) -> None:
+    path = self._meta_path(symbol, interval)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+      json.dump(meta, f)
+    os.replace(tmp, path)
+
+  def _parts(self, symbol: str, interval: str) -> List[str]:
+    d = self._dir(symbol, interval)
+    if not os.path.isdir(d):
+      return []
+    return sorted(
+      os.path.join(d, name)
+      for name in os.listdir(d)
+      if name.startswith("part-") and name.endswith(".parquet")
+    )
+
+  def _accessed_at(self, symbol: str, interval: str) -> float:
+    meta = self._read_meta(symbol, interval) or {}
+    return max(self._accessed.get((symbol.upper(), interval), 0.0), meta.get("accessed_at", 0.0))
+
+  def mark_refreshed(self, symbol: str, interval: str) -> None:
+    """
+    Restart a stored key's TTL clock (it was checked, nothing was new).
+    """
+    meta = self._read_meta(symbol, interval)
+    if meta is not None:
+      meta["refreshed_at"] = time.time()
+      self._write_meta(symbol, interval, meta)
+
+  def keys(self) -> List[Tuple[str, str]]:
+    """
+    All stored (symbol, interval) keys.
+    """
+    out = []
+    for symbol in sorted(os.listdir(self.root)):
+      sym_dir = os.path.join(self.root, symbol)
+      if not os.path.isdir(sym_dir):
+        continue
+      for interval in sorted(os.listdir(sym_dir)):
+        if os.path.exists(os.path.join(sym_dir, interval, "meta.json")):
+          out.append((symbol, interval))
+    return out
+
+  def last_timestamp(self, symbol: str, interval: str) -> Optional[pd.Timestamp]:
+    meta = self._read_meta(symbol, interval)
+    if meta is None or meta.get("last_ts") is None:
+      return None
+    return pd.Timestamp(meta["last_ts"])
+
+  def is_fresh(self, symbol: str, interval: str) -> bool:
+    meta = self._read_meta(symbol, interval)
+    if meta is None:
+      return False
+    ttl = self.ttl.get(interval, DEFAULT_TTL["1d"])
+    return (time.time() - meta["refreshed_at"]) < ttl
+
+  def size_bytes(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> int:
+    """
+    Bytes on disk for one key, or for the whole store.
+    """
+    if symbol is not None and interval is not None:
+      return sum(os.path.getsize(p) for p in self._parts(symbol, interval))
+    return sum(self.size_bytes(s, i) for s, i in self.keys())
+
+  # -------------------------
+  # Writes
+  # -------------------------
+
+  def append(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+    """
+    Append bars to a key. Rows older than the last stored bar are dropped;
+    a row at the last stored timestamp replaces it (the final bar of the
+    previous fetch may have still been forming).
+
+    Returns the number of rows written.
+
+    Time:  O(M) for M new rows (+ occasional compaction, O(N))
+    """
+    df = normalize_ohlc(df)
+    meta = self._read_meta(symbol, interval) or {
+      "symbol": symbol.upper(),
+      "interval": interval,
+      "last_ts": None,
+      "rows": 0,
+      "next_part": 1,
+    }
+
+    replaced = 0
+    if meta["last_ts"] is not None:
+      last_ts = pd.Timestamp(meta["last_ts"])
+      df = df[df.index >= last_ts]
+      replaced = int(not df.empty and df.index[0] == last_ts)
+
+    now = time.time()
+    meta["refreshed_at"] = now
+    meta["accessed_at"] = now
+
+    if not df.empty:
+      d = self._dir(symbol, interval)
+      os.makedirs(d, exist_ok=True)
+      part = os.path.join(d, f"part-{meta['next_part']:06d}.parquet")
+      df.to_parquet(part)
+      meta["next_part"] += 1
+      meta["rows"] += len(df) - replaced
+      meta["last_ts"] = df.index[-1].isoformat()
+
+    if meta["last_ts"] is not None:
+      self._write_meta(symbol, interval, meta)
+
+    if len(self._parts(symbol, interval)) > self.max_parts:
+      self.compact(symbol, interval)
+
+    if self.max_bytes is not None:
+      self.evict(keep={(symbol.upper(), interval)})
+
+    return len(df)
+
+  def write(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+    """
+    Replace everything stored for a key.
+    """
+    self.delete(symbol, interval)
+    return self.append(symbol, interval, df)
+
+  def import_csv(self, symbol: str, interval: str, path: str) -> int:
+    """
+    Seed a key from a canonical Date,Open,High,Low,Close CSV
+    (e.g. data/spy_5min.csv).
+    """
+    return self.append(symbol, interval, load_prices_from_csv(path))
+
+  def compact(self, symbol: str, interval: str) -> None:
+    """
+    Merge all parts of a key into a single part file.
+    """
+    parts = self._parts(symbol, interval)
+    if len(parts) <= 1:
+      return
+    meta = self._read_meta(symbol, interval)
+    df = self._read_parts(parts)
+    merged = os.path.join(self._dir(symbol, interval), f"part-{meta['next_part']:06d}.parquet")
+    df.to_parquet(merged)
+    for p in parts:
+      os.remove(p)
+    meta["next_part"] += 1
+    meta["rows"] = len(df)
+    self._write_meta(symbol, interval, meta)
+
+  def delete(self, symbol: str, interval: str) -> None:
+    d = self._dir(symbol, interval)
+    self._accessed.pop((symbol.upper(), interval), None)
+    if os.path.isdir(d):
+      shutil.rmtree(d)
+    sym_dir = os.path.dirname(d)
+    if os.path.isdir(sym_dir) and not os.listdir(sym_dir):
+      os.rmdir(sym_dir)
+
+  def evict(self, keep: Iterable[Tuple[str, str]] = ()) -> List[Tuple[str, str]]:
+    """
+    Delete least recently used keys until the store fits in max_bytes.
+    Keys in `keep` are never evicted. Returns the evicted keys.
+
+    Time: O(K log K) for K keys
+    """
+    if self.max_bytes is None:
+      return []
+
+    keep = set(keep)
+    sizes = {k: self.size_bytes(*k) for k in self.keys()}
+    total = sum(sizes.values())
+    if total <= self.max_bytes:
+      return []
+
+    by_age = sorted(
+      (k for k in sizes if k not in keep),
+      key=lambda k: self._accessed_at(*k),
+    )
+    evicted = []
+    for k in by_age:
+      if total <= self.max_bytes:
+        break
+      self.delete(*k)
+      total -= sizes[k]
+      evicted.append(k)
+    return evicted
+
+  # -------------------------
+  # Reads
+  # -------------------------
+
+  @staticmethod
+  def _read_parts(parts: List[str]) -> pd.DataFrame:
+    df = pd.concat([pd.read_parquet(p) for p in parts]) if len(parts) > 1 else pd.read_parquet(parts[0])
+    if df.index.has_duplicates:
+      df = df[~df.index.duplicated(keep="last")]
+    df.index.name = "Date"
+    return df
+
+  def read(
+    self,
+    symbol: str,
+    interval: str,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+  ) -> pd.DataFrame:
+    """
+    Read stored bars (disk only). Raises KeyError if the key is not stored.
+
+    Time: O(N) disk read
+    """
+    parts = self._parts(symbol, interval)
+    meta = self._read_meta(symbol, interval)
+    if not parts or meta is None:
+      raise KeyError(f"No bars stored for {symbol} {interval}")
+
+    df = self._read_parts(parts)
+    if start is not None:
+      df = df[df.index >= _utc(start)]
+    if end is not None:
+      df = df[df.index <= _utc(end)]
+
+    # LRU bookkeeping in memory; meta.json is only rewritten when its
+    # access time is more than ATIME_FLUSH_SECONDS old
+    now = time.time()
+    self._accessed[(symbol.upper(), interval)] = now
+    if now - meta.get("accessed_at", 0.0) >= ATIME_FLUSH_SECONDS:
+      meta["accessed_at"] = now
+      self._write_meta(symbol, interval, meta)
+    return df
+
+  def refresh(self, symbol: str, interval: str, force: bool = False) -> int:
+    """
+    Fetch bars missing since the last stored timestamp.
+    No-op while the key is fresh, unless force=True.
+
+    Returns the number of rows written.
+    """
+    if not force and self.is_fresh(symbol, interval):
+      return 0
+    start = self.last_timestamp(symbol, interval)
+    df = self.fetcher(symbol, interval, start)
+    if df is None or df.empty:
+      # Nothing new, but the key was checked: restart its TTL clock
+      self.mark_refreshed(symbol, interval)
+      return 0
+    return self.append(symbol, interval, df)
+
+  def get(
+    self,
+    symbol: str,
+    interval: str,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+  ) -> pd.DataFrame:
+    """
+    Refresh the key if stale, then read it from disk.
+    """
+    self.refresh(symbol, interval)
+    return self.read(symbol, interval, start=start, end=end)
+
+
+def _utc(ts) -> pd.Timestamp:
+  ts = pd.Timestamp(ts)
+  return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
@@ -0,0 +1,121 @@
+# OHLC loading helpers shared by the research notebooks, the bar store and
+# the backtester. Pandas is the "source of truth"; NumPy only where it adds
+# value (see ds_research.ipynb for the original notes).
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+REQUIRED_COLUMNS = ["Open", "High", "Low", "Close"]
+
+
+def normalize_ohlc(
+  df: pd.DataFrame,
+) -> pd.DataFrame:
+  """
+  Coerce a frame into the OHLC contract used across the backend:
+  - DatetimeIndex named "Date" (tz-aware UTC, sorted, unique)
+  - Columns exactly Open, High, Low, Close as float64
+  - No NaN rows
+
+  Time complexity: O(N) (O(N log N) if the index is unsorted)
+  Space complexity: O(N)
+  """
+
+  missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+  if missing:
+    raise ValueError(f"Missing required columns: {missing}")
+
+  df = df[REQUIRED_COLUMNS].astype(float)
+
+  idx = pd.DatetimeIndex(pd.to_datetime(df.index))
+  if idx.tz is None:
+    idx = idx.tz_localize("UTC")
+  else:
+    idx = idx.tz_convert("UTC")
+  df.index = idx
+  df.index.name = "Date"
+
+  if not df.index.is_monotonic_increasing:
+    df = df.sort_index()
+  if df.index.has_duplicates:
+    df = df[~df.index.duplicated(keep="last")]
+
+  return df.dropna()
+
+
+def load_prices_from_csv(
+  path: str,
+) -> pd.DataFrame:
+  """
+  Load OHLC data from CSV into a clean pandas DataFrame.
+
+  Time complexity: O(N)
+  Space complexity: O(N)
+  """
+
+  df = pd.read_csv(
+    path,
+    parse_dates=["Date"],
+  )
+
+  # Enforce datetime index
+  df = df.set_index("Date")
+
+  # Validate required columns
+  missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+  if missing:
+    raise ValueError(f"Missing required columns: {missing}")
+
+  # Keep only OHLC columns, in fixed order
+  df = df[REQUIRED_COLUMNS]
+
+  # Enforce float dtype
+  df = df.astype(float)
+
+  # Drop rows with missing data
+  df = df.dropna()
+
+  return df
+
+
+def prices_to_numpy(
+  df: pd.DataFrame,
+) -> np.ndarray:
+  """
+  Convert OHLC pandas DataFrame to NumPy array.
+
+  Output shape:
+    (N, 4) where columns are [Open, High, Low, Close]
+
+  Time complexity: O(N)
+  Space complexity: O(N)
+  """
+
+  return df.values
+
+
+def prices_to_structured_numpy(
+  df: pd.DataFrame,
+) -> np.ndarray:
+  """
+  Convert OHLC DataFrame to a structured NumPy array.
+
+  Useful if you want named fields without pandas.
+  """
+
+  out = np.empty(
+    len(df),
+    dtype=[
+      ("Open", "f8"),
+      ("High", "f8"),
+      ("Low", "f8"),
+      ("Close", "f8"),
+    ],
+  )
+  # Fill field by field (one vectorized copy per column, no Python tuple per bar)
+  for name in REQUIRED_COLUMNS:
+    out[name] = df[name].to_numpy(dtype=float)
+  return out
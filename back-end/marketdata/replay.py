@@ -0,0 +1,213 @@
+# What needs to be done
+# 1) Stand in for a live feed offline: stream a stored OHLC series
+#    (backtester/data/spy_5min.csv, a bar file, any frame) bar by bar,
+#    at real-time pace, N x faster, or as fast as possible.
+# 2) Measure what a consumer (streaming indicators, zone tracker, ...)
+#    costs per bar, and whether that cost grows with the history.
+#
+# Brute-force approach
+# - Loop over df.iterrows() with time.sleep between rows and time the
+#   whole loop: blocks the event loop, hides per-bar outliers, and says
+#   nothing about early vs late bars.
+#
+# Approach below
+# - Producer coroutine: puts (bar, enqueue time) on an asyncio.Queue,
+#   sleeping the bar-to-bar gap / speed (gaps capped, so overnight and
+#   weekend gaps do not stall a fast replay). speed=None -> no pacing,
+#   just a cooperative yield per bar.
+# - Consumer coroutine: calls the handler per bar and records, in
+#   preallocated arrays, the handler's own time (perf_counter_ns) and the
+#   queue wait (enqueue -> handled), i.e. what a live feed would add.
+# - Flatness: mean update time over the first vs the last tenth of the
+#   bars; O(1) indicators give a ratio near 1, full recomputes grow.
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from .prices import REQUIRED_COLUMNS, load_prices_from_csv
+
+
+@dataclass
+class ReplayStats:
+  """
+  Per-bar latencies of one replay, in nanoseconds.
+  """
+  update_ns: np.ndarray       # handler time per bar
+  wait_ns: np.ndarray         # enqueue -> handler done per bar
+  seconds: float              # wall time of the replay
+
+  def summary(self) -> Dict[str, float]:
+    """
+    Percentiles in microseconds, throughput and the late/early ratio of
+    mean update time (first vs last tenth of the bars).
+
+    Time: O(N)
+    """
+    bars = len(self.update_ns)
+    if bars == 0:
+      return {"bars": 0}
+    us = self.update_ns / 1e3
+    tenth = max(1, bars // 10)
+    early = float(us[:tenth].mean())
+    late = float(us[-tenth:].mean())
+    return {
+      "bars": bars,
+      "seconds": round(self.seconds, 6),
+      "bars_per_second": round(bars / self.seconds, 1) if self.seconds > 0 else float("inf"),
+      "update_us_p50": float(np.percentile(us, 50)),
+      "update_us_p99": float(np.percentile(us, 99)),
+      "update_us_max": float(us.max()),
+      "wait_us_p50": float(np.percentile(self.wait_ns / 1e3, 50)),
+      "wait_us_p99": float(np.percentile(self.wait_ns / 1e3, 99)),
+      "early_update_us": early,
+      "late_update_us": late,
+      "late_vs_early": late / early if early > 0 else float("nan"),
+    }
+
+
+def iter_bars(
+  df: pd.DataFrame,
+) -> Iterator[Dict[str, Any]]:
+  """
+  Bars as plain dicts (Date + OHLC floats), the shape a live feed hands over.
+
+  Time: O(N)
+  """
+  columns = [c for c in REQUIRED_COLUMNS if c in df.columns]
+  arrays = [df[c].to_numpy(dtype=float) for c in columns]
+  for ts, *values in zip(df.index, *arrays):
+    bar = dict(zip(columns, values))
+    bar["Date"] = ts
+    yield bar
+
+
+async def replay(
+  df: pd.DataFrame,
+  handler: Callable[[Dict[str, Any]], Any],
+  speed: Optional[float] = None,
+  max_gap: float = 1.0,
+  queue_size: int = 1024,
+) -> ReplayStats:
+  """
+  Stream `df` through `handler` (sync, or async returning an awaitable).
+
+  Args:
+    df: OHLC frame with a DatetimeIndex
+    handler: Called once per bar with the bar dict
+    speed: Replay speed as a multiple of real time (60 -> a 5 minute bar
+      every 5 s); None = as fast as possible
+    max_gap: Longest sleep between two bars, in seconds (caps overnight
+      and weekend gaps)
+    queue_size: Feed buffer; a slow handler makes the producer wait
+
+  Returns:
+    ReplayStats with per-bar update and wait latencies
+
+  Time: O(N) plus the handler's cost per bar
+  """
+  n = len(df)
+  update_ns = np.zeros(n, dtype=np.int64)
+  wait_ns = np.zeros(n, dtype=np.int64)
+  queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+  done = object()
+
+  gaps = np.zeros(n)
+  if speed and n > 1:
+    secs = np.diff(df.index.as_unit("ns").asi8) / 1e9
+    gaps[1:] = np.minimum(secs / speed, max_gap)
+
+  async def produce() -> None:
+    for i, bar in enumerate(iter_bars(df)):
+      if gaps[i] > 0:
+        await asyncio.sleep(gaps[i])
+      await queue.put((bar, time.perf_counter_ns()))
+      if not speed:
+        await asyncio.sleep(0)
+    await queue.put(done)
+
+  async def consume() -> None:
+    i = 0
+    while True:
+      item = await queue.get()
+      if item is done:
+        return
+      bar, queued = item
+      start = time.perf_counter_ns()
+      result = handler(bar)
+      if inspect.isawaitable(result):
+        await result
+      end = time.perf_counter_ns()
+      update_ns[i] = end - start
+      wait_ns[i] = end - queued
+      i += 1
+
+  started = time.perf_counter()
+  await asyncio.gather(produce(), consume())
+  return ReplayStats(update_ns=update_ns, wait_ns=wait_ns, seconds=time.perf_counter() - started)
+
+
+def replay_file(
+  path: str,
+  handler: Callable[[Dict[str, Any]], Any],
+  speed: Optional[float] = None,
+  **kwargs,
+) -> ReplayStats:
+  """
+  asyncio.run(replay(...)) over a CSV or a bar file (.bars).
+  """
+  if path.endswith(".bars"):
+    from .barfile import load_prices_from_bars
+    df = load_prices_from_bars(path)
+  else:
+    df = load_prices_from_csv(path)
+  return asyncio.run(replay(df, handler, speed=speed, **kwargs))
+
+
+if __name__ == "__main__":
+  import argparse
+  import os
+
+  from screener.streaming import IndicatorSet
+
+  default = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "backtester", "data", "spy_5min.csv")
+  parser = argparse.ArgumentParser(description="Replay stored bars through the streaming indicators.")
+  parser.add_argument("path", nargs="?", default=default, help="CSV or .bars file.")
+  parser.add_argument("--speed", type=float, default=None, help="Multiple of real time (default: unpaced).")
+  parser.add_argument("--max-gap", type=float, default=1.0, help="Longest sleep between bars (s).")
+  parser.add_argument("--batch", action="store_true",
+                      help="Also time the batch alternative (recompute over the full history per bar).")
+  args = parser.parse_args()
+
+  live = IndicatorSet()
+  stats = replay_file(args.path, live.update, speed=args.speed, max_gap=args.max_gap)
+  for key, value in stats.summary().items():
+    print(f"{key:>18}: {value}")
+
+  if args.batch:
+    from backtester.zones import compute_atr
+
+    closes = []
+    frame = []
+
+    def recompute(bar: Dict[str, Any]) -> None:
+      frame.append(bar)
+      closes.append(bar["Close"])
+      close = pd.Series(closes)
+      delta = close.diff()
+      gain = delta.where(delta > 0, 0).rolling(14).mean()
+      loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+      _ = (100 - 100 / (1 + gain / loss)).iloc[-1], close.rolling(200).mean().iloc[-1]
+      _ = compute_atr(pd.DataFrame(frame), 14).iloc[-1]
+
+    print("\nbatch recompute per bar:")
+    for key, value in replay_file(args.path, recompute).summary().items():
+      print(f"{key:>18}: {value}")
@@ -0,0 +1,410 @@
+# What needs to be done
+# 1) Build higher timeframes (15m, 1h, 4h, 1d, ...) from ONE base series
+#    (the finest one stored, e.g. SPY 5m), so every timeframe covers the
+#    same bars instead of separately downloaded files.
+# 2) Bucket by exchange session, not by UTC clock: the CSV timestamps are
+#    UTC ("+00:00"), but a 1h bar starts at 09:30, 10:30, ... New York time
+#    (what yfinance returns), a 4h bar at 09:30 / 13:30, and a daily bar is
+#    one session. Bars outside the session are left out of derived bars.
+# 3) Keep each derived timeframe cached and update it incrementally when new
+#    base bars arrive (only the last open bucket is recomputed).
+# 4) Map each lower-timeframe bar to the last higher-timeframe bar that was
+#    COMPLETE at its close, for joins without lookahead.
+#
+# Brute-force approach
+# - df.resample("1h") per call: UTC-aligned buckets (14:00, 15:00, ...),
+#   no session awareness, full recompute on every new bar, and a naive
+#   join on timestamps hands a bar the higher bar that is still forming.
+#
+# Approach below
+# - Per base bar: session day (local date) and bucket number, computed with
+#   one tz conversion; session open/close are converted to UTC once per DAY.
+#   Bucket key = (day, bucket); OHLC per key with np.maximum/minimum.reduceat.
+# - Availability: a derived bar is known complete at its nominal end if the
+#   base bar reaching it is in, otherwise (missing bars, early close) only
+#   when the next base bar closes. "Still forming" = NOT_AVAILABLE.
+#   Availability is non-decreasing, so lower -> higher mapping is one
+#   np.searchsorted.
+# - Base rows, bucket keys and derived bars sit in growable arrays (spare
+#   capacity, doubled when full): an update overwrites the tail in place
+#   instead of concatenating the history. DataFrames are built on access.
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .prices import REQUIRED_COLUMNS, normalize_ohlc
+
+
+NOT_AVAILABLE = np.iinfo(np.int64).max
+
+_NS_PER_MIN = 60 * 10**9
+_NS_PER_DAY = 24 * 60 * _NS_PER_MIN
+
+
+@dataclass(frozen=True)
+class Session:
+  """
+  Trading session in exchange-local time. close may be "24:00".
+  """
+  tz: str = "America/New_York"
+  open: str = "09:30"
+  close: str = "16:00"
+
+  @staticmethod
+  def _minutes(hhmm: str) -> int:
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+  @property
+  def open_minutes(self) -> int:
+    return self._minutes(self.open)
+
+  @property
+  def close_minutes(self) -> int:
+    return self._minutes(self.close)
+
+
+US_EQUITIES = Session()
+ALWAYS_OPEN = Session(tz="UTC", open="00:00", close="24:00")
+
+
+def interval_minutes(interval: str) -> Optional[int]:
+  """
+  "15m" -> 15, "1h" -> 60, "4h" -> 240; "1d" -> None (one whole session).
+  """
+  m = re.fullmatch(r"(\d+)(m|min|h|d)", interval.strip().lower())
+  if not m:
+    raise ValueError(f"Unsupported interval: {interval}")
+  n, unit = int(m.group(1)), m.group(2)
+  if unit == "d":
+    if n != 1:
+      raise ValueError("Only single-session daily bars are supported")
+    return None
+  return n * 60 if unit == "h" else n
+
+
+@dataclass
+class Timeframe:
+  """
+  One derived timeframe.
+
+  frame:     OHLC frame (load_prices_from_csv contract) indexed by bucket
+             start (UTC)
+  available: (M,) int64 ns UTC, when each bar became known complete
+             (NOT_AVAILABLE for a bar still forming)
+  """
+  interval: str
+  frame: pd.DataFrame
+  available: np.ndarray
+  keys: np.ndarray
+  first_row: np.ndarray
+
+  @property
+  def complete(self) -> np.ndarray:
+    return self.available != NOT_AVAILABLE
+
+  def completed_frame(self) -> pd.DataFrame:
+    """
+    Only the bars that are complete (drops a forming last bar).
+    """
+    return self.frame[self.complete]
+
+
+def _buckets(
+  ts: np.ndarray,
+  minutes: Optional[int],
+  session: Session,
+):
+  """
+  Bucket key, bucket start and nominal bucket end (int64 ns UTC) for each
+  timestamp; key is -1 outside the session.
+
+  Time: O(N) plus one tz_localize per distinct session day
+  """
+  utc = pd.DatetimeIndex(ts.view("M8[ns]")).tz_localize("UTC")
+  local = utc.tz_convert(session.tz).tz_localize(None).as_unit("ns").asi8
+  day = local // _NS_PER_DAY * _NS_PER_DAY
+  since_open = local - day - session.open_minutes * _NS_PER_MIN
+  length = (session.close_minutes - session.open_minutes) * _NS_PER_MIN
+  inside = (since_open >= 0) & (since_open < length)
+
+  # Session open/close in UTC once per day (DST-safe), then broadcast back
+  days, day_pos = np.unique(day, return_inverse=True)
+  open_local = pd.DatetimeIndex((days + session.open_minutes * _NS_PER_MIN).view("M8[ns]"))
+  open_utc = open_local.tz_localize(session.tz).tz_convert("UTC").as_unit("ns").asi8[day_pos]
+  close_utc = open_utc + length
+
+  step = length if minutes is None else minutes * _NS_PER_MIN
+  bucket = np.where(inside, since_open // step, 0)
+  start = open_utc + bucket * step
+  end = np.minimum(start + step, close_utc)
+  key = np.where(inside, (day // _NS_PER_DAY) * 100_000 + bucket, -1)
+  return key, start, end
+
+
+class _Growable:
+  """
+  1-D array with spare capacity: replacing the tail / appending M values
+  costs O(M) amortized (capacity doubles), and `values` is a view.
+  """
+  __slots__ = ("_data", "n")
+
+  def __init__(self, values: np.ndarray):
+    self._data = np.empty(max(16, 2 * len(values)), dtype=values.dtype)
+    self._data[:len(values)] = values
+    self.n = len(values)
+
+  @property
+  def values(self) -> np.ndarray:
+    return self._data[:self.n]
+
+  def replace_tail(self, keep: int, values: np.ndarray) -> None:
+    """
+    Keep the first `keep` values and append `values` after them.
+    """
+    need = keep + len(values)
+    if need > len(self._data):
+      grown = np.empty(max(need, 2 * len(self._data)), dtype=self._data.dtype)
+      grown[:keep] = self._data[:keep]
+      self._data = grown
+    self._data[keep:need] = values
+    self.n = need
+
+
+# Per derived timeframe: bar columns, then per base row bucket columns
+_BAR_FIELDS = ("Open", "High", "Low", "Close", "start", "available", "keys", "first_row")
+_BIN_FIELDS = ("key", "start", "end")
+
+
+class MultiTimeframe:
+  """
+  Higher timeframes derived from one base series, cached and updated
+  incrementally.
+
+  Base rows, their bucket keys and every derived timeframe live in
+  growable arrays, so update() never copies the history; frames are
+  materialized on access (base / get) and cached until the next update.
+
+  Usage:
+    mtf = MultiTimeframe(load_prices_from_csv("backtester/data/spy_5min.csv"), "5m")
+    hourly = mtf.get("1h").frame
+    pos = mtf.align("5m", "1h")         # per 5m bar: last completed 1h bar (-1 = none)
+    joined = mtf.join("5m", "1h")       # 5m frame + 1h_Open ... 1h_Close
+    mtf.update(new_5m_bars)             # derived timeframes follow
+  """
+
+  def __init__(
+    self,
+    base: pd.DataFrame,
+    base_interval: str,
+    session: Session = US_EQUITIES,
+  ):
+    self.base_interval = base_interval
+    self.session = session
+    self._step = interval_minutes(base_interval)
+    if self._step is None:
+      raise ValueError("The base interval must be intraday")
+    base = normalize_ohlc(base)
+    self._rows = {"ts": _Growable(base.index.as_unit("ns").asi8)}
+    self._rows.update({c: _Growable(base[c].to_numpy()) for c in REQUIRED_COLUMNS})
+    self._bins: Dict[str, Dict[str, _Growable]] = {}
+    self._bars: Dict[str, Dict[str, _Growable]] = {}
+    # Materialized base frame / Timeframes, dropped on update
+    self._base: Optional[pd.DataFrame] = base
+    self._cache: Dict[str, Timeframe] = {}
+
+  @property
+  def _ts(self) -> np.ndarray:
+    return self._rows["ts"].values
+
+  @property
+  def base(self) -> pd.DataFrame:
+    """
+    The base series. Time: O(N) after an update, O(1) after
+    """
+    if self._base is None:
+      index = pd.DatetimeIndex(self._ts.view("M8[ns]"), name="Date").tz_localize("UTC")
+      self._base = pd.DataFrame({c: self._rows[c].values.copy() for c in REQUIRED_COLUMNS}, index=index)
+    return self._base
+
+  @property
+  def base_available(self) -> np.ndarray:
+    """
+    Close time of each base bar (its timestamp + the base interval).
+    """
+    return self._ts + self._step * _NS_PER_MIN
+
+  # -------------------------
+  # Derived timeframes
+  # -------------------------
+
+  def _ensure(self, interval: str) -> Dict[str, _Growable]:
+    if interval not in self._bars:
+      minutes = interval_minutes(interval)
+      if minutes is not None and (minutes < self._step or minutes % self._step):
+        raise ValueError(f"{interval} is not a multiple of the base interval {self.base_interval}")
+      bins = _buckets(self._ts, minutes, self.session)
+      self._bins[interval] = {f: _Growable(v) for f, v in zip(_BIN_FIELDS, bins)}
+      self._bars[interval] = {f: _Growable(v) for f, v in self._aggregate(interval, 0).items()}
+    return self._bars[interval]
+
+  def get(self, interval: str) -> Timeframe:
+    """
+    Derived timeframe (cached).
+
+    Time: O(N) on first use and on the first use after an update, O(1) after
+    """
+    if interval not in self._cache:
+      bars = {f: g.values for f, g in self._ensure(interval).items()}
+      index = pd.DatetimeIndex(bars["start"].view("M8[ns]"), name="Date").tz_localize("UTC")
+      frame = pd.DataFrame({c: bars[c].copy() for c in REQUIRED_COLUMNS}, index=index)
+      self._cache[interval] = Timeframe(interval, frame, bars["available"].copy(),
+                                        bars["keys"].copy(), bars["first_row"].copy())
+    return self._cache[interval]
+
+  def _aggregate(self, interval: str, lo: int) -> Dict[str, np.ndarray]:
+    """
+    Bars of one timeframe aggregated from base rows [lo, N), as _BAR_FIELDS
+    arrays.
+
+    Time: O(N - lo)
+    """
+    bins = self._bins[interval]
+    key, start, end = (bins[f].values for f in _BIN_FIELDS)
+    ts = self._ts
+    n = len(ts)
+    rows = lo + np.flatnonzero(key[lo:] >= 0)
+    k = key[rows]
+    if len(rows) == 0:
+      return {f: np.empty(0, np.int64 if f not in REQUIRED_COLUMNS else float) for f in _BAR_FIELDS}
+
+    g_first = np.flatnonzero(np.concatenate([[True], k[1:] != k[:-1]]))
+    g_last = np.append(g_first[1:] - 1, len(k) - 1)
+    first_row = rows[g_first]
+    last_row = rows[g_last]
+
+    values = {c: self._rows[c].values[rows] for c in REQUIRED_COLUMNS}
+
+    # Known complete at the nominal end once the last base bar reaches it,
+    # else only when the next base bar (any bar, in or out of session) closes
+    close_ns = self._step * _NS_PER_MIN
+    nominal = end[first_row]
+    next_row = last_row + 1
+    has_next = next_row < n
+    after = np.where(has_next, ts[np.minimum(next_row, n - 1)] + close_ns, NOT_AVAILABLE)
+    available = np.where(ts[last_row] + close_ns >= nominal, nominal, after)
+
+    return {
+      "Open": values["Open"][g_first],
+      "High": np.maximum.reduceat(values["High"], g_first),
+      "Low": np.minimum.reduceat(values["Low"], g_first),
+      "Close": values["Close"][g_last],
+      "start": start[first_row],
+      "available": available,
+      "keys": k[g_first],
+      "first_row": first_row,
+    }
+
+  def update(self, bars: pd.DataFrame) -> int:
+    """
+    Append new base bars and refresh every derived timeframe in use. Rows
+    older than the last base bar are dropped; a row at the last timestamp
+    replaces it (live bar still forming). Only buckets from the one before
+    the first changed base row onward are recomputed.
+
+    Returns the number of base rows added or replaced.
+
+    Time: O(M) amortized for M new rows (plus the recomputed buckets); the
+    history is not copied
+    """
+    bars = normalize_ohlc(bars)
+    ts = bars.index.as_unit("ns").asi8
+    n = len(self._ts)
+    if n:
+      keep = ts >= self._ts[-1]
+      bars, ts = bars[keep], ts[keep]
+    if bars.empty:
+      return 0
+
+    changed = n - 1 if n and ts[0] == self._ts[-1] else n
+    self._rows["ts"].replace_tail(changed, ts)
+    for c in REQUIRED_COLUMNS:
+      self._rows[c].replace_tail(changed, bars[c].to_numpy())
+    self._base = None
+    self._cache.clear()
+
+    for interval, old in self._bars.items():
+      new_bins = _buckets(self._ts[changed:], interval_minutes(interval), self.session)
+      for f, values in zip(_BIN_FIELDS, new_bins):
+        self._bins[interval][f].replace_tail(changed, values)
+      # The bucket holding the row before the change may have been the
+      # forming tail: recompute from its first row
+      first_row = old["first_row"].values
+      g = max(int(np.searchsorted(first_row, max(changed - 1, 0), side="right")) - 1, 0)
+      lo = int(first_row[g]) if len(first_row) else 0
+      for f, values in self._aggregate(interval, lo).items():
+        old[f].replace_tail(g, values)
+    return len(bars)
+
+  # -------------------------
+  # Cross-timeframe joins
+  # -------------------------
+
+  def _available(self, interval: str) -> np.ndarray:
+    if interval == self.base_interval:
+      return self.base_available
+    return self._ensure(interval)["available"].values
+
+  def align(self, lower: str, higher: str) -> np.ndarray:
+    """
+    For each `lower` bar, the position of the last `higher` bar that was
+    complete when the lower bar closed (-1 if none yet).
+
+    Time: O(N log M)
+    """
+    known = self._available(lower)
+    return np.searchsorted(self._available(higher), known, side="right") - 1
+
+  def frame(self, interval: str) -> pd.DataFrame:
+    return self.base if interval == self.base_interval else self.get(interval).frame
+
+  def join(
+    self,
+    lower: str,
+    higher: str,
+    columns: Sequence[str] = REQUIRED_COLUMNS,
+  ) -> pd.DataFrame:
+    """
+    The `lower` frame plus "<higher>_<column>" columns from the last
+    completed `higher` bar (NaN before the first one).
+    """
+    pos = self.align(lower, higher)
+    out = self.frame(lower).copy()
+    src = self.get(higher).frame
+    valid = pos >= 0
+    for c in columns:
+      values = src[c].to_numpy()
+      out[f"{higher}_{c}"] = np.where(valid, values[np.maximum(pos, 0)] if len(values) else np.nan, np.nan)
+    return out
+
+  @classmethod
+  def from_store(
+    cls,
+    store,
+    symbol: str,
+    base_interval: str,
+    session: Session = US_EQUITIES,
+  ) -> "MultiTimeframe":
+    """
+    Base series from a BarStore key (fetched/refreshed by the store).
+    """
+    return cls(store.get(symbol, base_interval), base_interval, session)
+
+  def intervals(self) -> List[str]:
+    return [self.base_interval] + list(self._bars)
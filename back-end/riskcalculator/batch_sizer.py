@@ -0,0 +1,278 @@
+"""
+Batch Option Position Sizer — columnar version of size_contracts
+
+Sizes many scenarios (every signal of a backtest, a grid of stop/delta/premium
+values, ...) in one vectorized pass instead of one size_contracts() call and
+result dict per row.
+
+Inputs are columns named like the SizingInput fields, given as a DataFrame or
+a dict of arrays/scalars (scalars broadcast). Missing columns take the
+SizingInput defaults; None/NaN means "not provided" for the optional fields.
+
+The direction can also be given as a boolean `is_call` column (True = call,
+False = put, NA = invalid), which takes precedence over `direction`. Both
+that and a categorical / pandas string `direction` column avoid matching
+strings row by row; a plain object array of strings is the slow fallback.
+float64 columns and scalars are used without copying.
+
+Rows that size_contracts would reject are not raised: their message goes in
+the "error" column and their outputs are NaN. A NaN in a required field
+(entries, stop, delta, buffer) is reported as an error rather than sized.
+"""
+
+from dataclasses import fields
+from typing import Any, Dict, Mapping, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .option_position_sizer import SizingInput
+
+Columns = Union[pd.DataFrame, Mapping[str, Any]]
+
+FLOAT_FIELDS = [
+    "account_size", "risk_pct", "fixed_dollar_risk",
+    "entry_low", "entry_high", "stop",
+    "delta", "buffer",
+    "max_premium_per_contract", "est_entry_premium", "pct_drawdown_cap",
+]
+
+# Same messages, in the same order, as the checks size_contracts runs
+ERR_FIXED_RISK = "fixed_dollar_risk must be > 0"
+ERR_NO_RISK = "Provide either fixed_dollar_risk or risk_pct."
+ERR_RISK_PCT = "risk_pct must be in (0, 1]."
+ERR_DIRECTION = "direction must be 'call' or 'put'."
+ERR_SHARE_RISK = "Per-share risk is <= 0. Check your entry zone and stop placement."
+ERR_CONTRACT_LOSS = "Computed per-contract loss is <= 0; check inputs."
+ERR_PCT_CAP = "pct_cap must be > 0 (e.g., 0.10 for 10%)."
+ERR_PREMIUM = "est_entry_premium must be > 0"
+ERR_GREEKS = "delta and buffer must be > 0"
+ERR_ZERO_PREMIUM = "float division by zero"
+ERR_DRAWDOWN_CAP = "pct_drawdown_cap must be > 0 (e.g., 0.10 for 10%)."
+
+ERRORS = np.array([
+    None,
+    ERR_FIXED_RISK, ERR_NO_RISK, ERR_RISK_PCT,
+    ERR_DIRECTION, ERR_SHARE_RISK, ERR_CONTRACT_LOSS,
+    ERR_PCT_CAP, ERR_PREMIUM, ERR_GREEKS,
+    ERR_ZERO_PREMIUM, ERR_DRAWDOWN_CAP,
+], dtype=object)
+
+
+def inputs_to_columns(inputs: Sequence[SizingInput]) -> pd.DataFrame:
+    """
+    Convert a list of SizingInput into the columnar form size_contracts_batch takes.
+    """
+    names = [f.name for f in fields(SizingInput)]
+    return pd.DataFrame([[getattr(inp, name) for name in names] for inp in inputs], columns=names)
+
+
+def _columns(inputs: Columns) -> Tuple[int, Dict[str, np.ndarray], pd.Index]:
+    defaults = SizingInput()
+    if isinstance(inputs, pd.DataFrame):
+        n = len(inputs)
+        index = inputs.index
+        get = lambda name: inputs[name] if name in inputs.columns else getattr(defaults, name)
+    else:
+        lengths = {len(np.atleast_1d(v)) for v in inputs.values() if np.ndim(v) > 0}
+        if len(lengths) > 1:
+            raise ValueError("All array inputs must have the same length")
+        n = lengths.pop() if lengths else 1
+        index = pd.RangeIndex(n)
+        get = lambda name: inputs[name] if name in inputs else getattr(defaults, name)
+
+    cols = {name: _float_column(get(name), n) for name in FLOAT_FIELDS}
+    if "is_call" in inputs:
+        cols["direction"] = _is_call_codes(inputs["is_call"], n)
+    else:
+        cols["direction"] = _direction_codes(get("direction"), n)
+    return n, cols, index
+
+
+def _float_column(value: Any, n: int) -> np.ndarray:
+    # float64 arrays / Series are used as they are; scalars are broadcast
+    if isinstance(value, pd.Series):
+        value = value.to_numpy() if value.dtype == np.float64 else value.to_numpy(dtype=float, na_value=np.nan)
+    if isinstance(value, np.ndarray) and value.dtype == np.float64 and value.shape == (n,):
+        return value
+    if value is None:
+        value = np.nan
+    return np.broadcast_to(np.asarray(value, dtype=float), (n,))
+
+
+def _is_call_codes(is_call: Any, n: int) -> np.ndarray:
+    """
+    Direction codes from a boolean is_call column (NA = -1).
+    """
+    if np.ndim(is_call) == 0:
+        code = -1 if is_call is None or pd.isna(is_call) else 0 if is_call else 1
+        return np.full(n, code, dtype=np.int8)
+    values = is_call.to_numpy() if isinstance(is_call, pd.Series) and is_call.dtype == bool else is_call
+    if isinstance(values, np.ndarray) and values.dtype == bool:
+        return (~values).astype(np.int8)
+    flags = pd.array(np.asarray(values, dtype=object) if not isinstance(values, pd.Series) else values,
+                     dtype="boolean")
+    return np.where(flags.isna(), -1, np.where(flags.to_numpy(dtype=bool, na_value=False), 0, 1)).astype(np.int8)
+
+def _direction_codes(direction: Any, n: int) -> np.ndarray:
+    """
+    0 = call, 1 = put, -1 = anything else. Categorical and pandas string
+    columns are factorized natively and only their distinct labels are
+    lowered. For plain arrays, exact "call"/"put" are matched with one array
+    comparison each; only the leftovers (other casings, junk) are lowered,
+    once per distinct value.
+    """
+    def code(d: Any) -> int:
+        d = str(d).lower()
+        return 0 if d == "call" else 1 if d == "put" else -1
+
+    if np.ndim(direction) == 0:
+        return np.full(n, code(direction), dtype=np.int8)
+
+    if isinstance(direction, pd.Series):
+        direction = direction.array
+    if isinstance(direction, pd.Categorical):
+        labels, uniques = direction.codes, direction.categories
+    elif (isinstance(direction, pd.api.extensions.ExtensionArray)
+          and not isinstance(direction, pd.arrays.NumpyExtensionArray)):
+        labels, uniques = pd.factorize(direction)
+    else:
+        labels = None
+    if labels is not None:
+        # Label -1 (missing) picks the trailing -1
+        table = np.array([code(u) for u in uniques] + [-1], dtype=np.int8)
+        return table[labels]
+
+    direction = np.asarray(direction)
+    codes = np.full(n, -1, dtype=np.int8)
+    codes[direction == "call"] = 0
+    codes[direction == "put"] = 1
+    rest = np.flatnonzero(codes < 0)
+    if len(rest):
+        labels, uniques = pd.factorize(direction[rest].astype(object), use_na_sentinel=False)
+        codes[rest] = np.array([code(u) for u in uniques], dtype=np.int8)[labels]
+    return codes
+
+
+def size_contracts_batch(inputs: Columns) -> Dict[str, np.ndarray]:
+    """
+    Vectorized size_contracts.
+
+    Args:
+        inputs: DataFrame or dict of SizingInput-named columns (scalars broadcast)
+
+    Returns:
+        Dict of (N,) arrays:
+            error                         - None, or the message size_contracts raises
+            dollar_risk, per_share_risk, per_contract_loss_at_stop,
+            raw_contracts, contracts      - as in size_contracts (contracts is -1 on error rows)
+            pct_drawdown_at_stop          - percent, NaN without est_entry_premium
+            min_entry_premium_for_cap,
+            min_entry_notional_for_cap    - NaN without pct_drawdown_cap
+            cap_entry_threshold_computed  - est_entry_premium and pct_drawdown_cap both given
+            max_underlying_entry_for_cap  - calls, NaN otherwise
+            min_underlying_entry_for_cap  - puts, NaN otherwise
+            allowed_per_share_risk_for_cap
+            zone_respects_pct_cap, meets_pct_cap - only meaningful where
+                                            cap_entry_threshold_computed
+            affordability_checked, affordable
+
+        Values are not rounded; size_contracts rounds them for display.
+    """
+    n, c, _ = _columns(inputs)
+
+    fixed = c["fixed_dollar_risk"]
+    risk_pct = c["risk_pct"]
+    est = c["est_entry_premium"]
+    cap = c["pct_drawdown_cap"]
+    delta = c["delta"]
+    buffer = c["buffer"]
+    direction = c["direction"]
+    is_call = direction == 0
+
+    has_fixed = ~np.isnan(fixed)
+    has_est = ~np.isnan(est)
+    has_cap = ~np.isnan(cap)
+    has_max_premium = ~np.isnan(c["max_premium_per_contract"])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dollar_risk = np.where(has_fixed, fixed, c["account_size"] * risk_pct)
+        worst_entry = np.where(is_call, c["entry_high"], c["entry_low"])
+        r_share = np.where(is_call, worst_entry - c["stop"], c["stop"] - worst_entry)
+        per_ct_loss = r_share * delta * 100.0 * buffer
+        raw = dollar_risk / per_ct_loss
+
+        allowed_r_share = (cap * est * 100.0) / (delta * 100.0 * buffer)
+        threshold = np.where(is_call, c["stop"] + allowed_r_share, c["stop"] - allowed_r_share)
+        pct_drawdown = per_ct_loss / (est * 100.0)
+        min_prem = per_ct_loss / (cap * 100.0)
+
+    # First failing check per row, in size_contracts order. Applied last to
+    # first so the earliest check wins.
+    checks = [
+        lambda: has_fixed & ~(fixed > 0),
+        lambda: ~has_fixed & np.isnan(risk_pct),
+        lambda: ~has_fixed & ~((risk_pct > 0) & (risk_pct <= 1)),
+        lambda: direction < 0,
+        lambda: ~(r_share > 0),
+        lambda: ~(per_ct_loss > 0),
+        lambda: has_est & has_cap & ~(cap > 0),
+        lambda: has_est & has_cap & ~(est > 0),
+        lambda: has_est & has_cap & ~((delta > 0) & (buffer > 0)),
+        lambda: has_est & (est == 0),
+        lambda: has_cap & ~(cap > 0),
+    ]
+    first = np.zeros(n, dtype=np.int8)
+    for code in range(len(checks), 0, -1):
+        first[checks[code - 1]()] = code
+    ok = first == 0
+    error = ERRORS[first]
+
+    cap_threshold = ok & has_est & has_cap
+    affordability_checked = ok & has_max_premium & has_est
+    nan = np.nan
+
+    return {
+        "error": error,
+        "dollar_risk": np.where(ok, dollar_risk, nan),
+        "per_share_risk": np.where(ok, r_share, nan),
+        "per_contract_loss_at_stop": np.where(ok, per_ct_loss, nan),
+        "raw_contracts": np.where(ok, raw, nan),
+        "contracts": np.where(ok, np.maximum(np.floor(np.where(ok, raw, 0.0)), 0), -1).astype(np.int64),
+        "pct_drawdown_at_stop": np.where(ok & has_est, pct_drawdown * 100.0, nan),
+        "min_entry_premium_for_cap": np.where(ok & has_cap, min_prem, nan),
+        "min_entry_notional_for_cap": np.where(ok & has_cap, min_prem * 100.0, nan),
+        "cap_entry_threshold_computed": cap_threshold,
+        "max_underlying_entry_for_cap": np.where(cap_threshold & is_call, threshold, nan),
+        "min_underlying_entry_for_cap": np.where(cap_threshold & ~is_call, threshold, nan),
+        "allowed_per_share_risk_for_cap": np.where(cap_threshold, allowed_r_share, nan),
+        "zone_respects_pct_cap": np.where(is_call, c["entry_high"] <= threshold, c["entry_low"] >= threshold),
+        "meets_pct_cap": est >= min_prem,
+        "affordability_checked": affordability_checked,
+        "affordable": ~affordability_checked | (est <= c["max_premium_per_contract"]),
+    }
+
+
+def size_contracts_frame(inputs: Columns) -> pd.DataFrame:
+    """
+    size_contracts_batch as a DataFrame (indexed like `inputs` when it is a
+    DataFrame). The cap verdicts become nullable booleans, NA where no cap
+    threshold was computed.
+    """
+    out = size_contracts_batch(inputs)
+    na = ~out["cap_entry_threshold_computed"]
+    for key in ("zone_respects_pct_cap", "meets_pct_cap"):
+        out[key] = pd.arrays.BooleanArray(out[key], na)
+    index = inputs.index if isinstance(inputs, pd.DataFrame) else None
+    return pd.DataFrame(out, index=index)
+
+
+def errors(result: Columns) -> Dict[Any, str]:
+    """
+    Failed rows of a size_contracts_batch / size_contracts_frame result, as
+    {row label (or position): message}.
+    """
+    error = np.asarray(result["error"], dtype=object)
+    rows = np.flatnonzero(pd.notna(error))
+    labels = result.index[rows] if isinstance(result, pd.DataFrame) else rows.tolist()
+    return dict(zip(labels, error[rows]))
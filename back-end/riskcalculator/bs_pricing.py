@@ -0,0 +1,409 @@
+"""
+Black-Scholes repricing at the stop — full-revaluation sizing mode
+
+size_contracts approximates the loss per contract at the underlying stop as
+r_share * delta * 100 * buffer: a fixed delta, plus a buffer for everything
+delta misses (gamma, vega, decay). This module prices the contract instead:
+
+- value at entry: Black-Scholes at the worst-case entry (or a quoted premium)
+- value at stop: Black-Scholes at the stop, with IV shifted by `iv_shift` and
+  `days_to_stop` of time decay
+- loss per contract = (entry premium - value at stop) * 100
+
+Everything is NumPy arrays, so a whole option chain (hundreds of strikes and
+expiries) is priced, sized against risk_pct / fixed_dollar_risk and checked
+against pct_drawdown_cap in one pass; pick_contract then chooses the strike.
+
+The account, risk, direction, entry zone, stop, cap and premium limit come
+from a SizingInput; its delta and buffer are not used in this mode.
+"""
+
+from typing import Dict, Optional, Union
+import math
+
+import numpy as np
+import pandas as pd
+
+from .option_position_sizer import SizingInput, compute_dollar_risk, per_share_risk
+
+ArrayLike = Union[float, np.ndarray]
+
+DAYS_PER_YEAR = 365.0
+# Floors that keep d1/d2 finite; at or below them the option is priced at intrinsic
+MIN_YEARS = 1e-9
+MIN_IV = 1e-6
+# Contracts that lose less than a cent at the stop are not sized (the risk
+# budget would buy an unbounded number of them)
+MIN_LOSS_PER_CONTRACT = 0.01
+
+ERR_CHAIN_COLUMNS = "Option chain needs strike, iv and days_to_expiry columns"
+
+
+def norm_cdf(x: ArrayLike) -> np.ndarray:
+    """
+    Standard normal CDF in NumPy (no scipy), accurate to ~1e-14.
+
+    Hart's double precision rational approximation as given by West (2005),
+    "Better approximations to cumulative normal functions".
+    """
+    x = np.asarray(x, dtype=float)
+    a = np.abs(x)
+    e = np.exp(-0.5 * a * a)
+
+    num = ((((((0.0352624965998911 * a + 0.700383064443688) * a + 6.37396220353165) * a
+              + 33.912866078383) * a + 112.079291497871) * a + 221.213596169931) * a + 220.206867912376)
+    den = (((((((0.0883883476483184 * a + 1.75566716318264) * a + 16.064177579207) * a
+               + 86.7807322029461) * a + 296.564248779674) * a + 637.333633378831) * a
+            + 793.826512519948) * a + 440.413735824752)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tail = np.where(a < 7.07106781186547, e * num / den,
+                        e / (a + 1.0 / (a + 2.0 / (a + 3.0 / (a + 4.0 / (a + 0.65))))) / 2.506628274631)
+    tail = np.where(a > 37.0, 0.0, tail)
+    return np.where(x > 0, 1.0 - tail, tail)
+
+
+def norm_pdf(x: ArrayLike) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    return np.exp(-0.5 * x * x) / math.sqrt(2.0 * math.pi)
+
+
+def black_scholes(spot: ArrayLike,
+                  strike: ArrayLike,
+                  years: ArrayLike,
+                  iv: ArrayLike,
+                  is_call: ArrayLike = True,
+                  rate: ArrayLike = 0.0,
+                  div_yield: ArrayLike = 0.0) -> Dict[str, np.ndarray]:
+    """
+    European option value and greeks, broadcast over all inputs.
+
+    Args:
+        spot: Underlying price
+        strike: Strike price
+        years: Time to expiry in years (<= 0 -> expired, priced at intrinsic)
+        iv: Implied volatility as a fraction (0.25 = 25%)
+        is_call: True for calls, False for puts
+        rate: Risk-free rate (continuous, annual)
+        div_yield: Dividend yield (continuous, annual)
+
+    Returns:
+        Dict of arrays: price (per share), delta, gamma, vega (per 1 vol
+        point, i.e. +0.01 iv), theta (per calendar day)
+    """
+    spot, strike, years, iv, rate, div_yield = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (spot, strike, years, iv, rate, div_yield)))
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), spot.shape)
+    sign = np.where(is_call, 1.0, -1.0)
+
+    live = (years > MIN_YEARS) & (iv > MIN_IV)
+    t = np.where(live, years, 1.0)
+    vol = np.where(live, iv, 1.0)
+    sqrt_t = np.sqrt(t)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1 = (np.log(spot / strike) + (rate - div_yield + 0.5 * vol * vol) * t) / (vol * sqrt_t)
+    d2 = d1 - vol * sqrt_t
+
+    disc_q = np.exp(-div_yield * t)
+    disc_r = np.exp(-rate * t)
+    nd1 = norm_cdf(sign * d1)
+    nd2 = norm_cdf(sign * d2)
+    pdf = norm_pdf(d1)
+
+    price = sign * (spot * disc_q * nd1 - strike * disc_r * nd2)
+    delta = sign * disc_q * nd1
+    gamma = disc_q * pdf / (spot * vol * sqrt_t)
+    vega = spot * disc_q * pdf * sqrt_t / 100.0
+    theta = (-spot * disc_q * pdf * vol / (2.0 * sqrt_t)
+             + sign * (div_yield * spot * disc_q * nd1 - rate * strike * disc_r * nd2)) / DAYS_PER_YEAR
+
+    # Expired / zero-vol contracts: intrinsic value, step delta, no other greeks
+    intrinsic = np.maximum(sign * (spot - strike), 0.0)
+    itm = sign * (spot - strike) > 0
+    return {
+        "price": np.where(live, price, intrinsic),
+        "delta": np.where(live, delta, np.where(itm, sign, 0.0)),
+        "gamma": np.where(live, gamma, 0.0),
+        "vega": np.where(live, vega, 0.0),
+        "theta": np.where(live, theta, 0.0),
+    }
+
+
+def reprice_at_stop(is_call: ArrayLike,
+                    entry: ArrayLike,
+                    stop: ArrayLike,
+                    strike: ArrayLike,
+                    days_to_expiry: ArrayLike,
+                    iv: ArrayLike,
+                    iv_shift: ArrayLike = 0.0,
+                    days_to_stop: ArrayLike = 0.0,
+                    rate: ArrayLike = 0.0,
+                    div_yield: ArrayLike = 0.0,
+                    entry_premium: Optional[ArrayLike] = None) -> Dict[str, np.ndarray]:
+    """
+    Value of the contract at entry and when the underlying reaches the stop.
+
+    Args:
+        is_call: True for calls, False for puts
+        entry: Underlying price at entry (use the worst case of the zone)
+        stop: Underlying stop level
+        strike: Strike price
+        days_to_expiry: Calendar days to expiry at entry
+        iv: Implied volatility at entry
+        iv_shift: IV change by the time the stop is hit (e.g. +0.03)
+        days_to_stop: Calendar days expected until the stop-out (time decay)
+        rate: Risk-free rate
+        div_yield: Dividend yield
+        entry_premium: Quoted premium per share to pay instead of the model
+            value at entry (NaN entries fall back to the model)
+
+    Returns:
+        Dict of arrays: entry_premium, stop_premium, loss_per_contract
+        (dollars), pct_drawdown_at_stop (fraction of premium), and the
+        greeks at entry (delta, gamma, vega, theta) and at the stop
+        (stop_delta, ...)
+    """
+    years = np.asarray(days_to_expiry, dtype=float) / DAYS_PER_YEAR
+    stop_years = np.maximum(years - np.asarray(days_to_stop, dtype=float) / DAYS_PER_YEAR, 0.0)
+    stop_iv = np.maximum(np.asarray(iv, dtype=float) + iv_shift, 0.0)
+
+    at_entry = black_scholes(entry, strike, years, iv, is_call, rate, div_yield)
+    at_stop = black_scholes(stop, strike, stop_years, stop_iv, is_call, rate, div_yield)
+
+    premium = at_entry["price"]
+    if entry_premium is not None:
+        quoted = np.asarray(entry_premium, dtype=float)
+        premium = np.where(np.isnan(quoted), premium, quoted)
+    loss = (premium - at_stop["price"]) * 100.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = loss / (premium * 100.0)
+
+    out = {
+        "entry_premium": premium,
+        "stop_premium": at_stop["price"],
+        "loss_per_contract": loss,
+        "pct_drawdown_at_stop": pct,
+    }
+    for greek in ("delta", "gamma", "vega", "theta"):
+        out[greek] = at_entry[greek]
+        out[f"stop_{greek}"] = at_stop[greek]
+    return out
+
+
+def entry_threshold_for_cap_bs(is_call: ArrayLike,
+                               stop: ArrayLike,
+                               pct_cap: ArrayLike,
+                               strike: ArrayLike,
+                               days_to_expiry: ArrayLike,
+                               iv: ArrayLike,
+                               iv_shift: ArrayLike = 0.0,
+                               days_to_stop: ArrayLike = 0.0,
+                               rate: ArrayLike = 0.0,
+                               div_yield: ArrayLike = 0.0,
+                               iterations: int = 60) -> np.ndarray:
+    """
+    Repriced counterpart of entry_threshold_for_cap: the worst underlying
+    entry (max for calls, min for puts) whose model drawdown at the stop is
+    still <= pct_cap.
+
+    The drawdown 1 - value_at_stop / value_at_entry grows monotonically
+    as the entry moves away from the stop, so every row is solved by the
+    same vectorized bisection. NaN where even an entry at the stop breaks
+    the cap (IV crush / decay alone exceed it); +inf for calls / -inf for
+    puts where no entry breaks it (e.g. pct_cap >= 1).
+
+    Time: O(iterations * rows)
+    """
+    is_call, stop, pct_cap, strike, days_to_expiry, iv, iv_shift, days_to_stop, rate, div_yield = \
+        np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (
+            is_call, stop, pct_cap, strike, days_to_expiry, iv, iv_shift, days_to_stop, rate, div_yield)))
+    is_call = is_call.astype(bool)
+    sign = np.where(is_call, 1.0, -1.0)
+
+    # The value at the stop does not depend on the entry: price it once
+    years = days_to_expiry / DAYS_PER_YEAR
+    stop_years = np.maximum(years - days_to_stop / DAYS_PER_YEAR, 0.0)
+    at_stop = black_scholes(stop, strike, stop_years, np.maximum(iv + iv_shift, 0.0),
+                            is_call, rate, div_yield)["price"]
+
+    def drawdown(distance: np.ndarray) -> np.ndarray:
+        premium = black_scholes(stop + sign * distance, strike, years, iv, is_call, rate, div_yield)["price"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 1.0 - at_stop / premium
+
+    # Bracket: grow the upper distance until the cap is exceeded (puts are
+    # bounded by an entry near 0, calls are not)
+    lo = np.zeros(stop.shape)
+    hi = np.maximum(stop * 0.01, 1e-4)
+    limit = np.where(is_call, np.inf, stop * (1.0 - 1e-9))
+    feasible = drawdown(lo) <= pct_cap
+    for _ in range(64):
+        hi = np.minimum(hi, limit)
+        grow = feasible & (drawdown(hi) <= pct_cap) & (hi < limit)
+        if not grow.any():
+            break
+        lo = np.where(grow, hi, lo)
+        hi = np.where(grow, hi * 2.0, hi)
+    # The bracket never exceeded the cap: there is no threshold
+    unbounded = feasible & (drawdown(hi) <= pct_cap)
+
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        ok = drawdown(mid) <= pct_cap
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid)
+
+    threshold = np.where(unbounded, sign * np.inf, stop + sign * lo)
+    return np.where(feasible, threshold, np.nan)
+
+
+def size_chain(chain: pd.DataFrame,
+               sizing: SizingInput,
+               iv_shift: float = 0.0,
+               days_to_stop: float = 0.0,
+               rate: float = 0.0,
+               div_yield: float = 0.0,
+               premium_col: Optional[str] = None) -> pd.DataFrame:
+    """
+    Size every contract of an option chain with full repricing at the stop.
+
+    Args:
+        chain: One row per contract with strike, iv, days_to_expiry and
+            optionally type ("call"/"put"; rows of the other type than
+            sizing.direction are left out) and a quoted premium column
+        sizing: Account, risk, direction, entry zone, stop,
+            pct_drawdown_cap and max_premium_per_contract (delta and buffer
+            are not used)
+        iv_shift: IV change expected by the stop-out
+        days_to_stop: Expected calendar days until the stop-out
+        rate: Risk-free rate
+        div_yield: Dividend yield
+        premium_col: Column with the premium to pay (e.g. "ask"); None
+            prices the entry with the model
+
+    Returns:
+        The chain's rows (same index) with entry_premium, stop_premium,
+        per_contract_loss_at_stop, pct_drawdown_at_stop (percent), greeks
+        at entry and stop, raw_contracts, contracts, risk_used, exposure
+        (share-equivalent delta), position_cost, min_entry_premium_for_cap,
+        meets_pct_cap, max/min_underlying_entry_for_cap, affordable,
+        within_buying_power (position_cost <= account_size) and eligible
+        (>= 1 contract, cap met, affordable, within buying power)
+
+    Raises:
+        ValueError: Same checks as size_contracts for the risk and the entry
+            zone / stop, or missing chain columns
+    """
+    missing = {"strike", "iv", "days_to_expiry"} - set(chain.columns)
+    if missing:
+        raise ValueError(ERR_CHAIN_COLUMNS)
+    dollar_risk = compute_dollar_risk(sizing)
+    per_share_risk(sizing)
+    cap = sizing.pct_drawdown_cap
+    if cap is not None and cap <= 0:
+        raise ValueError("pct_drawdown_cap must be > 0 (e.g., 0.10 for 10%).")
+
+    direction = sizing.direction.lower()
+    is_call = direction == "call"
+    if "type" in chain.columns:
+        chain = chain[chain["type"].astype(str).str.lower().to_numpy() == direction]
+    worst_entry = sizing.entry_high if is_call else sizing.entry_low
+
+    strike = chain["strike"].to_numpy(dtype=float)
+    days = chain["days_to_expiry"].to_numpy(dtype=float)
+    iv = chain["iv"].to_numpy(dtype=float)
+    quoted = chain[premium_col].to_numpy(dtype=float) if premium_col else None
+
+    priced = reprice_at_stop(is_call, worst_entry, sizing.stop, strike, days, iv,
+                             iv_shift, days_to_stop, rate, div_yield, entry_premium=quoted)
+    loss = priced["loss_per_contract"]
+    premium = priced["entry_premium"]
+
+    sizeable = loss >= MIN_LOSS_PER_CONTRACT
+    raw = np.where(sizeable, dollar_risk / np.where(sizeable, loss, 1.0), np.nan)
+    contracts = np.floor(np.nan_to_num(raw)).astype(np.int64)
+
+    out = chain.copy()
+    out["entry_premium"] = premium
+    out["stop_premium"] = priced["stop_premium"]
+    out["per_contract_loss_at_stop"] = loss
+    out["pct_drawdown_at_stop"] = priced["pct_drawdown_at_stop"] * 100.0
+    for greek in ("delta", "gamma", "vega", "theta"):
+        out[greek] = priced[greek]
+        out[f"stop_{greek}"] = priced[f"stop_{greek}"]
+    out["dollar_risk"] = dollar_risk
+    out["raw_contracts"] = raw
+    out["contracts"] = contracts
+    out["risk_used"] = contracts * loss
+    out["exposure"] = contracts * np.abs(priced["delta"]) * 100.0
+    out["position_cost"] = contracts * premium * 100.0
+
+    meets = np.ones(len(out), dtype=bool)
+    if cap is not None:
+        out["min_entry_premium_for_cap"] = loss / (cap * 100.0)
+        meets = priced["pct_drawdown_at_stop"] <= cap
+        threshold = entry_threshold_for_cap_bs(is_call, sizing.stop, cap, strike, days, iv,
+                                               iv_shift, days_to_stop, rate, div_yield)
+        out["max_underlying_entry_for_cap" if is_call else "min_underlying_entry_for_cap"] = threshold
+    out["meets_pct_cap"] = meets
+
+    affordable = np.ones(len(out), dtype=bool)
+    if sizing.max_premium_per_contract is not None:
+        affordable = premium <= sizing.max_premium_per_contract
+    out["affordable"] = affordable
+    # Risk sizing alone would buy more premium than the account holds when
+    # the loss at the stop is a small part of the premium
+    within_buying_power = out["position_cost"].to_numpy() <= sizing.account_size
+    out["within_buying_power"] = within_buying_power
+    out["eligible"] = (contracts >= 1) & meets & affordable & within_buying_power
+    return out
+
+
+def pick_contract(sized: pd.DataFrame,
+                  target_delta: Optional[float] = None,
+                  min_premium: float = 0.05,
+                  min_abs_delta: float = 0.0) -> Optional[pd.Series]:
+    """
+    Best eligible row of a size_chain result.
+
+    Without target_delta: the contract whose sized position carries the
+    most exposure (contracts * |delta| * 100 shares) for the same dollar
+    risk, then the most risk used. With target_delta: the contract whose
+    |delta| is closest to it, then the most risk used.
+
+    Args:
+        sized: size_chain output
+        target_delta: Preferred |delta| at entry, or None
+        min_premium: Skip contracts cheaper than this per share (untradeable
+            far OTM strikes otherwise size into thousands of contracts)
+        min_abs_delta: Skip contracts with a smaller |delta| at entry
+
+    Returns:
+        The chosen row, or None if no contract is eligible
+    """
+    keep = (sized["eligible"].to_numpy()
+            & (sized["entry_premium"].to_numpy() >= min_premium)
+            & (np.abs(sized["delta"].to_numpy()) >= min_abs_delta))
+    eligible = sized[keep]
+    if eligible.empty:
+        return None
+    risk_used = eligible["risk_used"].to_numpy()
+    if target_delta is None:
+        order = np.lexsort((-risk_used, -eligible["exposure"].to_numpy()))
+    else:
+        distance = np.abs(np.abs(eligible["delta"].to_numpy()) - abs(target_delta))
+        order = np.lexsort((-risk_used, distance))
+    return eligible.iloc[order[0]]
+
+
+def size_contracts_bs(sizing: SizingInput,
+                      strike: float,
+                      days_to_expiry: float,
+                      iv: float,
+                      **kwargs) -> Dict:
+    """
+    size_contracts for a single contract in repricing mode (a one-row
+    size_chain). kwargs: iv_shift, days_to_stop, rate, div_yield.
+    """
+    chain = pd.DataFrame({"strike": [strike], "days_to_expiry": [days_to_expiry], "iv": [iv]})
+    row = size_chain(chain, sizing, **kwargs).iloc[0]
+    return {k: (v.item() if hasattr(v, "item") else v) for k, v in row.items()}
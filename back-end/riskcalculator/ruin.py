@@ -0,0 +1,357 @@
+"""
+Monte Carlo risk of ruin for an option sizing policy
+
+size_contracts answers "how many contracts for THIS trade". This module
+answers "what does risk_pct / pct_drawdown_cap do to the account over the
+next N trades": it bootstraps (or draws) R-multiples and compounds the
+account through the sizer's rules on every path:
+
+- dollar risk = account * risk_pct (or fixed_dollar_risk)
+- contracts = floor(dollar risk / per-contract loss at stop); a trade that
+  floors to 0 contracts is skipped
+- pct_drawdown_cap: a setup whose loss at the stop is more than the cap of
+  its premium is skipped (size_contracts' meets_pct_cap)
+- max_premium_per_contract: setups above it are skipped (affordability)
+- P&L = contracts * per-contract loss * R, never below -premium (a long
+  option cannot lose more than it cost)
+
+Paths are simulated as NumPy arrays, one trade step at a time over a chunk
+of paths, and chunks run on a process pool. Each chunk gets its own
+SeedSequence child, so results are identical for any worker count, and
+every policy of a comparison sees the same random draws.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+
+DRAWDOWN_PERCENTILES = (50, 90, 95, 99)
+GROWTH_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass(frozen=True)
+class RuinPolicy:
+    """
+    Sizing policy under test (the SizingInput risk fields).
+    """
+    risk_pct: Optional[float] = 0.02
+    fixed_dollar_risk: Optional[float] = None
+    pct_drawdown_cap: Optional[float] = None
+    max_premium_per_contract: Optional[float] = None
+    name: Optional[str] = None
+
+    def label(self) -> str:
+        if self.name:
+            return self.name
+        parts = [f"fixed ${self.fixed_dollar_risk:g}" if self.fixed_dollar_risk is not None
+                 else f"risk {self.risk_pct:.2%}"]
+        if self.pct_drawdown_cap is not None:
+            parts.append(f"cap {self.pct_drawdown_cap:.0%}")
+        if self.max_premium_per_contract is not None:
+            parts.append(f"max premium {self.max_premium_per_contract:g}")
+        return ", ".join(parts)
+
+    def validate(self) -> None:
+        # Same checks (and messages) as compute_dollar_risk / size_contracts
+        if self.fixed_dollar_risk is not None:
+            if self.fixed_dollar_risk <= 0:
+                raise ValueError("fixed_dollar_risk must be > 0")
+        elif self.risk_pct is None:
+            raise ValueError("Provide either fixed_dollar_risk or risk_pct.")
+        elif not (0 < self.risk_pct <= 1):
+            raise ValueError("risk_pct must be in (0, 1].")
+        if self.pct_drawdown_cap is not None and self.pct_drawdown_cap <= 0:
+            raise ValueError("pct_drawdown_cap must be > 0 (e.g., 0.10 for 10%).")
+
+
+@dataclass(frozen=True)
+class TradeModel:
+    """
+    Distribution of trade outcomes.
+
+    kind "empirical": rows of (r, per_contract_loss, premium) are
+        bootstrapped jointly (with replacement)
+    kind "normal": R ~ Normal(mean, std)
+    kind "bernoulli": R = win_r with probability win_rate, else loss_r
+
+    per_contract_loss: dollars lost per contract at the stop (the sizer's
+        per_contract_loss_at_stop); premium: entry premium per share
+        (None = not modelled: no cap / affordability check, no -premium floor)
+    """
+    kind: str
+    r: Optional[np.ndarray] = None
+    per_contract_loss: Optional[np.ndarray] = None
+    premium: Optional[np.ndarray] = None
+    mean: float = 0.0
+    std: float = 1.0
+    win_rate: float = 0.5
+    win_r: float = 1.0
+    loss_r: float = -1.0
+
+    @classmethod
+    def empirical(cls,
+                  r: Sequence[float],
+                  per_contract_loss: Sequence[float] = 100.0,
+                  premium: Optional[Sequence[float]] = None) -> "TradeModel":
+        """
+        Bootstrap from observed trades (e.g. the journal's R column, or the
+        R of backtest trades). Scalars broadcast; NaN R values are dropped.
+        """
+        r = np.asarray(r, dtype=float)
+        keep = ~np.isnan(r)
+        loss = np.broadcast_to(np.asarray(per_contract_loss, dtype=float), r.shape)[keep]
+        prem = None if premium is None else np.broadcast_to(np.asarray(premium, dtype=float), r.shape)[keep]
+        if not keep.any():
+            raise ValueError("No R-multiples to bootstrap from")
+        if (loss <= 0).any():
+            raise ValueError("Computed per-contract loss is <= 0; check inputs.")
+        return cls("empirical", r=r[keep], per_contract_loss=loss, premium=prem)
+
+    @classmethod
+    def normal(cls, mean: float, std: float, per_contract_loss: float = 100.0,
+               premium: Optional[float] = None) -> "TradeModel":
+        return cls("normal", mean=mean, std=std, per_contract_loss=np.array([per_contract_loss]),
+                   premium=None if premium is None else np.array([premium]))
+
+    @classmethod
+    def bernoulli(cls, win_rate: float, win_r: float, loss_r: float = -1.0,
+                  per_contract_loss: float = 100.0, premium: Optional[float] = None) -> "TradeModel":
+        return cls("bernoulli", win_rate=win_rate, win_r=win_r, loss_r=loss_r,
+                   per_contract_loss=np.array([per_contract_loss]),
+                   premium=None if premium is None else np.array([premium]))
+
+    def sample(self, rng: np.random.Generator, n: int):
+        """
+        One trade for each of n paths: (R, per-contract loss, premium or None).
+        """
+        if self.kind == "empirical":
+            rows = rng.integers(0, len(self.r), size=n)
+            premium = None if self.premium is None else self.premium[rows]
+            return self.r[rows], self.per_contract_loss[rows], premium
+        if self.kind == "normal":
+            r = rng.normal(self.mean, self.std, size=n)
+        elif self.kind == "bernoulli":
+            r = np.where(rng.random(n) < self.win_rate, self.win_r, self.loss_r)
+        else:
+            raise ValueError(f"Unknown trade model kind: {self.kind}")
+        loss = np.broadcast_to(self.per_contract_loss, (n,))
+        premium = None if self.premium is None else np.broadcast_to(self.premium, (n,))
+        return r, loss, premium
+
+
+def simulate_paths(policy: RuinPolicy,
+                   model: TradeModel,
+                   n_paths: int,
+                   n_trades: int,
+                   account_size: float = 5000.0,
+                   ruin_level: float = 0.5,
+                   seed=None) -> Dict[str, np.ndarray]:
+    """
+    Simulate n_paths accounts over n_trades trade opportunities.
+
+    Args:
+        policy: Sizing policy
+        model: Trade outcome distribution
+        n_paths: Number of paths
+        n_trades: Trade opportunities per path
+        account_size: Starting account
+        ruin_level: A path is ruined (and stops trading) once the account
+            falls to this fraction of the start
+        seed: Anything np.random.default_rng accepts (int, SeedSequence)
+
+    Returns:
+        Per-path arrays: final (account), max_drawdown (fraction of peak),
+        ruined (bool), ruin_trade (index, -1 if never), taken and skipped
+        (trade counts; skipped = floored to 0 contracts or blocked by the
+        cap / affordability rules)
+
+    Time: O(n_paths * n_trades)
+    """
+    policy.validate()
+    rng = np.random.default_rng(seed)
+    equity = np.full(n_paths, float(account_size))
+    peak = equity.copy()
+    trough = np.ones(n_paths)
+    alive = np.ones(n_paths, dtype=bool)
+    ruin_trade = np.full(n_paths, -1, dtype=np.int32)
+    taken = np.zeros(n_paths, dtype=np.int32)
+    skipped = np.zeros(n_paths, dtype=np.int32)
+    floor_level = ruin_level * account_size
+
+    contracts = np.empty(n_paths)
+    pnl = np.empty(n_paths)
+    for t in range(n_trades):
+        r, loss, premium = model.sample(rng, n_paths)
+
+        # Sizer: dollar risk -> floor(contracts)
+        if policy.fixed_dollar_risk is not None:
+            np.floor(policy.fixed_dollar_risk / loss, out=contracts)
+        else:
+            np.multiply(equity, policy.risk_pct, out=contracts)
+            np.floor(np.divide(contracts, loss, out=contracts), out=contracts)
+        trade = alive & (contracts >= 1)
+        if premium is not None:
+            notional = premium * 100.0
+            if policy.pct_drawdown_cap is not None:
+                trade &= loss <= policy.pct_drawdown_cap * notional
+            if policy.max_premium_per_contract is not None:
+                trade &= premium <= policy.max_premium_per_contract
+            # A long option loses at most its premium
+            r = np.maximum(r, -notional / loss)
+
+        np.multiply(contracts, loss, out=pnl)
+        pnl *= r
+        pnl *= trade
+        equity += pnl
+        taken += trade
+        skipped += alive
+        skipped -= trade
+
+        # drawdown = 1 - equity / peak; track the smallest equity / peak
+        np.maximum(peak, equity, out=peak)
+        np.divide(equity, peak, out=pnl)
+        np.minimum(trough, pnl, out=trough)
+        if (equity <= floor_level).any():
+            ruined_now = alive & (equity <= floor_level)
+            ruin_trade[ruined_now] = t
+            alive &= ~ruined_now
+
+    return {
+        "final": equity,
+        "max_drawdown": 1.0 - trough,
+        "ruined": ~alive,
+        "ruin_trade": ruin_trade,
+        "taken": taken,
+        "skipped": skipped,
+    }
+
+
+def _run_chunk(args) -> Dict[str, np.ndarray]:
+    return simulate_paths(*args)
+
+
+def _chunk_sizes(n_paths: int, chunk_size: int) -> List[int]:
+    full, rest = divmod(n_paths, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def run_paths(policy: RuinPolicy,
+              model: TradeModel,
+              n_paths: int = 100_000,
+              n_trades: int = 250,
+              account_size: float = 5000.0,
+              ruin_level: float = 0.5,
+              seed: int = 0,
+              chunk_size: int = 50_000,
+              max_workers: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    simulate_paths over a process pool, in chunks of chunk_size paths.
+
+    Chunk i always uses SeedSequence(seed).spawn(...)[i], so the result only
+    depends on (seed, n_paths, chunk_size), not on max_workers.
+    """
+    sizes = _chunk_sizes(n_paths, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(policy, model, size, n_trades, account_size, ruin_level, s) for size, s in zip(sizes, seeds)]
+
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        parts = [_run_chunk(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            parts = list(pool.map(_run_chunk, tasks))
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def summarize_paths(paths: Dict[str, np.ndarray], account_size: float, n_trades: int) -> Dict[str, float]:
+    """
+    Probability of ruin, drawdown distribution and growth percentiles.
+
+    Growth is final / start; growth_per_trade is its geometric mean per
+    trade opportunity.
+    """
+    growth = paths["final"] / account_size
+    out = {
+        "paths": len(growth),
+        "p_ruin": float(paths["ruined"].mean()),
+        "median_trades_to_ruin": float(np.median(paths["ruin_trade"][paths["ruined"]]) + 1)
+        if paths["ruined"].any() else math.nan,
+        "p_loss": float((growth < 1.0).mean()),
+        "mean_taken": float(paths["taken"].mean()),
+        "skip_rate": float(paths["skipped"].sum() / max(1, paths["taken"].sum() + paths["skipped"].sum())),
+    }
+    for q, v in zip(DRAWDOWN_PERCENTILES, np.percentile(paths["max_drawdown"], DRAWDOWN_PERCENTILES)):
+        out[f"max_drawdown_p{q}"] = float(v)
+    for q, v in zip(GROWTH_PERCENTILES, np.percentile(growth, GROWTH_PERCENTILES)):
+        out[f"growth_p{q}"] = float(v)
+    median = np.median(growth)
+    out["growth_per_trade_median"] = float(median ** (1.0 / n_trades)) - 1.0 if median > 0 else -1.0
+    return out
+
+
+def risk_of_ruin(policy: RuinPolicy, model: TradeModel, **kwargs) -> Dict[str, float]:
+    """
+    Simulate one policy (see run_paths for kwargs) and summarize it.
+    """
+    account_size = kwargs.get("account_size", 5000.0)
+    n_trades = kwargs.get("n_trades", 250)
+    return summarize_paths(run_paths(policy, model, **kwargs), account_size, n_trades)
+
+
+def compare_policies(policies: Sequence[RuinPolicy], model: TradeModel, **kwargs) -> pd.DataFrame:
+    """
+    risk_of_ruin for several policies with the same seed, so every policy
+    is evaluated on the same trade sequences (common random numbers: the
+    differences between rows come from the policy, not from sampling noise).
+
+    Returns:
+        DataFrame indexed by policy label
+    """
+    rows = {policy.label(): risk_of_ruin(policy, model, **kwargs) for policy in policies}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Monte Carlo risk of ruin for option sizing policies.")
+    parser.add_argument("--journal", default=None, help="Trade export CSV to bootstrap R-multiples from.")
+    parser.add_argument("--win-rate", type=float, default=0.45, help="Bernoulli model win rate (no --journal).")
+    parser.add_argument("--win-r", type=float, default=1.5, help="Bernoulli model R of a win.")
+    parser.add_argument("--loss-r", type=float, default=-1.0, help="Bernoulli model R of a loss.")
+    parser.add_argument("--risk-pct", type=float, nargs="+", default=[0.01, 0.02, 0.05], help="Policies to compare.")
+    parser.add_argument("--pct-cap", type=float, default=None, help="pct_drawdown_cap for every policy.")
+    parser.add_argument("--per-contract-loss", type=float, default=44.0, help="Per-contract loss at the stop ($).")
+    parser.add_argument("--premium", type=float, default=None, help="Entry premium per share.")
+    parser.add_argument("--account", type=float, default=5000.0, help="Starting account size.")
+    parser.add_argument("--paths", type=int, default=100_000, help="Number of paths.")
+    parser.add_argument("--trades", type=int, default=250, help="Trades per path.")
+    parser.add_argument("--ruin-level", type=float, default=0.5, help="Ruin = account at or below this fraction.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPUs).")
+    args = parser.parse_args()
+
+    if args.journal:
+        from journal.analytics import load_export
+        model = TradeModel.empirical(load_export(args.journal)["R"].to_numpy(),
+                                     per_contract_loss=args.per_contract_loss, premium=args.premium)
+    else:
+        model = TradeModel.bernoulli(args.win_rate, args.win_r, args.loss_r,
+                                     per_contract_loss=args.per_contract_loss, premium=args.premium)
+
+    policies = [RuinPolicy(risk_pct=p, pct_drawdown_cap=args.pct_cap) for p in args.risk_pct]
+    start = time.perf_counter()
+    table = compare_policies(policies, model, n_paths=args.paths, n_trades=args.trades,
+                             account_size=args.account, ruin_level=args.ruin_level,
+                             seed=args.seed, max_workers=args.workers)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(table.round(4))
+    print(f"{len(policies)} policies x {args.paths} paths x {args.trades} trades "
+          f"in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,274 @@
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Callable, Tuple
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+# Aliased: `metrics` is the name of the per-symbol metric frames below
+from telemetry import metrics as telemetry
+
+from .indicators import compute_indicators
+from .providers import FetchResult, FetchStage, ScreenReport
+
+
+FUNDAMENTALS = "fundamentals"
+HISTORY = "history"
+
+# Relative cost of getting a criterion's data for one symbol. History is a
+# download of N bars plus indicator math, fundamentals are one small call
+# that is needed by every fundamentals criterion anyway.
+SOURCE_COST = {FUNDAMENTALS: 1.0, HISTORY: 10.0}
+
+# get_stock_data reads a year of daily bars
+RECORD_PERIOD = "1y"
+RECORD_BARS = 252
+
+
+def _is_set(value: Any) -> bool:
+    return value is not None
+
+
+def _is_true(value: Any) -> bool:
+    return bool(value)
+
+
+@dataclass(frozen=True)
+class Criterion:
+    """
+    A single screening predicate and the data it needs.
+
+    Attributes:
+        name: Keyword the criterion is passed as (e.g. "pe_ratio_max")
+        source: FUNDAMENTALS or HISTORY
+        metric: Column the predicate reads. For FUNDAMENTALS criteria this is
+            filled from `info_key` of the fundamentals dictionary; for HISTORY
+            criteria it is a column of compute_indicators.
+        test: (metric values, criterion value) -> boolean array of symbols
+            that pass. Metrics that are NaN should pass, matching the
+            screener's "missing data does not rule a symbol out" rule.
+        info_key: Fundamentals dictionary key (FUNDAMENTALS only)
+        bars: History bars the criterion needs (HISTORY only)
+        is_active: Whether a given value turns the criterion on
+    """
+    name: str
+    source: str
+    metric: str
+    test: Callable[[np.ndarray, Any], np.ndarray]
+    info_key: Optional[str] = None
+    bars: int = 0
+    is_active: Callable[[Any], bool] = _is_set
+
+
+CRITERIA: Dict[str, Criterion] = {}
+
+
+def register_criterion(criterion: Criterion) -> Criterion:
+    """
+    Add a criterion to the registry so it can be passed to
+    StockScreener.screen by name.
+    """
+    if criterion.source not in SOURCE_COST:
+        raise ValueError(f"Unknown criterion source: {criterion.source}")
+    if criterion.source == FUNDAMENTALS and criterion.info_key is None:
+        raise ValueError("Fundamentals criteria need an info_key")
+    CRITERIA[criterion.name] = criterion
+    return criterion
+
+
+# NaN comparisons are False, so `~(v > t)` lets missing metrics through
+for _name, _metric, _key in [("pe_ratio", "pe_ratio", "trailingPE"),
+                             ("debt_to_equity", "debt_to_equity", "debtToEquity")]:
+    register_criterion(Criterion(f"{_name}_max", FUNDAMENTALS, _metric,
+                                 lambda v, t: ~(v > t), info_key=_key))
+    register_criterion(Criterion(f"{_name}_min", FUNDAMENTALS, _metric,
+                                 lambda v, t: ~(v < t), info_key=_key))
+
+# RSI(14) needs 15 closes; the SMA checks need the full 200 bars
+register_criterion(Criterion("rsi_threshold_upper", HISTORY, "rsi",
+                             lambda v, t: ~(v > t), bars=15))
+register_criterion(Criterion("rsi_threshold_lower", HISTORY, "rsi",
+                             lambda v, t: ~(v < t), bars=15))
+register_criterion(Criterion("sma_200_above", HISTORY, "price_vs_sma_200",
+                             lambda v, t: ~(v <= 0), bars=200, is_active=_is_true))
+register_criterion(Criterion("sma_200_below", HISTORY, "price_vs_sma_200",
+                             lambda v, t: ~(v >= 0), bars=200, is_active=_is_true))
+
+
+@dataclass
+class CriterionReport:
+    """
+    How one criterion behaved during a screen.
+    """
+    name: str
+    source: str
+    evaluated: int
+    passed: int
+    seconds: float
+
+    @property
+    def selectivity(self) -> float:
+        """
+        Fraction of evaluated symbols that passed (lower = more selective).
+        """
+        return self.passed / self.evaluated if self.evaluated else 1.0
+
+
+def bars_to_period(bars: int) -> str:
+    """
+    Smallest yfinance period that covers `bars` daily bars
+    (252 trading days per 365 calendar days, plus slack for holidays).
+    """
+    return f"{math.ceil(bars * 365 / 252) + 10}d"
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class ScreenPlanner:
+    """
+    Runs a set of active criteria over a universe as cheaply as possible:
+
+    1. Fundamentals criteria run first over the whole universe (one info call
+       per symbol), most selective first.
+    2. History is fetched only for the survivors, and only as many bars as
+       the active HISTORY criteria need.
+    3. History criteria then run over the survivors, most selective first.
+
+    Selectivity is learned from previous runs of the same planner (pass
+    rates start at 0.5), so the order adapts to the universe being screened.
+    """
+
+    def __init__(self, fetcher: FetchStage, registry: Optional[Dict[str, Criterion]] = None):
+        self.fetcher = fetcher
+        self.registry = registry if registry is not None else CRITERIA
+        self.pass_rates: Dict[str, float] = {}
+
+    def plan(self, criteria: Dict[str, Any]) -> List[Tuple[Criterion, Any]]:
+        """
+        Resolve criteria values against the registry and order them
+        by (data cost, expected pass rate).
+
+        Raises:
+            ValueError: For a criterion name that is not registered
+        """
+        unknown = [name for name in criteria if name not in self.registry]
+        if unknown:
+            raise ValueError(f"Unknown screening criteria: {unknown}")
+
+        active = [(self.registry[name], value) for name, value in criteria.items()
+                  if self.registry[name].is_active(value)]
+        return sorted(active, key=lambda cv: (SOURCE_COST[cv[0].source],
+                                              self.pass_rates.get(cv[0].name, 0.5)))
+
+    def _apply(self, plan, metrics: pd.DataFrame, keep: np.ndarray,
+               report: ScreenReport) -> np.ndarray:
+        for criterion, value in plan:
+            start = time.perf_counter()
+            evaluated = int(keep.sum())
+            keep = keep & criterion.test(metrics[criterion.metric].to_numpy(), value)
+            passed = int(keep.sum())
+            report.criteria.append(CriterionReport(
+                name=criterion.name,
+                source=criterion.source,
+                evaluated=evaluated,
+                passed=passed,
+                seconds=time.perf_counter() - start,
+            ))
+            rate = passed / evaluated if evaluated else 0.5
+            previous = self.pass_rates.get(criterion.name, rate)
+            self.pass_rates[criterion.name] = 0.5 * previous + 0.5 * rate
+        return keep
+
+    def run(self, symbols: List[str], criteria: Dict[str, Any]) -> Tuple[List[str], ScreenReport]:
+        """
+        Screen `symbols` against `criteria` (name -> value).
+
+        Returns:
+            (matching symbols, report with per-criterion selectivity and timing)
+        """
+        matches, report, _ = self.run_with_data(symbols, criteria, for_records=False)
+        return matches, report
+
+    def run_with_data(self,
+                      symbols: List[str],
+                      criteria: Dict[str, Any],
+                      for_records: bool = True,
+                      record: bool = True) -> Tuple[List[str], ScreenReport, FetchResult]:
+        """
+        run(), also returning the data fetched along the way.
+
+        Args:
+            symbols: Universe to screen
+            criteria: Criterion name -> value
+            for_records: Fetch history at least RECORD_PERIOD deep, so
+                StockScreener.get_stocks_data can build the matches' records
+                from it without downloading the same history again
+            record: Publish the report to the metrics registry. Pass False
+                when `symbols` is one chunk of a larger screen and record
+                the combined report instead
+
+        Returns:
+            (matching symbols, report, FetchResult with the info and history
+            fetched for the symbols that reached each stage)
+        """
+        plan = self.plan(criteria)
+        fundamentals_plan = [cv for cv in plan if cv[0].source == FUNDAMENTALS]
+        history_plan = [cv for cv in plan if cv[0].source == HISTORY]
+
+        symbols = list(dict.fromkeys(symbols))
+        report = ScreenReport(symbols=len(symbols), matches=0,
+                              fetch_seconds=0.0, compute_seconds=0.0)
+        data = FetchResult()
+
+        # Stage 1: fundamentals over the whole universe
+        if fundamentals_plan:
+            fetched = self.fetcher.fetch(symbols, include_info=True, include_history=False)
+            data.info = fetched.info
+            report.errors.update(fetched.errors)
+            report.fetch_seconds += fetched.seconds
+            report.stages["fetch_info"] = fetched.seconds
+
+            start = time.perf_counter()
+            symbols = [s for s in symbols if s in fetched.info]
+            keys = {c.metric: c.info_key for c, _ in fundamentals_plan}
+            metrics = pd.DataFrame(
+                {metric: [_to_float(fetched.info[s].get(key)) for s in symbols]
+                 for metric, key in keys.items()},
+                index=pd.Index(symbols, name="symbol"),
+            )
+            keep = self._apply(fundamentals_plan, metrics, np.ones(len(symbols), dtype=bool), report)
+            symbols = [s for s, k in zip(symbols, keep) if k]
+            report.compute_seconds += time.perf_counter() - start
+
+        # Stage 2: history only for the survivors, only as deep as needed
+        if history_plan and symbols:
+            bars = max(c.bars for c, _ in history_plan)
+            period = RECORD_PERIOD if for_records and bars <= RECORD_BARS else bars_to_period(bars)
+            fetched = self.fetcher.fetch(symbols, include_info=False, include_history=True,
+                                         period=period)
+            data.history = fetched.history
+            report.errors.update(fetched.errors)
+            report.fetch_seconds += fetched.seconds
+            report.stages["fetch_history"] = fetched.seconds
+
+            start = time.perf_counter()
+            # Symbols without price history never match a technical screen
+            symbols = [s for s in symbols
+                       if s in fetched.history and not fetched.history[s].empty]
+            metrics = compute_indicators({s: fetched.history[s] for s in symbols})
+            report.stages["indicators"] = time.perf_counter() - start
+
+            keep = self._apply(history_plan, metrics, np.ones(len(symbols), dtype=bool), report)
+            symbols = [s for s, k in zip(symbols, keep) if k]
+            report.compute_seconds += time.perf_counter() - start
+
+        report.matches = len(symbols)
+        if record:
+            telemetry.record_screen(report)
+        return symbols, report, data
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class PricePanel:
+    """
+    Closing prices for a universe packed into one 2-D array.
+
+    Rows are symbols. Columns are bar offsets, right-aligned so column -1 is
+    every symbol's latest bar. Shorter (ragged) histories are left-padded
+    with NaN and marked False in `mask`, so every rolling window is evaluated
+    over each symbol's own bars, exactly like a per-Series pandas rolling call.
+    """
+    symbols: List[str]
+    values: np.ndarray      # (S, T) float64, NaN where mask is False
+    mask: np.ndarray        # (S, T) bool
+    lengths: np.ndarray     # (S,) bars available per symbol
+
+    @classmethod
+    def from_history(cls,
+                     history: Dict[str, pd.DataFrame],
+                     column: str = "Close",
+                     max_bars: Optional[int] = None) -> "PricePanel":
+        """
+        Build a panel from symbol -> OHLC DataFrame.
+
+        Args:
+            history: Per-symbol price history
+            column: Column to pack
+            max_bars: Keep only the latest `max_bars` bars per symbol
+        """
+        symbols = list(history)
+        series = [history[s][column].to_numpy(dtype=float) for s in symbols]
+        if max_bars is not None:
+            series = [v[-max_bars:] for v in series]
+
+        lengths = np.array([len(v) for v in series], dtype=np.int64)
+        width = int(lengths.max()) if len(lengths) else 0
+
+        values = np.full((len(symbols), width), np.nan)
+        for row, v in enumerate(series):
+            if len(v):
+                values[row, width - len(v):] = v
+
+        # Missing closes inside a history are masked too
+        mask = ~np.isnan(values)
+        return cls(symbols=symbols, values=values, mask=mask, lengths=lengths)
+
+
+def rolling_mean(values: np.ndarray, mask: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling mean along axis 1 that is NaN unless all `window` values are
+    valid (pandas' default min_periods=window).
+
+    Uses cumulative sums, so the cost is O(S*T) regardless of `window`.
+    """
+    filled = np.where(mask, values, 0.0)
+    zeros = np.zeros((values.shape[0], 1))
+    csum = np.concatenate([zeros, np.cumsum(filled, axis=1)], axis=1)
+    ccount = np.concatenate([zeros, np.cumsum(mask, axis=1)], axis=1)
+
+    out = np.full(values.shape, np.nan)
+    if window > values.shape[1]:
+        return out
+
+    sums = csum[:, window:] - csum[:, :-window]
+    counts = ccount[:, window:] - ccount[:, :-window]
+    out[:, window - 1:] = np.where(counts == window, sums / window, np.nan)
+    return out
+
+
+def rsi(panel: PricePanel, period: int = 14) -> np.ndarray:
+    """
+    RSI for every symbol and bar, matching StockScreener._calculate_rsi
+    (simple rolling means of gains and losses).
+
+    Returns:
+        (S, T) array of RSI values
+    """
+    values, mask = panel.values, panel.mask
+
+    delta = np.full(values.shape, np.nan)
+    delta[:, 1:] = values[:, 1:] - values[:, :-1]
+
+    # pandas' where(delta > 0, 0) turns the leading NaN diff into a 0 gain/loss,
+    # so a bar counts towards the window whenever its close exists
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+
+    avg_gain = rolling_mean(gain, mask, period)
+    avg_loss = rolling_mean(loss, mask, period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def sma(panel: PricePanel, window: int = 200) -> np.ndarray:
+    """
+    Simple moving average for every symbol and bar.
+
+    Returns:
+        (S, T) array of SMA values
+    """
+    return rolling_mean(panel.values, panel.mask, window)
+
+
+def compute_indicators(history: Dict[str, pd.DataFrame],
+                       rsi_period: int = 14,
+                       sma_window: int = 200) -> pd.DataFrame:
+    """
+    Latest technical indicators for a whole universe in one vectorized pass.
+
+    Args:
+        history: Symbol -> OHLC DataFrame
+        rsi_period: RSI lookback
+        sma_window: SMA lookback
+
+    Returns:
+        DataFrame indexed by symbol with columns:
+        bars, current_price, rsi, sma_200, price_vs_sma_200,
+        above_sma_200, below_sma_200.
+        Indicators that cannot be computed (too little history) are NaN and
+        both SMA flags are False.
+    """
+    # Only the bars the longest window can see affect the latest values
+    panel = PricePanel.from_history(history, max_bars=max(sma_window, rsi_period + 1))
+
+    columns = ["bars", "current_price", "rsi", "sma_200", "price_vs_sma_200",
+               "above_sma_200", "below_sma_200"]
+    if not panel.symbols:
+        return pd.DataFrame(columns=columns)
+
+    if panel.values.shape[1] == 0:
+        nan = np.full(len(panel.symbols), np.nan)
+        last_close, last_rsi, last_sma = nan, nan, nan
+    else:
+        last_close = panel.values[:, -1]
+        last_rsi = rsi(panel, rsi_period)[:, -1]
+        last_sma = sma(panel, sma_window)[:, -1]
+
+    lengths = np.array([len(history[s]) for s in panel.symbols], dtype=np.int64)
+
+    return pd.DataFrame(
+        {
+            "bars": lengths,
+            "current_price": last_close,
+            "rsi": last_rsi,
+            "sma_200": last_sma,
+            "price_vs_sma_200": last_close - last_sma,
+            # NaN comparisons are False, so short histories get neither flag
+            "above_sma_200": last_close > last_sma,
+            "below_sma_200": last_close < last_sma,
+        },
+        index=pd.Index(panel.symbols, name="symbol"),
+        columns=columns,
+    )
@@ -0,0 +1,449 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Iterable
+import time
+
+import numpy as np
+import pandas as pd
+
+from telemetry import metrics
+
+
+OHLC_COLUMNS = ["Open", "High", "Low", "Close"]
+
+
+class DataProvider(ABC):
+    """
+    Source of the fundamentals and price history the screener works on.
+
+    Implementations only need to know how to talk to one backend; batching,
+    concurrency and retries live in FetchStage.
+    """
+
+    @abstractmethod
+    def get_info(self, symbol: str) -> Dict[str, Any]:
+        """
+        Get the fundamentals dictionary for a single symbol
+        (same keys as yfinance's Ticker.info).
+        """
+
+    @abstractmethod
+    def get_history(self,
+                    symbols: List[str],
+                    period: str = "1y",
+                    start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Get daily OHLC history for a batch of symbols.
+
+        Args:
+            symbols: Symbols to download in one request
+            period: yfinance-style lookback period (e.g. "1y")
+            start: If given, fetch bars from this timestamp instead of `period`
+
+        Returns:
+            Dictionary of symbol -> DataFrame with Open/High/Low/Close columns.
+            Symbols with no data are left out.
+        """
+
+
+class YFinanceProvider(DataProvider):
+    """
+    DataProvider backed by yfinance. History for a batch of symbols is
+    downloaded with a single multi-ticker yf.download call.
+    """
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+
+    def get_info(self, symbol: str) -> Dict[str, Any]:
+        import yfinance as yf
+        return yf.Ticker(symbol).info
+
+    def get_history(self,
+                    symbols: List[str],
+                    period: str = "1y",
+                    start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        import yfinance as yf
+
+        window = {"start": start} if start is not None else {"period": period}
+        df = yf.download(
+            symbols,
+            **window,
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=True,
+            threads=False,
+            progress=False,
+            timeout=self.timeout,
+            multi_level_index=True,
+        )
+
+        history = {}
+        if df is None or df.empty:
+            return history
+
+        for symbol in symbols:
+            if symbol not in df.columns.get_level_values(0):
+                continue
+            hist = df[symbol][OHLC_COLUMNS].dropna(how="all")
+            if not hist.empty:
+                history[symbol] = hist
+        return history
+
+
+class LocalDataProvider(DataProvider):
+    """
+    In-memory DataProvider used as an offline stand-in for yfinance in tests
+    and benchmarks. It can simulate network latency and failing symbols.
+    """
+
+    def __init__(self,
+                 info: Dict[str, Dict[str, Any]],
+                 history: Dict[str, pd.DataFrame],
+                 latency: float = 0.0,
+                 failing_symbols: Optional[Iterable[str]] = None):
+        """
+        Args:
+            info: Symbol -> fundamentals dictionary
+            history: Symbol -> daily OHLC DataFrame
+            latency: Seconds each call sleeps, to mimic a network round trip
+            failing_symbols: Symbols whose calls always raise
+        """
+        self.info = info
+        self.history = history
+        self.latency = latency
+        self.failing_symbols = set(failing_symbols or [])
+        self.calls = {"info": 0, "history": 0}
+
+    @classmethod
+    def synthetic(cls,
+                  symbols: List[str],
+                  n_bars: int = 252,
+                  seed: int = 0,
+                  latency: float = 0.0,
+                  failing_symbols: Optional[Iterable[str]] = None) -> "LocalDataProvider":
+        """
+        Build a provider with random-walk prices and random fundamentals.
+
+        Args:
+            symbols: Symbols to generate
+            n_bars: Number of daily bars per symbol
+            seed: Seed for the random generator
+            latency: Simulated latency per call (seconds)
+            failing_symbols: Symbols whose calls always raise
+        """
+        rng = np.random.default_rng(seed)
+        dates = pd.bdate_range(end=pd.Timestamp("2026-01-09"), periods=n_bars)
+
+        info = {}
+        history = {}
+        for symbol in symbols:
+            start = rng.uniform(20.0, 500.0)
+            returns = rng.normal(0.0003, 0.02, size=n_bars)
+            close = start * np.exp(np.cumsum(returns))
+            open_ = close * np.exp(rng.normal(0.0, 0.005, size=n_bars))
+            high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0.0, 0.005, size=n_bars)))
+            low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0.0, 0.005, size=n_bars)))
+            history[symbol] = pd.DataFrame(
+                {"Open": open_, "High": high, "Low": low, "Close": close},
+                index=dates,
+            )
+            info[symbol] = {
+                "longName": f"{symbol} Inc.",
+                "trailingPE": float(rng.uniform(5.0, 60.0)),
+                "debtToEquity": float(rng.uniform(0.0, 250.0)),
+                "marketCap": int(rng.uniform(1e9, 2e12)),
+            }
+
+        return cls(info, history, latency=latency, failing_symbols=failing_symbols)
+
+    def _call(self, kind: str, symbols: List[str]):
+        self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        failing = self.failing_symbols.intersection(symbols)
+        if failing:
+            raise ConnectionError(f"Simulated failure for {sorted(failing)}")
+
+    def get_info(self, symbol: str) -> Dict[str, Any]:
+        self._call("info", [symbol])
+        if symbol not in self.info:
+            raise KeyError(f"No fundamentals for {symbol}")
+        return dict(self.info[symbol])
+
+    def get_history(self,
+                    symbols: List[str],
+                    period: str = "1y",
+                    start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        self._call("history", symbols)
+        history = {s: self.history[s] for s in symbols if s in self.history}
+        if start is not None:
+            history = {s: h[h.index >= _as_index_tz(start, h.index)] for s, h in history.items()}
+        return history
+
+
+class BarStoreProvider(DataProvider):
+    """
+    DataProvider that serves history from a local BarStore and only goes to
+    the wrapped provider for bars missing since the last stored timestamp
+    (or for keys whose TTL has expired). Fundamentals pass straight through.
+    """
+
+    def __init__(self, provider: DataProvider, store, interval: str = "1d"):
+        """
+        Args:
+            provider: Network provider used to fill the store
+            store: marketdata.barstore.BarStore
+            interval: Bar interval stored for screening
+        """
+        self.provider = provider
+        self.store = store
+        self.interval = interval
+
+    def get_info(self, symbol: str) -> Dict[str, Any]:
+        return self.provider.get_info(symbol)
+
+    def get_history(self,
+                    symbols: List[str],
+                    period: str = "1y",
+                    start: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        stale = [s for s in symbols if not self.store.is_fresh(s, self.interval)]
+        new = [s for s in stale if self.store.last_timestamp(s, self.interval) is None]
+        known = [s for s in stale if s not in new]
+
+        # One batched request per group: first-time symbols get the full
+        # period, known ones only the bars since the oldest stored timestamp
+        fetched = {}
+        if new:
+            fetched.update(self.provider.get_history(new, period=period))
+        if known:
+            since = min(self.store.last_timestamp(s, self.interval) for s in known)
+            fetched.update(self.provider.get_history(known, period=period, start=since))
+        for symbol in stale:
+            bars = fetched.get(symbol)
+            if bars is not None and not bars.empty:
+                self.store.append(symbol, self.interval, bars)
+            elif symbol in known:
+                # Checked but nothing came back: restart the TTL anyway so
+                # the symbol is not refetched on every call
+                self.store.mark_refreshed(symbol, self.interval)
+
+        read_start = start if start is not None else period_start(period)
+        history = {}
+        for symbol in symbols:
+            try:
+                hist = self.store.read(symbol, self.interval, start=read_start)
+            except KeyError:
+                continue
+            if not hist.empty:
+                history[symbol] = hist
+        return history
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+    """
+    Convert a yfinance-style period ("5d", "6mo", "1y", "max") into the
+    UTC timestamp it starts at.
+    """
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    units = {"y": "years", "mo": "months", "wk": "weeks", "d": "days"}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return now - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    return None
+
+
+def _as_index_tz(ts: pd.Timestamp, index: pd.DatetimeIndex) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    if index.tz is None:
+        return ts.tz_localize(None) if ts.tz is not None else ts
+    return ts.tz_localize(index.tz) if ts.tz is None else ts.tz_convert(index.tz)
+
+
+@dataclass
+class FetchResult:
+    """
+    Output of a FetchStage run. Every requested symbol ends up either in the
+    data dictionaries or in errors, never both.
+    """
+    info: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    history: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+@dataclass
+class ScreenReport:
+    """
+    Timing summary for one StockScreener.screen call.
+
+    `stages` breaks the time down by stage (fetch_info, fetch_history,
+    indicators) and `criteria` holds one CriterionReport per criterion
+    that ran, in execution order.
+    """
+    symbols: int
+    matches: int
+    fetch_seconds: float
+    compute_seconds: float
+    errors: Dict[str, str] = field(default_factory=dict)
+    stages: Dict[str, float] = field(default_factory=dict)
+    criteria: List[Any] = field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        return self.fetch_seconds + self.compute_seconds
+
+    @classmethod
+    def combine(cls, reports: List["ScreenReport"]) -> "ScreenReport":
+        """
+        One report for a screen that ran in chunks: counts, times and
+        stages are summed, errors merged and criteria concatenated.
+        """
+        out = cls(symbols=0, matches=0, fetch_seconds=0.0, compute_seconds=0.0)
+        for report in reports:
+            out.symbols += report.symbols
+            out.matches += report.matches
+            out.fetch_seconds += report.fetch_seconds
+            out.compute_seconds += report.compute_seconds
+            out.errors.update(report.errors)
+            for name, seconds in report.stages.items():
+                out.stages[name] = out.stages.get(name, 0.0) + seconds
+            out.criteria.extend(report.criteria)
+        return out
+
+    def __str__(self) -> str:
+        lines = [f"Screened {self.symbols} symbols -> {self.matches} matches "
+                 f"(fetch {self.fetch_seconds:.3f}s, compute {self.compute_seconds:.3f}s, "
+                 f"{len(self.errors)} errors)"]
+        for c in self.criteria:
+            lines.append(f"  {c.name:<22} {c.source:<12} {c.passed:>6}/{c.evaluated:<6} "
+                         f"({c.selectivity:6.1%}) {c.seconds * 1000:8.3f}ms")
+        return "\n".join(lines)
+
+
+class FetchStage:
+    """
+    Fetches fundamentals and history for a universe of symbols.
+
+    - History is requested in multi-ticker batches of `batch_size`.
+    - Fundamentals are requested one symbol per call on a thread pool
+      bounded by `max_workers`.
+    - Every call is retried up to `max_retries` times with exponential backoff.
+    - A batch that keeps failing is split into single-symbol requests so one
+      bad ticker cannot take the rest of its batch down with it.
+    """
+
+    def __init__(self,
+                 provider: Optional[DataProvider] = None,
+                 max_workers: int = 8,
+                 batch_size: int = 50,
+                 max_retries: int = 2,
+                 backoff: float = 0.5):
+        """
+        Args:
+            provider: Data source. Defaults to YFinanceProvider.
+            max_workers: Maximum concurrent provider calls
+            batch_size: Symbols per history request
+            max_retries: Retries per call after the first attempt
+            backoff: Initial retry delay in seconds (doubles on each retry)
+        """
+        self.provider = provider or YFinanceProvider()
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+
+    def _with_retries(self, kind: str, fn, *args):
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                result = fn(*args)
+            except Exception:
+                metrics.FETCH_SECONDS.observe(time.perf_counter() - start, kind=kind)
+                if attempt == self.max_retries:
+                    metrics.FETCH_FAILURES.inc(kind=kind)
+                    raise
+                metrics.FETCH_RETRIES.inc(kind=kind)
+                if delay:
+                    time.sleep(delay)
+                delay *= 2
+            else:
+                metrics.FETCH_SECONDS.observe(time.perf_counter() - start, kind=kind)
+                return result
+
+    def _fetch_info(self, symbol: str):
+        try:
+            return symbol, self._with_retries("info", self.provider.get_info, symbol), None
+        except Exception as e:
+            return symbol, None, str(e)
+
+    def _fetch_history_batch(self, batch: List[str], period: str):
+        try:
+            history = self._with_retries("history", self.provider.get_history, batch, period)
+        except Exception as e:
+            if len(batch) == 1:
+                return {}, {batch[0]: str(e)}
+            # Isolate the failing symbol(s) by retrying one at a time
+            history, errors = {}, {}
+            for symbol in batch:
+                h, err = self._fetch_history_batch([symbol], period)
+                history.update(h)
+                errors.update(err)
+            return history, errors
+
+        errors = {s: "No price history returned" for s in batch if s not in history}
+        return history, errors
+
+    def fetch(self,
+              symbols: List[str],
+              include_info: bool = True,
+              include_history: bool = True,
+              period: str = "1y") -> FetchResult:
+        """
+        Fetch data for all symbols.
+
+        Args:
+            symbols: Symbols to fetch
+            include_info: Whether to fetch fundamentals
+            include_history: Whether to fetch price history
+            period: History lookback period
+
+        Returns:
+            FetchResult with per-symbol data and per-symbol errors
+        """
+        start = time.perf_counter()
+        result = FetchResult()
+        batches = [symbols[i:i + self.batch_size]
+                   for i in range(0, len(symbols), self.batch_size)]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            info_futures = []
+            history_futures = []
+            if include_info:
+                info_futures = [pool.submit(self._fetch_info, s) for s in symbols]
+            if include_history:
+                history_futures = [pool.submit(self._fetch_history_batch, b, period)
+                                   for b in batches]
+
+            for future in info_futures:
+                symbol, info, error = future.result()
+                if error is not None:
+                    result.errors[symbol] = error
+                else:
+                    result.info[symbol] = info
+
+            for future in history_futures:
+                history, errors = future.result()
+                result.history.update(history)
+                for symbol, error in errors.items():
+                    result.errors.setdefault(symbol, error)
+
+        # A symbol is only usable if everything requested for it arrived
+        for symbol in result.errors:
+            result.info.pop(symbol, None)
+            result.history.pop(symbol, None)
+
+        result.seconds = time.perf_counter() - start
+        return result
@@ -1,8 +1,11 @@
 from typing import Optional, List, Dict, Any
-import yfinance as yf
 import pandas as pd
 import numpy as np
 
+from .criteria import ScreenPlanner
+from .indicators import compute_indicators
+from .providers import DataProvider, FetchResult, FetchStage, ScreenReport
+
 
 class StockScreener:
     """
@@ -10,14 +13,22 @@ class StockScreener:
     and technical indicators.
     """
     
-    def __init__(self, symbols: Optional[List[str]] = None):
+    def __init__(self,
+                 symbols: Optional[List[str]] = None,
+                 provider: Optional[DataProvider] = None,
+                 fetcher: Optional[FetchStage] = None):
         """
         Initialize the screener with a list of symbols to screen.
         
         Args:
             symbols: List of stock symbols to screen. If None, will use S&P 500.
+            provider: Data source. If None, yfinance is used.
+            fetcher: Fetch stage to use. If None, one is built around `provider`.
         """
         self.symbols = symbols or self._get_sp500_symbols()
+        self.fetcher = fetcher or FetchStage(provider)
+        self.planner = ScreenPlanner(self.fetcher)
+        self.last_report: Optional[ScreenReport] = None
     
     def _get_sp500_symbols(self) -> List[str]:
         """
@@ -35,10 +46,15 @@ class StockScreener:
                rsi_threshold_upper: Optional[float] = None,
                rsi_threshold_lower: Optional[float] = None,
                sma_200_above: Optional[bool] = None,
-               sma_200_below: Optional[bool] = None) -> List[str]:
+               sma_200_below: Optional[bool] = None,
+               **criteria: Any) -> List[str]:
         """
         Screen stocks based on the provided criteria.
         
+        Only the data the active criteria need is fetched: a screen on
+        fundamentals alone never downloads price history, and history is only
+        downloaded for symbols that pass the fundamentals criteria.
+        
         Args:
             pe_ratio_max: Maximum P/E ratio
             pe_ratio_min: Minimum P/E ratio
@@ -48,89 +64,25 @@ class StockScreener:
             rsi_threshold_lower: Lower RSI threshold (stocks above this)
             sma_200_above: Filter for stocks above 200-day SMA
             sma_200_below: Filter for stocks below 200-day SMA
+            **criteria: Any other criterion registered in screener.criteria
             
         Returns:
-            List of symbols that match the criteria
+            List of symbols that match the criteria. Timing and per-criterion
+            selectivity for the run are stored on `self.last_report`.
         """
-        matching_symbols = []
-        
-        for symbol in self.symbols:
-            try:
-                if self._meets_criteria(symbol, 
-                                      pe_ratio_max, pe_ratio_min,
-                                      debt_to_equity_max, debt_to_equity_min,
-                                      rsi_threshold_upper, rsi_threshold_lower,
-                                      sma_200_above, sma_200_below):
-                    matching_symbols.append(symbol)
-            except Exception as e:
-                # Log error and continue with next symbol
-                print(f"Error screening {symbol}: {e}")
-                continue
-        
+        criteria.update(
+            pe_ratio_max=pe_ratio_max,
+            pe_ratio_min=pe_ratio_min,
+            debt_to_equity_max=debt_to_equity_max,
+            debt_to_equity_min=debt_to_equity_min,
+            rsi_threshold_upper=rsi_threshold_upper,
+            rsi_threshold_lower=rsi_threshold_lower,
+            sma_200_above=sma_200_above,
+            sma_200_below=sma_200_below,
+        )
+        matching_symbols, self.last_report = self.planner.run(self.symbols, criteria)
         return matching_symbols
     
-    def _meets_criteria(self, symbol: str, 
-                       pe_ratio_max: Optional[float],
-                       pe_ratio_min: Optional[float],
-                       debt_to_equity_max: Optional[float],
-                       debt_to_equity_min: Optional[float],
-                       rsi_threshold_upper: Optional[float],
-                       rsi_threshold_lower: Optional[float],
-                       sma_200_above: Optional[bool],
-                       sma_200_below: Optional[bool]) -> bool:
-        """
-        Check if a symbol meets all the specified criteria.
-        """
-        ticker = yf.Ticker(symbol)
-        
-        # Get fundamental data
-        info = ticker.info
-        
-        # Check P/E ratio
-        pe_ratio = info.get('trailingPE')
-        if pe_ratio is not None:
-            if pe_ratio_max is not None and pe_ratio > pe_ratio_max:
-                return False
-            if pe_ratio_min is not None and pe_ratio < pe_ratio_min:
-                return False
-        
-        # Check debt-to-equity ratio
-        debt_to_equity = info.get('debtToEquity')
-        if debt_to_equity is not None:
-            if debt_to_equity_max is not None and debt_to_equity > debt_to_equity_max:
-                return False
-            if debt_to_equity_min is not None and debt_to_equity < debt_to_equity_min:
-                return False
-        
-        # Get historical data for technical indicators
-        hist = ticker.history(period="1y")
-        if hist.empty:
-            return False
-        
-        # Check RSI
-        if rsi_threshold_upper is not None or rsi_threshold_lower is not None:
-            rsi = self._calculate_rsi(hist['Close'])
-            current_rsi = rsi.iloc[-1] if not rsi.empty else None
-            
-            if current_rsi is not None:
-                if rsi_threshold_upper is not None and current_rsi > rsi_threshold_upper:
-                    return False
-                if rsi_threshold_lower is not None and current_rsi < rsi_threshold_lower:
-                    return False
-        
-        # Check 200-day SMA
-        if sma_200_above is not None or sma_200_below is not None:
-            if len(hist) >= 200:
-                sma_200 = hist['Close'].rolling(window=200).mean().iloc[-1]
-                current_price = hist['Close'].iloc[-1]
-                
-                if sma_200_above and current_price <= sma_200:
-                    return False
-                if sma_200_below and current_price >= sma_200:
-                    return False
-        
-        return True
-    
     def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
         """
         Calculate the Relative Strength Index (RSI).
@@ -161,10 +113,57 @@ class StockScreener:
         Returns:
             Dictionary containing stock data
         """
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        hist = ticker.history(period="1y")
+        provider = self.fetcher.provider
+        info = provider.get_info(symbol)
+        hist = provider.get_history([symbol], period="1y").get(symbol, pd.DataFrame())
+        
+        indicators = compute_indicators({symbol: hist}) if not hist.empty else None
+        return self._stock_data(symbol, info, hist, indicators)
+    
+    def get_stocks_data(self,
+                        symbols: List[str],
+                        fetched: Optional[FetchResult] = None) -> List[Dict[str, Any]]:
+        """
+        Batch version of get_stock_data: fetches the symbols through the
+        fetch stage and computes their indicators in one pass.
         
+        Args:
+            symbols: Stock symbols
+            fetched: Data already fetched for (some of) the symbols, e.g. by
+                ScreenPlanner.run_with_data; only what is missing from it is
+                fetched. Its history must be at least a year deep.
+            
+        Returns:
+            One get_stock_data dictionary per symbol, in input order.
+            Symbols whose data could not be fetched are left out.
+        """
+        if not symbols:
+            return []
+        symbols = list(dict.fromkeys(symbols))
+        info = dict(fetched.info) if fetched is not None else {}
+        history = dict(fetched.history) if fetched is not None else {}
+
+        need_info = [s for s in symbols if s not in info]
+        need_history = [s for s in symbols if s not in history]
+        if need_info or need_history:
+            if fetched is None:
+                missing = self.fetcher.fetch(symbols)
+            else:
+                missing = FetchResult()
+                if need_info:
+                    missing.info = self.fetcher.fetch(need_info, include_history=False).info
+                if need_history:
+                    missing.history = self.fetcher.fetch(need_history, include_info=False).history
+            info.update(missing.info)
+            history.update(missing.history)
+
+        history = {s: history[s] for s in symbols if s in history and not history[s].empty}
+        indicators = compute_indicators(history)
+        return [self._stock_data(s, info[s], history.get(s, pd.DataFrame()), indicators)
+                for s in symbols if s in info]
+    
+    def _stock_data(self, symbol: str, info: Dict[str, Any], hist: pd.DataFrame,
+                    indicators: Optional[pd.DataFrame]) -> Dict[str, Any]:
         data = {
             'symbol': symbol,
             'company_name': info.get('longName', 'N/A'),
@@ -175,7 +174,8 @@ class StockScreener:
         }
         
         if not hist.empty and len(hist) >= 200:
-            data['sma_200'] = hist['Close'].rolling(window=200).mean().iloc[-1]
-            data['rsi'] = self._calculate_rsi(hist['Close']).iloc[-1]
+            row = indicators.loc[symbol]
+            data['sma_200'] = row['sma_200']
+            data['rsi'] = row['rsi']
         
         return data
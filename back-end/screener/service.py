@@ -0,0 +1,306 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Tuple, Hashable, AsyncIterator
+import asyncio
+import base64
+import contextvars
+import functools
+import hashlib
+import json
+import math
+import time
+
+from telemetry import metrics, profiler
+
+from .criteria import CRITERIA
+from .providers import ScreenReport
+from .screener import StockScreener
+
+
+# Largest page /screener hands out in one response
+MAX_PAGE_SIZE = 1000
+
+
+class TTLCache:
+    """
+    Small LRU cache whose entries also expire after `ttl` seconds.
+    Not thread-safe; ScreenerService only touches it from the event loop.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0, name: str = "default"):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            metrics.CACHE_REQUESTS.inc(cache=self.name, result="miss")
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        metrics.CACHE_REQUESTS.inc(cache=self.name, result="hit")
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def normalize_criteria(criteria: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    """
+    Canonical, hashable form of a criteria dict: inactive criteria are
+    dropped (None, or False for flag criteria), numbers become floats and
+    keys are sorted, so equivalent requests share a key.
+    """
+    items = []
+    for name, value in criteria.items():
+        criterion = CRITERIA.get(name)
+        active = criterion.is_active(value) if criterion is not None else value is not None
+        if not active:
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        items.append((name, value))
+    return tuple(sorted(items))
+
+
+def _request_id(key: Tuple[Tuple[str, Any], ...]) -> str:
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+
+
+def encode_cursor(key: Tuple[Tuple[str, Any], ...], offset: int) -> str:
+    """
+    Opaque pagination cursor: the offset of the next page, tied to the
+    normalized request it was issued for.
+    """
+    payload = json.dumps({"r": _request_id(key), "o": offset}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(key: Tuple[Tuple[str, Any], ...], cursor: str) -> int:
+    """
+    Offset stored in a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another request
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        request_id, offset = payload["r"], int(payload["o"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if request_id != _request_id(key) or offset < 0:
+        raise ValueError("Cursor does not belong to this request")
+    return offset
+
+
+def check_limit(limit: Optional[int]) -> None:
+    """
+    Raises:
+        ValueError: If a page size is given and is not in 1..MAX_PAGE_SIZE
+            (0 would return the same cursor forever)
+    """
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+
+def _json_safe(data: Dict[str, Any]) -> Dict[str, Any]:
+    # NaN/inf are not valid JSON; numpy scalars become plain Python numbers
+    out = {}
+    for k, v in data.items():
+        if hasattr(v, "item"):
+            v = v.item()
+        if isinstance(v, float) and not math.isfinite(v):
+            v = None
+        out[k] = v
+    return out
+
+
+class ScreenerService:
+    """
+    Runs StockScreener screens for async callers without blocking the event loop.
+
+    - Screens run on a bounded thread pool.
+    - Identical requests that arrive while a screen is in flight await the
+      same future instead of starting their own screen.
+    - Finished results are cached per normalized request for `ttl` seconds.
+    """
+
+    def __init__(self,
+                 screener: Optional[StockScreener] = None,
+                 max_workers: int = 4,
+                 cache_size: int = 256,
+                 ttl: float = 300.0):
+        self.screener = screener or StockScreener()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="screener")
+        self.cache = TTLCache(maxsize=cache_size, ttl=ttl, name="screener")
+        # (symbols, get_stock_data records) of streamed screens, so a cached
+        # replay does not fetch the matches again
+        self.records = TTLCache(maxsize=cache_size, ttl=ttl, name="screener_records")
+        self._inflight: Dict[Hashable, "asyncio.Future"] = {}
+        self.screens_run = 0
+        self.coalesced = 0
+
+    def _run(self, criteria: Dict[str, Any]) -> Tuple[List[str], ScreenReport]:
+        self.screens_run += 1
+        with profiler.worker_thread():
+            return self.screener.planner.run(self.screener.symbols, criteria)
+
+    def _submit(self, fn, *args) -> "asyncio.Future":
+        # run_in_executor does not carry contextvars over to the pool thread;
+        # copying the context lets stage timings and the request profiler
+        # follow the work
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, functools.partial(contextvars.copy_context().run, fn, *args))
+
+    async def _compute(self, key: Tuple[Tuple[str, Any], ...]) -> List[str]:
+        try:
+            symbols, _ = await self._submit(self._run, dict(key))
+        finally:
+            self._inflight.pop(key, None)
+        self.cache.set(key, symbols)
+        return symbols
+
+    async def screen(self, criteria: Dict[str, Any]) -> List[str]:
+        """
+        Screen with the given criteria (name -> value).
+
+        Returns:
+            Matching symbols
+        """
+        key = normalize_criteria(criteria)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+            metrics.COALESCED.inc()
+
+        # shield: one caller going away must not cancel the others' screen
+        return list(await asyncio.shield(task))
+
+    async def page(self,
+                   criteria: Dict[str, Any],
+                   limit: Optional[int] = None,
+                   cursor: Optional[str] = None) -> Tuple[List[str], int, Optional[str]]:
+        """
+        One page of a screen's results. The full result is computed (or read
+        from the cache) once; cursors just walk through it.
+
+        Args:
+            criteria: Criterion name -> value
+            limit: Page size (None = everything after the cursor)
+            cursor: Cursor returned with the previous page
+
+        Returns:
+            (symbols on this page, total matches, cursor for the next page or None)
+
+        Raises:
+            ValueError: Invalid limit or cursor
+        """
+        check_limit(limit)
+        key = normalize_criteria(criteria)
+        offset = decode_cursor(key, cursor) if cursor else 0
+        symbols = await self.screen(criteria)
+
+        end = len(symbols) if limit is None else offset + limit
+        next_cursor = encode_cursor(key, end) if end < len(symbols) else None
+        return symbols[offset:end], len(symbols), next_cursor
+
+    def _run_chunk(self, chunk: List[str], criteria: Dict[str, Any]):
+        # Records are built from the data the planner fetched for the screen
+        matches, report, fetched = self.screener.planner.run_with_data(chunk, criteria, record=False)
+        return matches, self.screener.get_stocks_data(matches, fetched=fetched), report
+
+    async def stream(self,
+                     criteria: Dict[str, Any],
+                     chunk_size: int = 25) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Screen the universe in chunks on the worker pool and yield events as
+        soon as each chunk finishes:
+
+        - {"type": "match", "symbol": ..., <get_stock_data fields>}
+        - {"type": "progress", "evaluated": n, "total": N, "matches": m}
+        - {"type": "summary", "total_matches": m, "symbols": [...], "errors": k, "seconds": t}
+
+        A cached result is replayed as match events without screening again.
+        """
+        start = time.perf_counter()
+        key = normalize_criteria(criteria)
+        universe = list(dict.fromkeys(self.screener.symbols))
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            entry = self.records.get(key)
+            # Only valid for the same result (screen() may have refreshed it)
+            if entry is not None and entry[0] == tuple(cached):
+                records = entry[1]
+            else:
+                records = await self._submit(self.screener.get_stocks_data, cached)
+                self.records.set(key, (tuple(cached), records))
+            for data in records:
+                yield {"type": "match", **_json_safe(data)}
+            yield {"type": "summary", "total_matches": len(cached), "symbols": list(cached),
+                   "errors": 0, "seconds": time.perf_counter() - start}
+            return
+
+        chunks = [universe[i:i + chunk_size] for i in range(0, len(universe), chunk_size)]
+        futures = {self._submit(self._run_chunk, chunk, dict(key)): len(chunk)
+                   for chunk in chunks}
+        matched = set()
+        records = {}
+        reports = []
+        evaluated = 0
+        errors = 0
+        try:
+            for future in asyncio.as_completed(futures):
+                matches, data, report = await future
+                reports.append(report)
+                evaluated += report.symbols
+                errors += len(report.errors)
+                matched.update(matches)
+                for row in data:
+                    records[row["symbol"]] = row
+                    yield {"type": "match", **_json_safe(row)}
+                yield {"type": "progress", "evaluated": evaluated, "total": len(universe),
+                       "matches": len(matched)}
+        finally:
+            # Client went away: drop chunks that have not started yet
+            for future in futures:
+                future.cancel()
+            # One screen, however many chunks it ran in
+            if reports:
+                metrics.record_screen(ScreenReport.combine(reports))
+
+        # Keep the universe order for the cached / paginated result
+        symbols = [s for s in universe if s in matched]
+        self.cache.set(key, symbols)
+        self.records.set(key, (tuple(symbols), [records[s] for s in symbols if s in records]))
+        yield {"type": "summary", "total_matches": len(symbols), "symbols": symbols,
+               "errors": errors, "seconds": time.perf_counter() - start}
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,434 @@
+"""
+Materialized screen snapshots.
+
+A live screen fetches fundamentals and history and recomputes RSI / SMA-200
+for every request, although those values change at most once per bar. A
+snapshot evaluates every metric the screener exposes for the whole universe
+once, stores it column by column (one NumPy array per metric), and answers
+any criteria dict with boolean masks over those arrays:
+
+- build_snapshot() runs the fetch + indicator pass (the only network step)
+- ScreenSnapshot.query() applies the registered criteria as vectorized masks,
+  with the same pass/fail rules as ScreenPlanner.run
+- SnapshotStore keeps the current snapshot in memory, rebuilds it on a
+  schedule in a background thread, writes each version to disk
+  (snapshot-<version>.npz) and swaps the new one in with a single reference
+  assignment, so readers never see a half-built snapshot
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Tuple
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from telemetry import metrics
+
+from .criteria import CRITERIA, FUNDAMENTALS, HISTORY, Criterion, _to_float, bars_to_period
+from .indicators import compute_indicators
+from .screener import StockScreener
+from .service import _json_safe, check_limit, decode_cursor, encode_cursor, normalize_criteria
+
+
+# Indicator columns stored next to the registered criteria metrics
+INDICATOR_COLUMNS = ["bars", "current_price", "rsi", "sma_200", "price_vs_sma_200"]
+# Fundamentals stored for get_stock_data-shaped records
+INFO_COLUMNS = {"pe_ratio": "trailingPE", "debt_to_equity": "debtToEquity", "market_cap": "marketCap"}
+# get_stock_data only reports sma_200 / rsi with a full 200 bars of history
+RECORD_MIN_BARS = 200
+
+SNAPSHOT_CREATED = metrics.REGISTRY.gauge(
+    "edgefinder_snapshot_created_timestamp_seconds", "Creation time of the screen snapshot being served.")
+SNAPSHOT_SYMBOLS = metrics.REGISTRY.gauge(
+    "edgefinder_snapshot_symbols", "Symbols in the screen snapshot being served.")
+SNAPSHOT_BUILDS = metrics.REGISTRY.counter(
+    "edgefinder_snapshot_builds_total", "Screen snapshot builds.", ["result"])
+
+
+def _version(created: float) -> str:
+    # Sortable, unique per microsecond
+    return time.strftime("%Y%m%dT%H%M%S", time.gmtime(created)) + f"{int(created * 1e6) % 10**6:06d}Z"
+
+
+@dataclass(frozen=True)
+class ScreenSnapshot:
+    """
+    Every screenable metric for a universe at one point in time.
+
+    Attributes:
+        version: Sortable version string (UTC creation time)
+        created: Creation time (epoch seconds)
+        symbols: (S,) symbols, in universe order
+        names: (S,) company names ("N/A" when unknown)
+        columns: Metric name -> (S,) float64 array (NaN = missing)
+        has_info: (S,) fundamentals were fetched
+        has_history: (S,) price history was fetched and is not empty
+        errors: Symbol -> fetch error
+    """
+    version: str
+    created: float
+    symbols: np.ndarray
+    names: np.ndarray
+    columns: Dict[str, np.ndarray]
+    has_info: np.ndarray
+    has_history: np.ndarray
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def age(self, now: Optional[float] = None) -> float:
+        """
+        Seconds since the snapshot was built.
+        """
+        return (time.time() if now is None else now) - self.created
+
+    def missing_columns(self,
+                        criteria: Optional[Dict[str, Any]] = None,
+                        registry: Optional[Dict[str, Criterion]] = None) -> List[str]:
+        """
+        Metric columns the snapshot does not have: those of the active
+        `criteria`, or (criteria None) those of every registered criterion
+        plus the record fields. Non-empty for a snapshot built before a
+        criterion was registered.
+        """
+        registry = registry if registry is not None else CRITERIA
+        if criteria is None:
+            needed = list(INFO_COLUMNS) + INDICATOR_COLUMNS + [c.metric for c in registry.values()]
+        else:
+            needed = [registry[name].metric for name, value in criteria.items()
+                      if name in registry and registry[name].is_active(value)]
+        return sorted({metric for metric in needed if metric not in self.columns})
+
+    def mask(self, criteria: Dict[str, Any], registry: Optional[Dict[str, Criterion]] = None) -> np.ndarray:
+        """
+        Boolean mask of the symbols that pass every active criterion.
+
+        Same rules as ScreenPlanner.run: fundamentals criteria need the
+        symbol's fundamentals, history criteria need its price history, and
+        a NaN metric passes (the criterion tests are shared).
+
+        Raises:
+            ValueError: For a criterion name that is not registered
+        """
+        registry = registry if registry is not None else CRITERIA
+        unknown = [name for name in criteria if name not in registry]
+        if unknown:
+            raise ValueError(f"Unknown screening criteria: {unknown}")
+
+        keep = np.ones(len(self.symbols), dtype=bool)
+        sources = set()
+        for name, value in criteria.items():
+            criterion = registry[name]
+            if not criterion.is_active(value):
+                continue
+            if criterion.metric not in self.columns:
+                raise ValueError(f"Snapshot has no column {criterion.metric!r} for {name}")
+            sources.add(criterion.source)
+            keep &= criterion.test(self.columns[criterion.metric], value)
+        if FUNDAMENTALS in sources:
+            keep &= self.has_info
+        if HISTORY in sources:
+            keep &= self.has_history
+        return keep
+
+    def query(self, criteria: Dict[str, Any], registry: Optional[Dict[str, Criterion]] = None) -> List[str]:
+        """
+        Matching symbols, in universe order.
+
+        Time: O(S * active criteria), vectorized
+        """
+        return self.symbols[self.mask(criteria, registry)].tolist()
+
+    def page(self,
+             criteria: Dict[str, Any],
+             limit: Optional[int] = None,
+             cursor: Optional[str] = None) -> Tuple[List[str], int, Optional[str]]:
+        """
+        ScreenerService.page over the snapshot. Cursors are tied to the
+        snapshot version, so a page never mixes two snapshots.
+
+        Raises:
+            ValueError: Invalid limit, malformed cursor, or one issued for
+                another request or snapshot version
+        """
+        check_limit(limit)
+        key = normalize_criteria(criteria) + (("snapshot", self.version),)
+        offset = decode_cursor(key, cursor) if cursor else 0
+        symbols = self.query(criteria)
+
+        end = len(symbols) if limit is None else offset + limit
+        next_cursor = encode_cursor(key, end) if end < len(symbols) else None
+        return symbols[offset:end], len(symbols), next_cursor
+
+    def records(self, symbols: List[str]) -> List[Dict[str, Any]]:
+        """
+        get_stock_data dictionaries for `symbols`, read from the snapshot
+        (missing values are None). Symbols not in the snapshot are left out.
+
+        Columns are stored as float64, so integer fields (market_cap) are
+        cast back to int.
+        """
+        position = {s: i for i, s in enumerate(self.symbols.tolist())}
+        columns = self.columns
+        market_cap = columns["market_cap"]
+        out = []
+        for symbol in symbols:
+            i = position.get(symbol)
+            if i is None:
+                continue
+            data = {
+                "symbol": symbol,
+                "company_name": str(self.names[i]),
+                "pe_ratio": float(columns["pe_ratio"][i]),
+                "debt_to_equity": float(columns["debt_to_equity"][i]),
+                "market_cap": int(market_cap[i]) if np.isfinite(market_cap[i]) else None,
+                "current_price": float(columns["current_price"][i]),
+            }
+            if columns["bars"][i] >= RECORD_MIN_BARS:
+                data["sma_200"] = float(columns["sma_200"][i])
+                data["rsi"] = float(columns["rsi"][i])
+            out.append(_json_safe(data))
+        return out
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "created": self.created,
+            "age_seconds": self.age(),
+            "symbols": len(self.symbols),
+            "with_fundamentals": int(self.has_info.sum()),
+            "with_history": int(self.has_history.sum()),
+            "errors": len(self.errors),
+        }
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def save(self, directory: str) -> str:
+        """
+        Write the snapshot to <directory>/snapshot-<version>.npz. The file is
+        written under a temporary name and renamed, so a reader never opens
+        a partial file.
+
+        Returns:
+            Path of the written file
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"snapshot-{self.version}.npz")
+        tmp = path + ".tmp"
+        meta = {"version": self.version, "created": self.created, "errors": self.errors,
+                "columns": list(self.columns)}
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                symbols=self.symbols.astype(str),
+                names=self.names.astype(str),
+                has_info=self.has_info,
+                has_history=self.has_history,
+                **{f"col_{name}": values for name, values in self.columns.items()},
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "ScreenSnapshot":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls(
+                version=meta["version"],
+                created=float(meta["created"]),
+                symbols=data["symbols"].astype(object),
+                names=data["names"].astype(object),
+                columns={name: data[f"col_{name}"] for name in meta["columns"]},
+                has_info=data["has_info"],
+                has_history=data["has_history"],
+                errors=meta["errors"],
+            )
+
+
+def build_snapshot(screener: StockScreener,
+                   symbols: Optional[List[str]] = None,
+                   registry: Optional[Dict[str, Criterion]] = None) -> ScreenSnapshot:
+    """
+    Fetch fundamentals and history for the whole universe once and
+    evaluate every registered criterion metric plus the get_stock_data fields.
+
+    Args:
+        screener: Screener whose fetch stage (provider, retries) is used
+        symbols: Universe (default: screener.symbols)
+        registry: Criteria registry (default: CRITERIA)
+
+    Returns:
+        New ScreenSnapshot
+    """
+    registry = registry if registry is not None else CRITERIA
+    symbols = list(dict.fromkeys(symbols if symbols is not None else screener.symbols))
+    created = time.time()
+
+    # Fetched separately: a history failure must not hide the fundamentals
+    with metrics.stage("snapshot_fetch_info"):
+        info = screener.fetcher.fetch(symbols, include_info=True, include_history=False)
+    bars = max([RECORD_MIN_BARS] + [c.bars for c in registry.values() if c.source == HISTORY])
+    with metrics.stage("snapshot_fetch_history"):
+        history = screener.fetcher.fetch(symbols, include_info=False, include_history=True,
+                                         period=bars_to_period(bars))
+
+    with metrics.stage("snapshot_compute"):
+        index = {s: i for i, s in enumerate(symbols)}
+        has_info = np.array([s in info.info for s in symbols], dtype=bool)
+        frames = {s: h for s, h in history.history.items() if s in index and not h.empty}
+        has_history = np.array([s in frames for s in symbols], dtype=bool)
+
+        columns: Dict[str, np.ndarray] = {}
+        keys = dict(INFO_COLUMNS)
+        keys.update({c.metric: c.info_key for c in registry.values() if c.source == FUNDAMENTALS})
+        for metric, key in keys.items():
+            columns[metric] = np.array([_to_float(info.info[s].get(key)) if s in info.info else np.nan
+                                        for s in symbols], dtype=float)
+
+        indicators = compute_indicators(frames)
+        rows = np.array([index[s] for s in indicators.index], dtype=np.int64)
+        for metric in INDICATOR_COLUMNS + [c.metric for c in registry.values() if c.source == HISTORY]:
+            if metric in columns:
+                continue
+            values = np.full(len(symbols), np.nan)
+            if metric in indicators:
+                values[rows] = indicators[metric].to_numpy(dtype=float)
+            columns[metric] = values
+
+        names = np.array([str(info.info[s].get("longName", "N/A")) if s in info.info else "N/A"
+                          for s in symbols], dtype=object)
+
+    errors = dict(info.errors)
+    errors.update(history.errors)
+    return ScreenSnapshot(
+        version=_version(created),
+        created=created,
+        symbols=np.array(symbols, dtype=object),
+        names=names,
+        columns=columns,
+        has_info=has_info,
+        has_history=has_history,
+        errors=errors,
+    )
+
+
+class SnapshotStore:
+    """
+    Holds the snapshot the API serves and refreshes it in the background.
+
+    - `current` is replaced in one assignment after a new snapshot is fully
+      built and written, so concurrent readers see either the old or the new
+      snapshot, never a mix.
+    - On start the newest snapshot on disk is loaded, and a new one is built
+      right away if there is none, it is older than `interval`, or it lacks
+      a column of the registered criteria.
+    - The last `keep` snapshot files are kept on disk.
+    """
+
+    def __init__(self,
+                 screener: StockScreener,
+                 directory: Optional[str] = None,
+                 interval: float = 24 * 3600.0,
+                 keep: int = 3):
+        """
+        Args:
+            screener: Screener used to build snapshots
+            directory: Where snapshot files go (None = memory only)
+            interval: Seconds between scheduled rebuilds
+            keep: Snapshot files kept on disk
+        """
+        self.screener = screener
+        self.directory = directory
+        self.interval = interval
+        self.keep = max(1, keep)
+        self.current: Optional[ScreenSnapshot] = None
+        self.last_error: Optional[str] = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _files(self) -> List[str]:
+        if not self.directory:
+            return []
+        return sorted(glob.glob(os.path.join(self.directory, "snapshot-*.npz")))
+
+    def _swap(self, snapshot: ScreenSnapshot) -> None:
+        self.current = snapshot
+        SNAPSHOT_CREATED.set(snapshot.created)
+        SNAPSHOT_SYMBOLS.set(len(snapshot))
+
+    def load_latest(self) -> Optional[ScreenSnapshot]:
+        """
+        Serve the newest snapshot on disk, if any. A snapshot that lacks a
+        registered metric (built before a deploy added a criterion) is not
+        served, so the store rebuilds right away.
+        """
+        files = self._files()
+        if files:
+            snapshot = ScreenSnapshot.load(files[-1])
+            missing = snapshot.missing_columns()
+            if missing:
+                self.last_error = f"Snapshot {snapshot.version} has no {missing} columns; rebuilding"
+            else:
+                self._swap(snapshot)
+        return self.current
+
+    def refresh(self) -> ScreenSnapshot:
+        """
+        Build, save and swap in a new snapshot. A refresh that arrives while
+        another one is running waits for it and returns its snapshot.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            with self._refresh_lock:
+                return self.current
+        try:
+            with metrics.stage("snapshot_build"):
+                snapshot = build_snapshot(self.screener)
+            if self.directory:
+                snapshot.save(self.directory)
+                for old in self._files()[:-self.keep]:
+                    os.remove(old)
+            self._swap(snapshot)
+            self.last_error = None
+            SNAPSHOT_BUILDS.inc(result="ok")
+            return snapshot
+        except Exception as e:
+            self.last_error = str(e)
+            SNAPSHOT_BUILDS.inc(result="error")
+            raise
+        finally:
+            self._refresh_lock.release()
+
+    def _run(self) -> None:
+        try:
+            self.load_latest()
+        except Exception as e:
+            self.last_error = f"Could not load snapshot: {e}"
+        wait = 0.0 if self.current is None else max(0.0, self.interval - self.current.age())
+        while not self._stop.wait(wait):
+            try:
+                self.refresh()
+                wait = self.interval
+            except Exception:
+                # Keep serving the previous snapshot; retry sooner than a full interval
+                wait = min(self.interval, 300.0)
+
+    def start(self) -> "SnapshotStore":
+        """
+        Start the background refresh thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="screener-snapshot", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,333 @@
+"""
+Incremental (streaming) technical indicators.
+
+The batch functions (StockScreener._calculate_rsi, indicators.rsi / sma,
+signals.wilder_rsi, backtester.zones.compute_atr) recompute over the whole
+history on every call. The classes here keep just enough state to produce
+the next value from the next bar in O(1), whatever the history length:
+
+- SMA / simple RSI / ATR: a ring of the last `window` inputs and a running
+  sum (Neumaier-compensated, so adding and removing values for days does not
+  drift from the batch rolling mean)
+- EMA / Wilder RSI: the previous smoothed value(s)
+
+Each one can be warm-started from a history with `from_history`, which
+seeds the state from the batch computation, and then continues with the
+same values the batch version would produce on the extended series.
+"""
+
+from typing import Any, Dict, Iterable, Mapping, Optional
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class _RollingSum:
+    """
+    Sum of the last `window` values with O(1) push.
+    """
+    __slots__ = ("window", "_ring", "_pos", "count", "_sum", "_comp")
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self._ring = [0.0] * window
+        self._pos = 0
+        self.count = 0
+        self._sum = 0.0
+        self._comp = 0.0
+
+    def _add(self, x: float) -> None:
+        total = self._sum + x
+        if abs(self._sum) >= abs(x):
+            self._comp += (self._sum - total) + x
+        else:
+            self._comp += (x - total) + self._sum
+        self._sum = total
+
+    def push(self, x: float) -> None:
+        if self.count == self.window:
+            self._add(-self._ring[self._pos])
+        else:
+            self.count += 1
+        self._ring[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+        self._add(x)
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.window
+
+    def mean(self) -> float:
+        return (self._sum + self._comp) / self.window if self.full else math.nan
+
+    def seed(self, values: Iterable[float]) -> None:
+        """
+        Reset to the given (last `window`) values, summed exactly.
+        """
+        tail = list(values)[-self.window:]
+        self.__init__(self.window)
+        for x in tail:
+            self.count += 1
+            self._ring[self._pos] = x
+            self._pos = (self._pos + 1) % self.window
+        self._sum = math.fsum(tail)
+
+
+def _close(bar: Any) -> float:
+    if isinstance(bar, (float, int, np.floating)):
+        return float(bar)
+    return float(bar["Close"])
+
+
+class SMA:
+    """
+    Simple moving average of closes (same values as
+    close.rolling(window).mean() / indicators.sma).
+
+    Usage:
+        sma = SMA(200)
+        for bar in feed:
+            value = sma.update(bar)     # NaN until `window` bars
+    """
+    __slots__ = ("window", "_sum", "value")
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._sum = _RollingSum(window)
+        self.value = math.nan
+
+    def update(self, bar: Any) -> float:
+        """
+        Ingest the next bar (a mapping with Close, or the close itself).
+
+        Time: O(1)
+        """
+        self._sum.push(_close(bar))
+        self.value = self._sum.mean()
+        return self.value
+
+    @classmethod
+    def from_history(cls, close: Iterable[float], window: int = 200) -> "SMA":
+        sma = cls(window)
+        values = np.asarray(close, dtype=float)
+        sma._sum.seed(values)
+        sma.value = sma._sum.mean()
+        return sma
+
+
+class EMA:
+    """
+    Exponential moving average (same values as
+    close.ewm(span=span, adjust=False, min_periods=span).mean()).
+    """
+    __slots__ = ("span", "alpha", "min_periods", "n", "_ema", "value")
+
+    def __init__(self, span: int = 20, min_periods: Optional[int] = None):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.min_periods = span if min_periods is None else min_periods
+        self.n = 0
+        self._ema = math.nan
+        self.value = math.nan
+
+    def update(self, bar: Any) -> float:
+        """
+        Time: O(1)
+        """
+        x = _close(bar)
+        self.n += 1
+        self._ema = x if self.n == 1 else self._ema + self.alpha * (x - self._ema)
+        self.value = self._ema if self.n >= self.min_periods else math.nan
+        return self.value
+
+    @classmethod
+    def from_history(cls, close: Iterable[float], span: int = 20,
+                     min_periods: Optional[int] = None) -> "EMA":
+        ema = cls(span, min_periods)
+        values = pd.Series(np.asarray(close, dtype=float))
+        if len(values):
+            ema.n = len(values)
+            ema._ema = float(values.ewm(span=span, adjust=False).mean().iloc[-1])
+            ema.value = ema._ema if ema.n >= ema.min_periods else math.nan
+        return ema
+
+
+class RSI:
+    """
+    Relative Strength Index.
+
+    method="simple": rolling means of gains and losses, the same values as
+        StockScreener._calculate_rsi / indicators.rsi
+    method="wilder": Wilder smoothing (alpha = 1/period), the same values as
+        signals.wilder_rsi / ta.momentum.RSIIndicator
+
+    In both, the first bar counts as a 0 gain / 0 loss, like the batch code.
+    """
+    __slots__ = ("period", "method", "n", "_prev", "_gain", "_loss", "_up", "_down", "value")
+
+    def __init__(self, period: int = 14, method: str = "simple"):
+        if method not in ("simple", "wilder"):
+            raise ValueError(f"Unknown RSI method: {method}")
+        self.period = period
+        self.method = method
+        self.n = 0
+        self._prev = math.nan
+        self._gain = _RollingSum(period) if method == "simple" else None
+        self._loss = _RollingSum(period) if method == "simple" else None
+        self._up = math.nan
+        self._down = math.nan
+        self.value = math.nan
+
+    def update(self, bar: Any) -> float:
+        """
+        Time: O(1)
+        """
+        x = _close(bar)
+        delta = x - self._prev
+        self._prev = x
+        self.n += 1
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        if self.method == "simple":
+            self._gain.push(gain)
+            self._loss.push(loss)
+            self.value = self._simple_value()
+        else:
+            if self.n == 1:
+                self._up, self._down = gain, loss
+            else:
+                a = 1.0 / self.period
+                self._up += a * (gain - self._up)
+                self._down += a * (loss - self._down)
+            self.value = self._wilder_value()
+        return self.value
+
+    def _simple_value(self) -> float:
+        if not self._gain.full:
+            return math.nan
+        up, down = self._gain.mean(), self._loss.mean()
+        if down == 0:
+            return math.nan if up == 0 else 100.0
+        return 100.0 - 100.0 / (1.0 + up / down)
+
+    def _wilder_value(self) -> float:
+        if self.n < self.period:
+            return math.nan
+        if self._down == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self._up / self._down)
+
+    @classmethod
+    def from_history(cls, close: Iterable[float], period: int = 14, method: str = "simple") -> "RSI":
+        rsi = cls(period, method)
+        values = np.asarray(close, dtype=float)
+        if not len(values):
+            return rsi
+        delta = np.diff(values, prepend=np.nan)
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        rsi.n = len(values)
+        rsi._prev = float(values[-1])
+        if method == "simple":
+            rsi._gain.seed(gain)
+            rsi._loss.seed(loss)
+            rsi.value = rsi._simple_value()
+        else:
+            ewm = dict(alpha=1.0 / period, adjust=False)
+            rsi._up = float(pd.Series(gain).ewm(**ewm).mean().iloc[-1])
+            rsi._down = float(pd.Series(loss).ewm(**ewm).mean().iloc[-1])
+            rsi.value = rsi._wilder_value()
+        return rsi
+
+
+class ATR:
+    """
+    Average True Range as the SMA of true range (same values as
+    backtester.zones.compute_atr).
+    """
+    __slots__ = ("period", "_prev_close", "_tr", "value")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._prev_close = math.nan
+        self._tr = _RollingSum(period)
+        self.value = math.nan
+
+    def update(self, bar: Mapping[str, Any]) -> float:
+        """
+        Ingest the next bar (a mapping with High, Low, Close).
+
+        Time: O(1)
+        """
+        return self.update_hlc(float(bar["High"]), float(bar["Low"]), float(bar["Close"]))
+
+    def update_hlc(self, high: float, low: float, close: float) -> float:
+        prev = self._prev_close
+        if prev != prev:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - prev), abs(low - prev))
+        self._prev_close = close
+        self._tr.push(tr)
+        self.value = self._tr.mean()
+        return self.value
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, period: int = 14) -> "ATR":
+        atr = cls(period)
+        if len(df):
+            high = df["High"].to_numpy(dtype=float)
+            low = df["Low"].to_numpy(dtype=float)
+            close = df["Close"].to_numpy(dtype=float)
+            prev = np.concatenate([[np.nan], close[:-1]])
+            tr = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+            atr._tr.seed(tr)
+            atr._prev_close = float(close[-1])
+            atr.value = atr._tr.mean()
+        return atr
+
+
+class IndicatorSet:
+    """
+    The indicators the screener and backtester use, updated together.
+
+    Usage:
+        live = IndicatorSet.from_history(df)   # or IndicatorSet()
+        for bar in feed:
+            values = live.update(bar)           # {"rsi": .., "sma_200": .., ...}
+    """
+    __slots__ = ("indicators", "values")
+
+    def __init__(self, indicators: Optional[Dict[str, Any]] = None):
+        self.indicators = indicators if indicators is not None else {
+            "rsi": RSI(14, "simple"),
+            "rsi_wilder": RSI(14, "wilder"),
+            "sma_200": SMA(200),
+            "ema_20": EMA(20),
+            "atr": ATR(14),
+        }
+        self.values: Dict[str, float] = {name: ind.value for name, ind in self.indicators.items()}
+
+    def update(self, bar: Mapping[str, Any]) -> Dict[str, float]:
+        """
+        Time: O(number of indicators)
+        """
+        values = self.values
+        for name, indicator in self.indicators.items():
+            values[name] = indicator.update(bar)
+        return values
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame) -> "IndicatorSet":
+        close = df["Close"].to_numpy(dtype=float)
+        return cls({
+            "rsi": RSI.from_history(close, 14, "simple"),
+            "rsi_wilder": RSI.from_history(close, 14, "wilder"),
+            "sma_200": SMA.from_history(close, 200),
+            "ema_20": EMA.from_history(close, 20),
+            "atr": ATR.from_history(df, 14),
+        })
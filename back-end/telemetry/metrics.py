@@ -0,0 +1,296 @@
+"""
+In-process metrics with Prometheus text exposition, plus per-request stage
+timings for the Server-Timing header.
+
+- Counters, gauges and histograms live in one Registry and are rendered by
+  Registry.render() in the Prometheus text format (served at /metrics).
+- stage("name") times a block: it feeds the stage histogram and, when a
+  request is being timed (see request_timings), that request's breakdown.
+- Setting EDGEFINDER_METRICS=0 (or REGISTRY.enabled = False) turns every
+  update into an early return, so instrumented code pays one attribute
+  check per call.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import math
+import os
+import threading
+import time
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds (1 ms .. 60 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, help: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter, optionally labelled.
+    """
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down (last observed rate, in-flight work, ...).
+    """
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram (Prometheus semantics: le buckets, _sum, _count).
+    """
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[i] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._values.items())
+        for key, (counts, total) in items:
+            running = 0
+            for bound, n in zip(list(self.buckets) + [math.inf], counts):
+                running += n
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {running}")
+        return lines
+
+
+class Registry:
+    """
+    Holds every metric of the process.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, labels: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(self, name, help, labels, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(enabled=os.environ.get("EDGEFINDER_METRICS", "1") not in ("0", "false", "no"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# -------------------------
+# Metrics used across the back end
+# -------------------------
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "edgefinder_stage_seconds", "Time spent per pipeline stage.", ["stage"])
+FETCH_SECONDS = REGISTRY.histogram(
+    "edgefinder_fetch_seconds", "Latency of individual data provider calls.", ["kind"])
+FETCH_RETRIES = REGISTRY.counter(
+    "edgefinder_fetch_retries_total", "Provider calls retried after an error.", ["kind"])
+FETCH_FAILURES = REGISTRY.counter(
+    "edgefinder_fetch_failures_total", "Provider calls that failed after all retries.", ["kind"])
+# No symbol label: one series per ticker ever requested would be unbounded
+SYMBOL_FAILURES = REGISTRY.counter(
+    "edgefinder_symbol_failures_total", "Symbols dropped from a screen because their data failed.")
+SYMBOLS_EVALUATED = REGISTRY.counter(
+    "edgefinder_symbols_evaluated_total", "Symbols screened.")
+SCREENS = REGISTRY.counter(
+    "edgefinder_screens_total", "Screens run (cache misses).")
+SYMBOLS_PER_SECOND = REGISTRY.gauge(
+    "edgefinder_screen_symbols_per_second", "Symbols evaluated per second in the last screen.")
+CACHE_REQUESTS = REGISTRY.counter(
+    "edgefinder_cache_requests_total", "Result cache lookups.", ["cache", "result"])
+COALESCED = REGISTRY.counter(
+    "edgefinder_coalesced_requests_total", "Requests that joined an identical in-flight screen.")
+HTTP_SECONDS = REGISTRY.histogram(
+    "edgefinder_http_request_seconds", "HTTP request latency.", ["method", "path", "status"])
+
+
+# -------------------------
+# Per-request stage timings
+# -------------------------
+
+_TIMINGS: ContextVar[Optional[Dict[str, float]]] = ContextVar("edgefinder_timings", default=None)
+
+
+@contextmanager
+def request_timings() -> Iterator[Dict[str, float]]:
+    """
+    Collect stage() durations for the current request (and any thread work
+    started with its context copied) into the yielded dict, seconds by stage.
+    """
+    timings: Dict[str, float] = {}
+    token = _TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _TIMINGS.reset(token)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """
+    Report a stage duration measured elsewhere (e.g. from a ScreenReport).
+    """
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = _TIMINGS.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a block as pipeline stage `name`.
+    """
+    if not REGISTRY.enabled and _TIMINGS.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def server_timing(timings: Dict[str, float], total: Optional[float] = None) -> str:
+    """
+    Server-Timing header value (durations in milliseconds).
+    """
+    parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def record_screen(report) -> None:
+    """
+    Publish one screen's ScreenReport: stage timings, symbols evaluated and
+    the number of symbols whose data failed. Call once per screen (see
+    ScreenReport.combine for screens run in chunks).
+    """
+    if not REGISTRY.enabled and _TIMINGS.get() is None:
+        return
+    for name, seconds in report.stages.items():
+        record_stage(name, seconds)
+    filtering = sum(c.seconds for c in report.criteria)
+    if report.criteria:
+        record_stage("criteria", filtering)
+    SCREENS.inc()
+    SYMBOLS_EVALUATED.inc(report.symbols)
+    if report.errors:
+        SYMBOL_FAILURES.inc(len(report.errors))
+    if report.total_seconds > 0:
+        SYMBOLS_PER_SECOND.set(report.symbols / report.total_seconds)
@@ -0,0 +1,178 @@
+"""
+Opt-in sampling profiler for single API requests.
+
+A background thread snapshots the stack of the profiled threads every
+`interval` seconds (sys._current_frames) and counts collapsed stacks
+("outer;inner;leaf" -> samples), the input format of flamegraph.pl and
+speedscope. Nothing runs unless profiling is enabled:
+
+- EDGEFINDER_PROFILING=1 turns the feature on for the process
+- a request then opts in with the header "X-Profile: 1" (or ?profile=1)
+- the response carries "X-Profile-Id"; GET /debug/profiles/{id} returns it
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+import collections
+import itertools
+import os
+import sys
+import threading
+import time
+
+ENABLED = os.environ.get("EDGEFINDER_PROFILING", "0") in ("1", "true", "yes")
+DEFAULT_INTERVAL = 0.005
+MAX_DEPTH = 64
+
+
+def _collapse(frame, max_depth: int = MAX_DEPTH) -> str:
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of a set of threads until stopped.
+
+    Usage:
+        profiler = SamplingProfiler()
+        profiler.start()
+        ...                             # work in this (or a tracked) thread
+        profile = profiler.stop()
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, threads: Optional[Iterable[int]] = None):
+        self.interval = interval
+        self.threads: Set[int] = set(threads) if threads is not None else {threading.get_ident()}
+        self.stacks: Dict[str, int] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self.seconds = 0.0
+
+    def track(self, thread_id: Optional[int] = None) -> None:
+        """
+        Also sample `thread_id` (default: the calling thread), e.g. the
+        worker a request was handed to.
+        """
+        self.threads.add(thread_id if thread_id is not None else threading.get_ident())
+
+    def untrack(self, thread_id: Optional[int] = None) -> None:
+        self.threads.discard(thread_id if thread_id is not None else threading.get_ident())
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                if frame is not None and ident != me:
+                    self.stacks[_collapse(frame)] += 1
+                    self.samples += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="edgefinder-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.seconds = time.perf_counter() - self._started
+        return self.result()
+
+    def result(self, top: Optional[int] = None) -> Dict:
+        stacks = sorted(self.stacks.items(), key=lambda kv: kv[1], reverse=True)
+        return {
+            "interval_ms": self.interval * 1000,
+            "seconds": round(self.seconds, 6),
+            "samples": self.samples,
+            "stacks": [{"stack": s, "samples": n} for s, n in (stacks[:top] if top else stacks)],
+        }
+
+    def collapsed(self) -> str:
+        """
+        Collapsed-stack text ("stack count" per line).
+        """
+        return "\n".join(f"{s} {n}" for s, n in self.stacks.items()) + "\n"
+
+
+class ProfileStore:
+    """
+    The last `capacity` request profiles, by id.
+    """
+
+    def __init__(self, capacity: int = 32):
+        self.capacity = capacity
+        self._profiles: "collections.OrderedDict[str, Dict]" = collections.OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict) -> str:
+        with self._lock:
+            profile_id = f"{int(time.time())}-{next(self._ids)}"
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self.capacity:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        return self._profiles.get(profile_id)
+
+    def ids(self) -> List[str]:
+        return list(self._profiles)
+
+
+PROFILES = ProfileStore()
+
+_ACTIVE: ContextVar[Optional[SamplingProfiler]] = ContextVar("edgefinder_profiler", default=None)
+
+
+@contextmanager
+def profiling(interval: float = DEFAULT_INTERVAL) -> Iterator[SamplingProfiler]:
+    """
+    Profile the calling thread (plus any thread that enters worker_thread()
+    with this context) for the duration of the block.
+    """
+    profiler = SamplingProfiler(interval).start()
+    token = _ACTIVE.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _ACTIVE.reset(token)
+        profiler.stop()
+
+
+@contextmanager
+def worker_thread() -> Iterator[None]:
+    """
+    Sample the calling pool thread while it works for a profiled request
+    (a no-op unless the copied request context carries a profiler).
+    """
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        yield
+        return
+    profiler.track()
+    try:
+        yield
+    finally:
+        profiler.untrack()
+
+
+def requested(headers, query) -> bool:
+    """
+    True if profiling is enabled and the request opted in.
+    """
+    if not ENABLED:
+        return False
+    flag = headers.get("x-profile") or query.get("profile")
+    return flag is not None and flag.lower() in ("1", "true", "yes")
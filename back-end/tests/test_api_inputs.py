@@ -0,0 +1,71 @@
+import pytest
+
+testclient = pytest.importorskip("fastapi.testclient")
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    return testclient.TestClient(main.app)
+
+
+@pytest.mark.parametrize("symbol", ["../../etc/passwd", "SPY/../..", "..", "A..B", "SPY;rm", "X" * 16, ""])
+def test_chart_rejects_bad_symbols(client, symbol, monkeypatch):
+    monkeypatch.setattr(main.bar_store, "get", lambda *a, **k: pytest.fail("reached the bar store"))
+    assert client.get("/chart", params={"symbol": symbol}).status_code == 400
+
+
+def test_chart_and_backtester_reject_unknown_intervals(client, monkeypatch):
+    monkeypatch.setattr(main.bar_store, "get", lambda *a, **k: pytest.fail("reached the bar store"))
+    assert client.get("/chart", params={"interval": "../5m"}).status_code == 400
+    assert client.post("/backtester", json={"symbol": "SPY", "interval": "7x"}).status_code == 400
+    assert client.post("/backtester", json={"symbol": "../SPY"}).status_code == 400
+
+
+@pytest.mark.parametrize("symbol", ["SPY", "BRK.B", "^GSPC", "ES=F", "BF-B"])
+def test_valid_symbols_are_accepted(symbol):
+    assert main.SYMBOL_PATTERN.fullmatch(symbol)
+
+
+def test_stored_research_series_still_charts(client):
+    response = client.get("/chart", params={"symbol": "SPY", "interval": "5m", "zones": False})
+    assert response.status_code == 200
+    # Default width 1200 -> 400 slots; the 2810 session bars fill all of them
+    assert response.json()["candles"] == 400
+
+
+@pytest.fixture
+def journal(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "JOURNAL_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "JOURNAL_API_TOKEN", "secret")
+    monkeypatch.setattr(main, "_journal", None)
+    return {"Authorization": "Bearer secret"}
+
+
+def test_journal_is_disabled_without_journal_dir(client, monkeypatch):
+    monkeypatch.setattr(main, "JOURNAL_DIR", None)
+    monkeypatch.setattr(main, "_get_journal", lambda: pytest.fail("loaded a journal"))
+    assert client.get("/journal/analytics").status_code == 404
+    assert client.get("/journal/equity", params={"user_id": "u1"}).status_code == 404
+    assert client.post("/journal/trades", content=b"id,userId,pnl\n").status_code == 404
+
+
+def test_journal_requires_the_api_token(client, journal):
+    assert client.get("/journal/analytics").status_code == 401
+    assert client.get("/journal/analytics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/journal/analytics", headers=journal).status_code == 200
+
+    body = b"id,userId,pnl,exitDate\nt1,u1,50,2024-01-02T00:00:00Z\n"
+    assert client.post("/journal/trades", content=body, headers=journal).json()["added"] == 1
+    assert client.get("/journal/equity", params={"user_id": "u1"}, headers=journal).json()["trades"] == 1
+
+
+def test_journal_upload_size_is_capped(client, journal, monkeypatch):
+    monkeypatch.setattr(main, "JOURNAL_MAX_UPLOAD_BYTES", 64)
+    body = b"id,userId,pnl\n" + b"t,u1,1\n" * 20
+    assert client.post("/journal/trades", content=body, headers=journal).status_code == 413
+    # Chunked upload without a Content-Length
+    chunks = iter([body[:50], body[50:]])
+    assert client.post("/journal/trades", content=chunks, headers=journal).status_code == 413
+    assert main._journal is None
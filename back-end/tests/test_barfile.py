@@ -0,0 +1,99 @@
+import os
+import shutil
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from marketdata.barfile import HEADER_SIZE, convert_csv, load_prices_from_bars, open_bars
+from marketdata.prices import load_prices_from_csv
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backtester", "data")
+
+
+@pytest.fixture(scope="module")
+def bar_path(tmp_path_factory):
+    csv = os.path.join(DATA_DIR, "spy_5min.csv")
+    if not os.path.exists(csv):
+        pytest.skip("spy_5min.csv not available")
+    copy = tmp_path_factory.mktemp("bars") / "spy_5min.csv"
+    shutil.copy(csv, copy)
+    return convert_csv(str(copy))
+
+
+def _damaged(bar_path, tmp_path, offset, data):
+    path = str(tmp_path / "damaged.bars")
+    shutil.copy(bar_path, path)
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+    return path
+
+
+def test_round_trip_matches_the_csv_loader(bar_path):
+    expected = load_prices_from_csv(bar_path[:-len(".bars")] + ".csv")
+    bars = open_bars(bar_path, verify=True)
+    assert (bars.symbol, bars.interval, len(bars)) == ("SPY", "5m", len(expected))
+    # The CSV parser picks its own datetime unit; bar files always store ns
+    expected.index = expected.index.as_unit("ns")
+    pd.testing.assert_frame_equal(load_prices_from_bars(bar_path), expected, check_freq=False)
+
+
+def test_frame_is_a_view_of_the_mapped_file(bar_path):
+    bars = open_bars(bar_path)
+    frame = bars.frame()
+    assert np.shares_memory(frame.values, bars._map)
+    assert np.shares_memory(frame.index.asi8, bars._map)
+    assert not frame["Close"].to_numpy().flags.writeable
+
+
+def test_index_falls_back_to_the_public_constructor(bar_path, monkeypatch):
+    bars = open_bars(bar_path)
+    expected = bars.index()
+
+    simple_new = pd.arrays.DatetimeArray._simple_new
+    calls = []
+
+    def changed(*args, **kwargs):
+        # Only the wrapping call in BarFile.index fails; pandas' own calls
+        # on the fallback path still work
+        calls.append(1)
+        if len(calls) == 1:
+            raise TypeError("_simple_new() got an unexpected keyword argument 'dtype'")
+        return simple_new(*args, **kwargs)
+
+    monkeypatch.setattr(pd.arrays.DatetimeArray, "_simple_new", staticmethod(changed))
+    index = bars.index()
+    assert len(calls) > 1
+    pd.testing.assert_index_equal(index, expected)
+    assert not np.shares_memory(index.asi8, bars._map)
+
+
+def test_checksum_mismatch_is_caught_by_verify(bar_path, tmp_path):
+    bars = open_bars(bar_path)
+    # Flip a byte in the last Close value
+    offset = os.path.getsize(bar_path) - 1
+    path = _damaged(bar_path, tmp_path, offset, bytes([bars._map[offset] ^ 0xFF]))
+
+    assert len(open_bars(path)) == len(bars)
+    with pytest.raises(ValueError, match="checksum"):
+        open_bars(path, verify=True)
+
+
+@pytest.mark.parametrize("offset, data, message", [
+    (0, b"NOTBARS!", "not a bar file"),
+    (8, struct.pack("<I", 2), "unsupported bar file version"),
+    (12, struct.pack("<I", HEADER_SIZE + 64), "unsupported bar file version"),
+])
+def test_bad_header_is_rejected(bar_path, tmp_path, offset, data, message):
+    with pytest.raises(ValueError, match=message):
+        open_bars(_damaged(bar_path, tmp_path, offset, data))
+
+
+def test_truncated_file_is_rejected(bar_path, tmp_path):
+    path = str(tmp_path / "short.bars")
+    with open(bar_path, "rb") as src, open(path, "wb") as dst:
+        dst.write(src.read(os.path.getsize(bar_path) - 8))
+    with pytest.raises(ValueError, match="truncated data"):
+        open_bars(path)
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from marketdata.barstore import BarStore
+from screener.providers import BarStoreProvider, LocalDataProvider
+
+
+def _bars(start: str, n: int, freq: str = "5min") -> pd.DataFrame:
+    index = pd.date_range(start, periods=n, freq=freq, tz="UTC")
+    close = 100 + np.arange(n, dtype=float)
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close}, index=index)
+
+
+def test_append_replacing_last_bar_keeps_row_count(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.append("SPY", "5m", _bars("2026-01-05 14:30", 10))
+    # Overlaps the last stored bar (still forming) plus 4 new ones
+    store.append("SPY", "5m", _bars("2026-01-05 15:15", 5))
+
+    meta = store._read_meta("SPY", "5m")
+    assert meta["rows"] == len(store.read("SPY", "5m")) == 14
+
+
+def test_read_does_not_rewrite_meta(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.append("SPY", "5m", _bars("2026-01-05 14:30", 10))
+    path = store._meta_path("SPY", "5m")
+    before = os.stat(path).st_mtime_ns
+
+    for _ in range(5):
+        store.read("SPY", "5m")
+
+    assert os.stat(path).st_mtime_ns == before
+    assert store._accessed_at("SPY", "5m") >= store._read_meta("SPY", "5m")["accessed_at"]
+
+
+def test_lru_eviction_uses_in_memory_access_time(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.append("AAA", "5m", _bars("2026-01-05 14:30", 50))
+    store.append("BBB", "5m", _bars("2026-01-05 14:30", 50))
+    store.read("AAA", "5m")        # AAA is now the most recently used
+
+    store.max_bytes = store.size_bytes("AAA", "5m") + 1
+    assert store.evict() == [("BBB", "5m")]
+
+
+def test_provider_restarts_ttl_when_fetch_returns_nothing(tmp_path):
+    local = LocalDataProvider.synthetic(["AAA"], n_bars=30)
+    store = BarStore(str(tmp_path), ttl={"1d": 3600})
+    provider = BarStoreProvider(local, store)
+    provider.get_history(["AAA"], period="max")
+
+    # Stale key, and the network has nothing newer
+    meta = store._read_meta("AAA", "1d")
+    meta["refreshed_at"] = 0.0
+    store._write_meta("AAA", "1d", meta)
+    local.history = {}
+
+    provider.get_history(["AAA"], period="max")
+    provider.get_history(["AAA"], period="max")
+    assert local.calls["history"] == 2
+    assert store.is_fresh("AAA", "1d")
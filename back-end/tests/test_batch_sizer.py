@@ -0,0 +1,133 @@
+import math
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from riskcalculator.batch_sizer import _columns, inputs_to_columns, size_contracts_batch, size_contracts_frame
+from riskcalculator.option_position_sizer import SizingInput, size_contracts
+
+ROUNDED = {
+    "dollar_risk": 2, "per_share_risk": 4, "per_contract_loss_at_stop": 2,
+    "pct_drawdown_at_stop": 2, "min_entry_premium_for_cap": 4, "min_entry_notional_for_cap": 2,
+    "max_underlying_entry_for_cap": 4, "min_underlying_entry_for_cap": 4,
+    "allowed_per_share_risk_for_cap": 4,
+}
+FLAGS = ["cap_entry_threshold_computed", "affordability_checked", "affordable"]
+VERDICTS = ["zone_respects_pct_cap", "meets_pct_cap"]
+
+
+def _random_inputs(n, seed):
+    rng = np.random.default_rng(seed)
+    maybe = lambda value, p=0.5: value if rng.random() < p else None
+    inputs = []
+    for _ in range(n):
+        low = float(rng.uniform(50, 500))
+        high = low + float(rng.uniform(-0.5, 2.0))
+        direction = str(rng.choice(["call", "put", "CALL", "Put", "straddle"], p=[0.4, 0.4, 0.08, 0.08, 0.04]))
+        stop = low + float(rng.uniform(-5, 5))
+        inputs.append(SizingInput(
+            account_size=float(rng.uniform(1e3, 1e5)),
+            risk_pct=float(rng.choice([0.01, 0.02, 0.05, 0.0, 1.5])),
+            fixed_dollar_risk=maybe(float(rng.uniform(-50, 500)), 0.3),
+            direction=direction,
+            entry_low=low,
+            entry_high=high,
+            stop=stop,
+            delta=float(rng.uniform(0.05, 0.9)),
+            buffer=float(rng.uniform(1.0, 1.3)),
+            max_premium_per_contract=maybe(float(rng.uniform(50, 2000))),
+            est_entry_premium=maybe(float(rng.choice([0.0, rng.uniform(0.2, 15.0)], p=[0.05, 0.95]))),
+            pct_drawdown_cap=maybe(float(rng.choice([0.0, rng.uniform(0.05, 0.6)], p=[0.05, 0.95]))),
+        ))
+    return inputs
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_batch_matches_scalar_size_contracts(seed):
+    inputs = _random_inputs(400, seed)
+    batch = size_contracts_batch(inputs_to_columns(inputs))
+
+    failures = 0
+    for i, inp in enumerate(inputs):
+        try:
+            expected = size_contracts(inp)
+        except (ValueError, ZeroDivisionError) as e:
+            failures += 1
+            assert batch["error"][i] == str(e), i
+            assert batch["contracts"][i] == -1
+            continue
+
+        assert batch["error"][i] is None, (i, batch["error"][i])
+        assert batch["contracts"][i] == expected["contracts"]
+        assert batch["raw_contracts"][i] == pytest.approx(expected["raw_contracts"], rel=1e-12)
+        for key, digits in ROUNDED.items():
+            if key in expected:
+                assert round(float(batch[key][i]), digits) == pytest.approx(expected[key], abs=10 ** -digits), (i, key)
+            else:
+                assert math.isnan(batch[key][i]), (i, key)
+        for key in FLAGS:
+            assert bool(batch[key][i]) == expected[key], (i, key)
+        for key in VERDICTS:
+            if key in expected and expected["cap_entry_threshold_computed"]:
+                assert bool(batch[key][i]) == expected[key], (i, key)
+
+    # The generator covers both outcomes
+    assert 0 < failures < len(inputs)
+
+
+def test_scalars_broadcast_and_frame_keeps_index():
+    frame = size_contracts_frame({"stop": [209.2, 209.0, 211.0], "est_entry_premium": 2.5, "pct_drawdown_cap": 0.3})
+    assert list(frame.index) == [0, 1, 2]
+    assert frame["error"].iloc[2] is not None          # stop above a call's entry
+    assert frame["contracts"].iloc[0] == size_contracts(
+        SizingInput(stop=209.2, est_entry_premium=2.5, pct_drawdown_cap=0.3))["contracts"]
+
+
+def test_direction_encodings_agree():
+    columns = inputs_to_columns(_random_inputs(300, 9))
+    expected = size_contracts_frame(columns)
+    lowered = columns["direction"].str.lower()
+    is_call = np.where(lowered == "call", True, np.where(lowered == "put", False, None))
+    variants = [
+        columns.assign(direction=columns["direction"].astype("category")),
+        columns.assign(direction=columns["direction"].astype(object)),
+        {**{c: columns[c].to_numpy() for c in columns}, "direction": columns["direction"].to_numpy(dtype=object)},
+        columns.drop(columns="direction").assign(is_call=pd.array(is_call, dtype="boolean")),
+        columns.drop(columns="direction").assign(is_call=list(is_call)),
+    ]
+    for variant in variants:
+        pd.testing.assert_frame_equal(size_contracts_frame(variant), expected)
+
+    valid = is_call != None  # noqa: E711
+    only_valid = columns[valid].reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        size_contracts_frame(only_valid.drop(columns="direction").assign(is_call=is_call[valid].astype(bool))),
+        size_contracts_frame(only_valid))
+
+
+def test_million_scenarios_benchmark():
+    # Next to benchmarks.bench's scenario ladder: the columnar fast paths
+    # (float64 columns, boolean is_call) must not copy or match strings
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    low = rng.uniform(100, 500, n)
+    is_call = rng.random(n) < 0.5
+    columns = pd.DataFrame({
+        "account_size": 25_000.0, "risk_pct": 0.02, "is_call": is_call,
+        "entry_low": low, "entry_high": low + 0.25,
+        "stop": np.where(is_call, low - 1.0, low + 1.25),
+        "delta": rng.uniform(0.2, 0.7, n), "est_entry_premium": rng.uniform(0.5, 8.0, n),
+        "pct_drawdown_cap": 0.25,
+    })
+    best = min(_timed(lambda: _columns(columns)) for _ in range(3))
+    assert best < 0.05
+    best = min(_timed(lambda: size_contracts_batch(columns)) for _ in range(3))
+    assert best < 1.0
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
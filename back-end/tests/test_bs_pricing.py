@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from riskcalculator.bs_pricing import (black_scholes, entry_threshold_for_cap_bs, norm_cdf, pick_contract,
+                                       reprice_at_stop, size_chain)
+from riskcalculator.option_position_sizer import SizingInput
+
+
+def test_norm_cdf_matches_erf():
+    x = np.linspace(-40, 40, 4001)
+    expected = np.array([0.5 * math.erfc(-v / math.sqrt(2.0)) for v in x])
+    np.testing.assert_allclose(norm_cdf(x), expected, rtol=1e-12, atol=1e-15)
+
+
+def test_put_call_parity_and_greeks():
+    rng = np.random.default_rng(2)
+    n = 500
+    spot, strike = rng.uniform(50, 150, n), rng.uniform(50, 150, n)
+    years, iv = rng.uniform(0.01, 2.0, n), rng.uniform(0.05, 0.8, n)
+    rate, q = rng.uniform(0, 0.05, n), rng.uniform(0, 0.03, n)
+
+    call = black_scholes(spot, strike, years, iv, True, rate, q)
+    put = black_scholes(spot, strike, years, iv, False, rate, q)
+    parity = spot * np.exp(-q * years) - strike * np.exp(-rate * years)
+    np.testing.assert_allclose(call["price"] - put["price"], parity, atol=1e-9)
+
+    for is_call, greeks in ((True, call), (False, put)):
+        price = lambda s=spot, t=years, v=iv: black_scholes(s, strike, t, v, is_call, rate, q)["price"]
+        h = 1e-3
+        np.testing.assert_allclose(greeks["delta"], (price(s=spot + h) - price(s=spot - h)) / (2 * h),
+                                   atol=1e-6)
+        np.testing.assert_allclose(greeks["gamma"],
+                                   (price(s=spot + h) - 2 * price() + price(s=spot - h)) / h ** 2, atol=1e-4)
+        np.testing.assert_allclose(greeks["vega"], (price(v=iv + 1e-5) - price(v=iv - 1e-5)) / 2e-5 / 100,
+                                   atol=1e-6)
+        day = 1.0 / 365.0
+        np.testing.assert_allclose(greeks["theta"], (price(t=years - day * 1e-3) - price()) / 1e-3,
+                                   atol=1e-4)
+
+
+@pytest.mark.parametrize("is_call", [True, False])
+def test_threshold_drawdown_equals_cap(is_call):
+    rng = np.random.default_rng(4)
+    n = 200
+    stop = rng.uniform(80, 120, n)
+    strike = stop * rng.uniform(0.9, 1.1, n)
+    days, iv = rng.uniform(5, 90, n), rng.uniform(0.15, 0.6, n)
+    cap = rng.uniform(0.1, 0.6, n)
+
+    threshold = entry_threshold_for_cap_bs(is_call, stop, cap, strike, days, iv, days_to_stop=1.0)
+    ok = np.isfinite(threshold)
+    assert ok.mean() > 0.9
+    pct = reprice_at_stop(is_call, threshold[ok], stop[ok], strike[ok], days[ok], iv[ok],
+                          days_to_stop=1.0)["pct_drawdown_at_stop"]
+    np.testing.assert_allclose(pct, cap[ok], atol=1e-7)
+
+
+def test_threshold_is_infinite_when_the_cap_is_never_reached():
+    threshold = entry_threshold_for_cap_bs([True, False, True], 100.0, [1.0, 1.5, 0.3], 100.0, 30.0, 0.3)
+    assert threshold[0] == np.inf and threshold[1] == -np.inf
+    assert 100.0 < threshold[2] < 200.0
+
+
+def _chain():
+    strikes = np.arange(60.0, 141.0, 2.5)
+    return pd.DataFrame({"strike": strikes, "iv": 0.3, "days_to_expiry": 30.0})
+
+
+def test_size_chain_bounds_positions_by_buying_power():
+    sizing = SizingInput(account_size=10_000, risk_pct=0.05, direction="call",
+                         entry_low=99.5, entry_high=100.0, stop=99.0, pct_drawdown_cap=None)
+    sized = size_chain(_chain(), sizing)
+    cost = sized["contracts"] * sized["entry_premium"] * 100
+    np.testing.assert_allclose(sized["position_cost"], cost)
+    assert (sized["within_buying_power"] == (cost <= sizing.account_size)).all()
+    # A one-point stop sizes in-the-money strikes beyond the account
+    assert not sized["within_buying_power"].all()
+    assert not (sized["eligible"] & ~sized["within_buying_power"]).any()
+
+    best = pick_contract(sized)
+    assert best is not None and best["position_cost"] <= sizing.account_size
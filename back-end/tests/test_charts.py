@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.charts import downsample_ohlc
+from marketdata.prices import load_prices_from_csv
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backtester", "data")
+
+
+@pytest.fixture(scope="module")
+def bars():
+    # Three years of 5-minute regular-session bars (~59k bars, ~1100-day span)
+    index = pd.date_range("2022-01-03 09:30", "2024-12-31 16:00", freq="5min", tz="America/New_York")
+    index = index[index.dayofweek < 5]
+    index = index[index.indexer_between_time("09:30", "15:55")]
+    rng = np.random.default_rng(3)
+    close = 400 + np.cumsum(rng.normal(0, 0.2, len(index)))
+    open_ = close + rng.normal(0, 0.1, len(index))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) + rng.uniform(0, 0.2, len(index)),
+        "Low": np.minimum(open_, close) - rng.uniform(0, 0.2, len(index)),
+        "Close": close,
+    }, index=index)
+
+
+@pytest.mark.parametrize("max_bars", [1, 7, 400, 2000, 50_000])
+def test_downsample_matches_groupby_reference(bars, max_bars):
+    out = downsample_ohlc(bars, max_bars)
+    assert len(out) == min(len(bars), max_bars)
+    assert out["bars"].sum() == len(bars)
+    assert out["bars"].max() - out["bars"].min() <= 1
+
+    # Reference: bar i goes to bucket floor(i * max_bars / n)
+    bucket = [i * max_bars // len(bars) for i in range(len(bars))]
+    grouped = bars.assign(time=bars.index).groupby(bucket)
+    expected = pd.DataFrame({
+        "Open": grouped["Open"].first().to_numpy(),
+        "High": grouped["High"].max().to_numpy(),
+        "Low": grouped["Low"].min().to_numpy(),
+        "Close": grouped["Close"].last().to_numpy(),
+        "bars": grouped.size().to_numpy(),
+        "end": grouped["time"].last().to_numpy(),
+    }, index=pd.DatetimeIndex(grouped["time"].first().to_numpy()))
+    pd.testing.assert_frame_equal(out, expected, check_dtype=False, check_index_type=False,
+                                  check_freq=False, check_names=False)
+
+
+@pytest.mark.parametrize("max_bars", [100, 400, 2000])
+def test_session_data_fills_every_candle_slot(max_bars):
+    # Research 5-minute bars: 6.5 hour sessions, so most of the wall-clock
+    # span has no bars. Every slot still gets a candle
+    path = os.path.join(DATA_DIR, "spy_5min.csv")
+    if not os.path.exists(path):
+        pytest.skip("spy_5min.csv not available")
+    bars = load_prices_from_csv(path)
+    out = downsample_ohlc(bars, max_bars)
+    assert len(out) == min(len(bars), max_bars)
+    assert (out.index[1:] > out["end"].to_numpy()[:-1]).all()
+
+
+def test_short_frames_are_returned_as_is(bars):
+    out = downsample_ohlc(bars.iloc[:10], 400)
+    assert (out["bars"] == 1).all() and (out["Close"] == bars["Close"].iloc[:10]).all()
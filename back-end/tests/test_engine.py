@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pytest
+
+from backtester.engine import backtest_signals, max_concurrent
+from marketdata.prices import load_prices_from_csv
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backtester", "data")
+
+
+@pytest.fixture(scope="module")
+def bars():
+    path = os.path.join(DATA_DIR, "spy_5min.csv")
+    if not os.path.exists(path):
+        pytest.skip("spy_5min.csv not available")
+    return load_prices_from_csv(path)
+
+
+def _signals(df, every=7):
+    signals = np.zeros(len(df), dtype=bool)
+    signals[::every] = True
+    return signals
+
+
+def test_max_concurrent():
+    assert max_concurrent(np.array([], dtype=np.int64), np.array([], dtype=np.int64), 10) == 0
+    # Open through the exit bar: [0, 3] and [3, 5] overlap on bar 3
+    assert max_concurrent(np.array([0, 3, 6]), np.array([3, 5, 9]), 10) == 2
+    assert max_concurrent(np.array([0, 4, 6]), np.array([3, 5, 9]), 10) == 1
+
+
+def test_single_position_is_fully_invested(bars):
+    result = backtest_signals(bars, _signals(bars), max_bars=10, allow_overlap=False)
+    trades = result["trades"]
+    assert result["stats"]["max_concurrent"] == 1
+    expected = np.prod(1 + trades["return_pct"].to_numpy() / 100.0)
+    assert result["equity"].iloc[-1] == pytest.approx(expected)
+
+
+def test_overlapping_trades_share_the_capital(bars):
+    result = backtest_signals(bars, _signals(bars, every=3), max_bars=10, allow_overlap=True)
+    trades = result["trades"]
+    k = result["stats"]["max_concurrent"]
+    assert k == max_concurrent(trades["entry_idx"].to_numpy(), trades["exit_idx"].to_numpy(), len(bars)) > 1
+    expected = np.prod(1 + trades["return_pct"].to_numpy() / 100.0 / k)
+    assert result["equity"].iloc[-1] == pytest.approx(expected)
+    assert result["stats"]["total_return_pct"] == pytest.approx((expected - 1) * 100.0)
+
+
+def test_backtester_endpoint_defaults_to_one_position():
+    main = pytest.importorskip("main")
+    assert main.BacktesterRequest().allow_overlap is False
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from journal.analytics import DIMENSIONS, RULES, TradeJournal, prepare_trades
+
+
+def _random_export(n, seed):
+    """
+    Export rows for two users; exit dates are midnight stamps, so many
+    trades share a `time` and are ordered by createdAt.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 20, n), unit="D")
+    created = days + pd.to_timedelta(rng.integers(0, 86_400, n), unit="s")
+    rows = {
+        "id": [f"t{i}" for i in range(n)],
+        "userId": rng.choice(["u1", "u2"], n),
+        "symbol": rng.choice(["SPY", "QQQ", "AAPL"], n),
+        "strategyName": rng.choice(["breakout", "fade"], n),
+        "pnl": rng.normal(0, 100, n).round(2),
+        "R": rng.normal(0, 1.5, n).round(2),
+        "entryDate": days.map(lambda d: d.isoformat()),
+        "exitDate": days.map(lambda d: d.isoformat()),
+        "createdAt": created.map(lambda d: d.isoformat()),
+        "updatedAt": created.map(lambda d: d.isoformat()),
+    }
+    for rule in RULES:
+        rows[rule] = rng.choice([True, False], n)
+    return pd.DataFrame(rows)
+
+
+def _assert_same_stats(journal, reference):
+    for by in DIMENSIONS:
+        pd.testing.assert_frame_equal(journal.stats(by), reference.stats(by), check_exact=False)
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_incremental_appends_match_rebuild(seed):
+    export = _random_export(300, seed)
+    journal = TradeJournal()
+    # Days arrive in order, but same-day trades in random createdAt order
+    arrival = export.sample(frac=1.0, random_state=seed).sort_values("exitDate", kind="stable")
+    for batch in np.array_split(np.arange(len(arrival)), 40):
+        journal.append(prepare_trades(arrival.iloc[batch]))
+    _assert_same_stats(journal, TradeJournal(prepare_trades(export)))
+
+
+def test_same_day_trade_created_earlier_rebuilds():
+    export = _random_export(3, 0).assign(userId="u1", exitDate="2024-03-01T00:00:00Z")
+    export["createdAt"] = ["2024-03-01T15:00:00Z", "2024-03-01T10:00:00Z", "2024-03-01T16:00:00Z"]
+
+    journal = TradeJournal(prepare_trades(export.iloc[:1]))
+    journal.append(prepare_trades(export.iloc[1:2]))
+    assert journal.rebuilds == 2
+    _assert_same_stats(journal, TradeJournal(prepare_trades(export.iloc[:2])))
+
+    # Created later on the same day follows the last trade: no rebuild
+    journal.append(prepare_trades(export.iloc[2:]))
+    assert journal.rebuilds == 2
+    _assert_same_stats(journal, TradeJournal(prepare_trades(export)))
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from screener.providers import LocalDataProvider
+from screener.screener import StockScreener
+from screener.service import ScreenerService
+from telemetry import metrics
+
+SYMBOLS = [f"S{i:03d}" for i in range(60)]
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics.REGISTRY, "enabled", True)
+
+
+def test_streamed_screen_is_recorded_once():
+    provider = LocalDataProvider.synthetic(SYMBOLS, n_bars=260, failing_symbols=["S007"])
+    service = ScreenerService(StockScreener(SYMBOLS, provider=provider), max_workers=1)
+    screens = metrics.SCREENS.value()
+    evaluated = metrics.SYMBOLS_EVALUATED.value()
+    failures = metrics.SYMBOL_FAILURES.value()
+
+    async def run():
+        return [e async for e in service.stream({"pe_ratio_max": 30.0}, chunk_size=20)]
+
+    events = asyncio.run(run())
+    assert sum(e["type"] == "progress" for e in events) == 3
+    assert metrics.SCREENS.value() == screens + 1
+    assert metrics.SYMBOLS_EVALUATED.value() == evaluated + len(SYMBOLS)
+    assert metrics.SYMBOL_FAILURES.value() == failures + 1
+
+
+def test_symbol_failures_have_no_symbol_label():
+    assert metrics.SYMBOL_FAILURES.labels == ()
+    rendered = "\n".join(metrics.SYMBOL_FAILURES.render())
+    assert "symbol=" not in rendered
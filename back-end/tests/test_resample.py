@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from marketdata.prices import load_prices_from_csv
+from marketdata.resample import NOT_AVAILABLE, MultiTimeframe
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backtester", "data")
+INTERVALS = ["15m", "1h", "4h", "1d"]
+
+
+def _load(name):
+    path = os.path.join(DATA_DIR, name)
+    if not os.path.exists(path):
+        pytest.skip(f"{name} not available")
+    return load_prices_from_csv(path)
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return _load("spy_5min.csv")
+
+
+def _assert_same_timeframe(mtf, reference, interval):
+    got, expected = mtf.get(interval), reference.get(interval)
+    pd.testing.assert_frame_equal(got.frame, expected.frame, check_freq=False)
+    for field in ("available", "keys", "first_row"):
+        np.testing.assert_array_equal(getattr(got, field), getattr(expected, field), err_msg=field)
+
+
+def test_derived_hourly_bars_match_the_hourly_file(bars):
+    hourly = _load("spy_hourly.csv")
+    derived = MultiTimeframe(bars, "5m").get("1h").completed_frame()
+    stored = hourly[hourly.index >= derived.index[0]]
+
+    assert stored.index.isin(derived.index).all()
+    pd.testing.assert_frame_equal(derived.loc[stored.index], stored, check_freq=False, check_index_type=False)
+    # The only extra bars are the half hour before the 13:00 early closes,
+    # which the hourly download leaves out
+    extra = derived.index.difference(stored.index)
+    assert set(extra.strftime("%m-%d")) <= {"11-28", "12-24"}
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_chunked_updates_match_a_full_build(bars, seed):
+    rng = np.random.default_rng(seed)
+    start = int(rng.integers(1, 400))
+    mtf = MultiTimeframe(bars.iloc[:start], "5m")
+    mtf.get("1h")
+    mtf.get("1d")
+
+    pos = start
+    while pos < len(bars):
+        end = min(len(bars), pos + int(rng.integers(1, 200)))
+        if rng.random() < 0.3:
+            # A forming version of the next bar, replaced by the final one below
+            forming = bars.iloc[end - 1:end].copy()
+            forming["Close"] += 1.0
+            forming["High"] += 2.0
+            mtf.update(pd.concat([bars.iloc[pos:end - 1], forming]))
+            assert mtf.update(bars.iloc[end - 1:end]) == 1
+        else:
+            mtf.update(bars.iloc[pos:end])
+        if pos < 1000 <= end:
+            mtf.get("15m")
+        pos = end
+
+    reference = MultiTimeframe(bars, "5m")
+    pd.testing.assert_frame_equal(mtf.base, reference.base, check_freq=False, check_index_type=False)
+    for interval in INTERVALS:
+        _assert_same_timeframe(mtf, reference, interval)
+    assert mtf.update(bars.iloc[:50]) == 0
+
+
+def test_align_never_points_at_an_incomplete_bar(bars):
+    mtf = MultiTimeframe(bars, "5m")
+    closes = mtf.base_available
+    for interval in ["1h", "4h", "1d"]:
+        pos = mtf.align("5m", interval)
+        available = mtf.get(interval).available
+        frame = mtf.get(interval).frame
+        assert (np.diff(pos) >= 0).all()
+        known = pos >= 0
+        assert (available[pos[known]] <= closes[known]).all()
+        assert (available[pos[known]] != NOT_AVAILABLE).all()
+
+        # What the lower bar sees is exactly what a run stopped at that bar sees
+        for i in range(0, len(bars), 37):
+            truncated = MultiTimeframe(bars.iloc[:i + 1], "5m")
+            tf = truncated.get(interval)
+            complete = np.flatnonzero(tf.complete)
+            expected = complete[-1] if len(complete) else -1
+            assert pos[i] == expected, (interval, i)
+            if expected >= 0:
+                pd.testing.assert_series_equal(frame.iloc[pos[i]], tf.frame.iloc[expected])
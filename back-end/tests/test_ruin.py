@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+import pytest
+
+from riskcalculator.option_position_sizer import SizingInput, per_contract_loss_at_stop, size_contracts
+from riskcalculator.ruin import RuinPolicy, TradeModel, compare_policies, run_paths, simulate_paths
+
+
+def _model():
+    rng = np.random.default_rng(11)
+    r = rng.normal(0.1, 1.5, 300)
+    return TradeModel.empirical(r, per_contract_loss=rng.uniform(20, 80, 300), premium=rng.uniform(0.5, 4.0, 300))
+
+
+def test_run_paths_does_not_depend_on_the_worker_count():
+    policy = RuinPolicy(risk_pct=0.05, pct_drawdown_cap=0.4)
+    kwargs = dict(n_paths=2_000, n_trades=60, seed=7, chunk_size=300)
+    serial = run_paths(policy, _model(), max_workers=1, **kwargs)
+    pooled = run_paths(policy, _model(), max_workers=3, **kwargs)
+    assert serial.keys() == pooled.keys()
+    for key in serial:
+        np.testing.assert_array_equal(serial[key], pooled[key], err_msg=key)
+    assert serial["ruined"].any() and not serial["ruined"].all()
+
+
+def test_compare_policies_uses_common_random_numbers(monkeypatch):
+    draws = []
+    sample = TradeModel.sample
+
+    def recording(self, rng, n):
+        r, loss, premium = sample(self, rng, n)
+        draws.append(np.array(r))
+        return r, loss, premium
+
+    monkeypatch.setattr(TradeModel, "sample", recording)
+    policies = [RuinPolicy(risk_pct=0.01), RuinPolicy(risk_pct=0.05), RuinPolicy(risk_pct=0.01, name="again")]
+    n_trades = 40
+    table = compare_policies(policies, _model(), n_paths=500, n_trades=n_trades, seed=3, max_workers=1)
+
+    assert len(draws) == len(policies) * n_trades
+    for other in (1, 2):
+        for t in range(n_trades):
+            np.testing.assert_array_equal(draws[t], draws[other * n_trades + t])
+    # Same policy, same draws: identical rows
+    assert table.loc["risk 1.00%"].equals(table.loc["again"])
+    assert not table.loc["risk 1.00%"].equals(table.loc["risk 5.00%"])
+
+
+def test_fixed_risk_losing_streak_ruins_on_the_expected_trade():
+    # $250 risk / $50 per contract = 5 contracts, -$250 per loss:
+    # 5000 -> 2500 (the ruin level) after the 10th loss, index 9
+    model = TradeModel.bernoulli(win_rate=0.0, win_r=2.0, per_contract_loss=50.0)
+    paths = simulate_paths(RuinPolicy(risk_pct=None, fixed_dollar_risk=250.0), model,
+                           n_paths=64, n_trades=30, account_size=5000.0, ruin_level=0.5, seed=0)
+    assert (paths["ruin_trade"] == 9).all() and paths["ruined"].all()
+    assert (paths["taken"] == 10).all() and (paths["skipped"] == 0).all()
+    assert (paths["final"] == 2500.0).all()
+    np.testing.assert_allclose(paths["max_drawdown"], 0.5)
+
+
+def test_pct_risk_losing_streak_matches_a_hand_loop():
+    loss, account, risk_pct = 12.0, 5000.0, 0.03
+    expected, equity = -1, account
+    for t in range(200):
+        equity -= math.floor(equity * risk_pct / loss) * loss
+        if equity <= 0.5 * account:
+            expected = t
+            break
+    assert expected > 0
+
+    model = TradeModel.bernoulli(win_rate=0.0, win_r=2.0, per_contract_loss=loss)
+    paths = simulate_paths(RuinPolicy(risk_pct=risk_pct), model, n_paths=16, n_trades=200,
+                           account_size=account, seed=1)
+    assert (paths["ruin_trade"] == expected).all()
+    np.testing.assert_allclose(paths["final"], equity)
+
+
+@pytest.mark.parametrize("direction, entry, stop, premium, cap, max_premium, taken", [
+    ("call", 100.5, 99.0, 2.00, 0.40, None, True),    # 66 / 200 = 33%: meets the cap
+    ("call", 100.5, 98.0, 2.00, 0.40, None, False),   # 110 / 200 = 55%: over the cap
+    ("put", 99.0, 101.0, 3.50, 0.30, None, True),     # 88 / 350 = 25%
+    ("put", 99.0, 101.0, 1.50, 0.30, None, False),    # 88 / 150 = 59%
+    ("call", 100.5, 99.0, 2.00, 0.40, 1.50, False),   # meets the cap, too expensive
+    ("call", 100.5, 99.0, 2.00, None, 2.50, True),    # no cap, affordable
+])
+def test_cap_and_premium_skips_match_size_contracts(direction, entry, stop, premium, cap, max_premium, taken):
+    inp = SizingInput(account_size=100_000, risk_pct=0.02, direction=direction, entry_low=entry, entry_high=entry,
+                      stop=stop, est_entry_premium=premium, pct_drawdown_cap=cap,
+                      max_premium_per_contract=max_premium)
+    sized = size_contracts(inp)
+    expected = sized.get("meets_pct_cap", True) and sized["affordable"] and sized["contracts"] >= 1
+    assert expected == taken
+
+    model = TradeModel.empirical([1.0], per_contract_loss=per_contract_loss_at_stop(inp), premium=premium)
+    policy = RuinPolicy(risk_pct=0.02, pct_drawdown_cap=cap, max_premium_per_contract=max_premium)
+    paths = simulate_paths(policy, model, n_paths=1, n_trades=1, account_size=inp.account_size, seed=0)
+    assert paths["taken"][0] == expected and paths["skipped"][0] == (not expected)
+    if expected:
+        assert paths["final"][0] == inp.account_size + sized["contracts"] * per_contract_loss_at_stop(inp)
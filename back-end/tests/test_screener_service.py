@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from screener.providers import LocalDataProvider
+from screener.screener import StockScreener
+from screener.service import MAX_PAGE_SIZE, ScreenerService
+
+SYMBOLS = [f"S{i:03d}" for i in range(60)]
+CRITERIA = {"pe_ratio_max": 40.0, "rsi_threshold_upper": 70.0}
+
+
+def _service():
+    provider = LocalDataProvider.synthetic(SYMBOLS, n_bars=300, seed=3)
+    return ScreenerService(StockScreener(SYMBOLS, provider=provider), max_workers=1), provider
+
+
+def _stream(service, criteria, chunk_size=25):
+    async def collect():
+        return [event async for event in service.stream(criteria, chunk_size=chunk_size)]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("limit", [0, -5, MAX_PAGE_SIZE + 1])
+def test_page_rejects_invalid_limit(limit):
+    service, _ = _service()
+    with pytest.raises(ValueError):
+        asyncio.run(service.page(CRITERIA, limit=limit))
+
+
+def test_page_walks_every_match_once():
+    service, _ = _service()
+    symbols = asyncio.run(service.screen(CRITERIA))
+    seen, cursor = [], None
+    while True:
+        page, total, cursor = asyncio.run(service.page(CRITERIA, limit=7, cursor=cursor))
+        seen += page
+        if cursor is None:
+            break
+    assert seen == symbols and total == len(symbols)
+
+
+def test_stream_builds_records_from_the_planners_data():
+    service, provider = _service()
+    events = _stream(service, CRITERIA)
+    matches = [e for e in events if e["type"] == "match"]
+    summary = events[-1]
+
+    # One info call per symbol and one history batch per chunk: the records
+    # did not trigger a second download
+    assert provider.calls["info"] == len(SYMBOLS)
+    assert provider.calls["history"] == 3
+
+    reference = StockScreener(SYMBOLS, provider=LocalDataProvider.synthetic(SYMBOLS, n_bars=300, seed=3))
+    expected = {r["symbol"]: r for r in reference.get_stocks_data(summary["symbols"])}
+    assert sorted(m["symbol"] for m in matches) == sorted(expected)
+    for m in matches:
+        for field, value in expected[m["symbol"]].items():
+            assert m[field] == pytest.approx(value, nan_ok=True)
+
+    # Cached replay: no fetching at all
+    calls = dict(provider.calls)
+    replay = [e for e in _stream(service, CRITERIA) if e["type"] == "match"]
+    assert provider.calls == calls
+    assert [m["symbol"] for m in replay] == summary["symbols"]
+
+
+def test_api_returns_400_for_invalid_limit():
+    testclient = pytest.importorskip("fastapi.testclient")
+    import main
+
+    client = testclient.TestClient(main.app)
+    for limit in (0, -1, MAX_PAGE_SIZE + 1):
+        assert client.post("/screener", json={"limit": limit}).status_code == 400
+    assert client.post("/screener", json={"pe_ratio_max": "x"}).status_code == 422
@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import signals as signals_module
+from backtester.signals import KINDS, divergence_signals, swing_points
+from marketdata.prices import load_prices_from_csv
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backtester", "data")
+ORDER = 5
+
+
+@pytest.fixture(scope="module")
+def bars():
+    path = os.path.join(DATA_DIR, "spy_5min.csv")
+    if not os.path.exists(path):
+        pytest.skip("spy_5min.csv not available")
+    return load_prices_from_csv(path)
+
+
+def _same_events(got, expected):
+    if expected.empty:
+        # No events: the columns are there, their dtypes are not meaningful
+        assert got.empty and list(got.columns) == list(expected.columns)
+        return
+    # symbol / kind come out as object or str depending on which kinds fired
+    labels = {"symbol": object, "kind": object}
+    pd.testing.assert_frame_equal(got.reset_index(drop=True).astype(labels),
+                                  expected.reset_index(drop=True).astype(labels))
+
+
+def test_causal_swings_do_not_change_when_bars_are_appended(bars):
+    close = bars["Close"].to_numpy()
+    full = swing_points(close, ORDER, "low", causal=True)
+    for k in (ORDER, 50, 333, 1200, len(close) - 1):
+        # The last ORDER bars of the shorter run cannot be confirmed yet
+        expected = full[:k].copy()
+        expected[k - ORDER:] = False
+        np.testing.assert_array_equal(swing_points(close[:k], ORDER, "low", causal=True), expected)
+
+
+@pytest.mark.parametrize("rsi_method", ["wilder", "simple"])
+def test_causal_signals_only_use_past_bars(bars, rsi_method):
+    events, signals = divergence_signals({"SPY": bars}, order=ORDER, rsi_method=rsi_method)
+    assert set(events["kind"]) == set(KINDS)
+
+    for k in (40, 250, 901, 1777, 2500):
+        part_events, part = divergence_signals({"SPY": bars.iloc[:k]}, order=ORDER, rsi_method=rsi_method)
+        for kind in KINDS:
+            np.testing.assert_array_equal(part["SPY"][kind], signals["SPY"][kind][:k], err_msg=f"{kind} at {k}")
+        expected = events[events["signal_bar"] < k]
+        _same_events(part_events, expected)
+
+
+def test_ragged_panel_matches_single_symbol_runs(bars):
+    history = {
+        "SPY": bars,
+        "LATE": bars.iloc[700:] * 0.5,
+        "SHORT": bars.iloc[300:1400] * 2.0,
+        "TINY": bars.iloc[:8],
+    }
+    events, signals = divergence_signals(history, order=ORDER)
+    assert events["symbol"].nunique() == 3
+
+    for symbol, frame in history.items():
+        alone_events, alone = divergence_signals({symbol: frame}, order=ORDER)
+        for kind in KINDS:
+            assert len(signals[symbol][kind]) == len(frame)
+            np.testing.assert_array_equal(signals[symbol][kind], alone[symbol][kind], err_msg=f"{symbol} {kind}")
+        _same_events(events[events["symbol"] == symbol], alone_events)
+
+
+def test_each_divergence_kind_on_a_hand_built_series(monkeypatch):
+    # order=1 swings. Lows at bars 2 and 6 (highs at 0 and 4 are equal), or
+    # highs at 2 and 6 (lows at 0 and 4 are equal); the RSI is set by hand
+    # at the two swings and flat elsewhere.
+    lows = lambda x: [10, 8, 5, 8, 10, 8, x, 8, 10]
+    highs = lambda x: [10, 12, 15, 12, 10, 12, x, 12, 10]
+    cases = {
+        "regular_bullish": (lows(4), 20, 30),    # lower low, higher RSI
+        "hidden_bullish": (lows(6), 30, 20),     # higher low, lower RSI
+        "regular_bearish": (highs(16), 80, 70),  # higher high, lower RSI
+        "hidden_bearish": (highs(14), 70, 80),   # lower high, higher RSI
+    }
+    index = pd.date_range("2026-01-05 14:30", periods=9, freq="5min", tz="UTC", name="Date")
+    history = {kind: pd.DataFrame({"Close": np.array(c, dtype=float)}, index=index)
+               for kind, (c, _, _) in cases.items()}
+
+    def hand_rsi(panel, period):
+        osc = np.full(panel.values.shape, 50.0)
+        for row, kind in enumerate(panel.symbols):
+            osc[row, [2, 6]] = cases[kind][1:]
+        return osc
+
+    monkeypatch.setattr(signals_module, "wilder_rsi", hand_rsi)
+    events, signals = divergence_signals(history, order=1)
+
+    assert list(events["symbol"]) == list(events["kind"]) == sorted(KINDS)
+    assert (events["prev_bar"] == 2).all() and (events["swing_bar"] == 6).all()
+    assert (events["signal_bar"] == 7).all() and (events["signal_time"] == index[7]).all()
+    for symbol in cases:
+        for kind in KINDS:
+            assert signals[symbol][kind].tolist() == [i == 7 and kind == symbol for i in range(9)]
+
+    # Non-causal: the signal is on the swing bar itself
+    events, _ = divergence_signals(history, order=1, causal=False)
+    assert (events["signal_bar"] == 6).all() and len(events) == len(KINDS)
@@ -0,0 +1,121 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from screener.criteria import ScreenPlanner
+from screener.providers import FetchStage, LocalDataProvider
+from screener.screener import StockScreener
+from screener.service import ScreenerService
+from screener.snapshot import ScreenSnapshot, SnapshotStore, build_snapshot
+
+SYMBOLS = [f"S{i:03d}" for i in range(80)]
+
+
+def _screener(n_bars=300):
+    return StockScreener(SYMBOLS, provider=LocalDataProvider.synthetic(SYMBOLS, n_bars=n_bars, seed=5))
+
+
+def _random_criteria(rng):
+    criteria = {}
+    if rng.random() < 0.5:
+        criteria["pe_ratio_max"] = float(rng.uniform(5, 60))
+    if rng.random() < 0.5:
+        criteria["pe_ratio_min"] = float(rng.uniform(5, 60))
+    if rng.random() < 0.5:
+        criteria["debt_to_equity_max"] = float(rng.uniform(0, 250))
+    if rng.random() < 0.5:
+        criteria["rsi_threshold_upper"] = float(rng.uniform(20, 80))
+    if rng.random() < 0.5:
+        criteria["rsi_threshold_lower"] = float(rng.uniform(20, 80))
+    if rng.random() < 0.3:
+        criteria[str(rng.choice(["sma_200_above", "sma_200_below"]))] = True
+    return criteria
+
+
+@pytest.fixture(scope="module", params=[300, 120])
+def screener_and_snapshot(request):
+    # 120 bars: too short for SMA-200, so those metrics are NaN everywhere
+    screener = _screener(request.param)
+    return screener, build_snapshot(screener)
+
+
+def test_query_matches_planner(screener_and_snapshot):
+    screener, snapshot = screener_and_snapshot
+    rng = np.random.default_rng(1)
+    for _ in range(40):
+        criteria = _random_criteria(rng)
+        expected, _ = ScreenPlanner(FetchStage(screener.fetcher.provider)).run(SYMBOLS, criteria)
+        assert snapshot.query(criteria) == expected, criteria
+
+
+def test_records_match_get_stocks_data(screener_and_snapshot, tmp_path):
+    screener, snapshot = screener_and_snapshot
+    symbols = SYMBOLS[::7] + ["MISSING"]
+    expected = screener.get_stocks_data(SYMBOLS[::7])
+    for records in (snapshot.records(symbols), ScreenSnapshot.load(snapshot.save(str(tmp_path))).records(symbols)):
+        assert [r["symbol"] for r in records] == [e["symbol"] for e in expected]
+        for record, reference in zip(records, expected):
+            assert record.keys() == reference.keys()
+            assert type(record["market_cap"]) is int and record["market_cap"] == reference["market_cap"]
+            for field, value in reference.items():
+                assert record[field] == pytest.approx(value, nan_ok=True), field
+
+
+def test_screener_endpoint_screens_live_until_the_first_snapshot(monkeypatch):
+    testclient = pytest.importorskip("fastapi.testclient")
+    import main
+
+    service = ScreenerService(_screener(), max_workers=1)
+    monkeypatch.setattr(main, "screener_service", service)
+    monkeypatch.setattr(main.snapshots, "current", None)
+    client = testclient.TestClient(main.app)
+    criteria = {"pe_ratio_max": 30.0, "rsi_threshold_upper": 60.0}
+
+    response = client.post("/screener", json=criteria)
+    assert response.status_code == 200
+    body = response.json()
+    expected, _ = ScreenPlanner(FetchStage(service.screener.fetcher.provider)).run(SYMBOLS, criteria)
+    assert body["symbols"] == expected and body["snapshot_version"] is None
+
+    monkeypatch.setattr(main.snapshots, "current", build_snapshot(service.screener))
+    body = client.post("/screener", json=criteria).json()
+    assert body["symbols"] == expected and body["snapshot_version"] is not None
+
+
+def _without(snapshot, column):
+    columns = {k: v for k, v in snapshot.columns.items() if k != column}
+    return dataclasses.replace(snapshot, columns=columns)
+
+
+def test_store_does_not_serve_a_snapshot_missing_a_registered_metric(tmp_path):
+    screener = _screener()
+    snapshot = build_snapshot(screener)
+    assert snapshot.missing_columns() == []
+    assert _without(snapshot, "rsi").missing_columns() == ["rsi"]
+    assert _without(snapshot, "rsi").missing_columns({"pe_ratio_max": 30.0}) == []
+
+    _without(snapshot, "rsi").save(str(tmp_path))
+    store = SnapshotStore(screener, directory=str(tmp_path))
+    assert store.load_latest() is None and "rsi" in store.last_error
+
+    snapshot.save(str(tmp_path))
+    assert store.load_latest().version == snapshot.version
+
+
+def test_screener_endpoint_screens_live_when_the_snapshot_lacks_a_column(monkeypatch):
+    testclient = pytest.importorskip("fastapi.testclient")
+    import main
+
+    service = ScreenerService(_screener(), max_workers=1)
+    monkeypatch.setattr(main, "screener_service", service)
+    monkeypatch.setattr(main.snapshots, "current", _without(build_snapshot(service.screener), "rsi"))
+    client = testclient.TestClient(main.app)
+    criteria = {"rsi_threshold_lower": 40.0}
+
+    response = client.post("/screener", json=criteria)
+    assert response.status_code == 200
+    expected, _ = ScreenPlanner(FetchStage(service.screener.fetcher.provider)).run(SYMBOLS, criteria)
+    assert response.json()["symbols"] == expected and response.json()["snapshot_version"] is None
+    # Criteria the snapshot can answer still come from it
+    assert client.post("/screener", json={"pe_ratio_max": 30.0}).json()["snapshot_version"] is not None
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.signals import wilder_rsi
+from backtester.zones import compute_atr
+from screener import indicators
+from screener.screener import StockScreener
+from screener.streaming import ATR, EMA, RSI, SMA, IndicatorSet
+
+N_BARS = 3000
+
+
+@pytest.fixture(scope="module")
+def bars():
+    rng = np.random.default_rng(11)
+    close = 400 + np.cumsum(rng.normal(0, 1, N_BARS))
+    # A flat stretch hits the zero-gain / zero-loss RSI branches
+    close[500:530] = close[500]
+    close[1000:1020] = close[1000] + np.arange(20)
+    high = close + rng.uniform(0, 2, N_BARS)
+    low = close - rng.uniform(0, 2, N_BARS)
+    return pd.DataFrame({"High": high, "Low": low, "Close": close})
+
+
+def _batch(df):
+    close = df["Close"]
+    panel = indicators.PricePanel.from_history({"X": df})
+    return {
+        "rsi": indicators.rsi(panel, 14)[0],
+        "rsi_wilder": wilder_rsi(panel, 14)[0],
+        "sma_200": indicators.sma(panel, 200)[0],
+        "ema_20": close.ewm(span=20, adjust=False, min_periods=20).mean().to_numpy(),
+        "atr": compute_atr(df, 14).to_numpy(),
+    }
+
+
+def _stream(indicator_set, df):
+    rows = [dict(indicator_set.update(bar)) for bar in df.to_dict("records")]
+    return {name: np.array([r[name] for r in rows]) for name in indicator_set.indicators}
+
+
+def _assert_close(streamed, batch):
+    for name, expected in batch.items():
+        np.testing.assert_allclose(streamed[name], expected, rtol=1e-9, atol=1e-9, equal_nan=True,
+                                   err_msg=name)
+
+
+def test_batch_references_agree(bars):
+    # The streaming docstrings promise the values of both batch RSI / SMA paths
+    expected = StockScreener._calculate_rsi(None, bars["Close"]).to_numpy()
+    np.testing.assert_allclose(_batch(bars)["rsi"], expected, rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(_batch(bars)["sma_200"], bars["Close"].rolling(200).mean(),
+                               rtol=1e-9, equal_nan=True)
+
+
+def test_streaming_matches_batch_from_the_first_bar(bars):
+    _assert_close(_stream(IndicatorSet(), bars), _batch(bars))
+
+
+@pytest.mark.parametrize("warm", [1, 13, 14, 150, 200, 2500])
+def test_from_history_continues_like_batch(bars, warm):
+    live = IndicatorSet.from_history(bars.iloc[:warm])
+    batch = _batch(bars)
+    for name, indicator in live.indicators.items():
+        np.testing.assert_allclose(indicator.value, batch[name][warm - 1], rtol=1e-9, atol=1e-9,
+                                   equal_nan=True, err_msg=name)
+    _assert_close(_stream(live, bars.iloc[warm:]), {k: v[warm:] for k, v in batch.items()})
+
+
+def test_scalar_closes_and_windows(bars):
+    close = bars["Close"]
+    sma, ema, rsi, atr = SMA(50), EMA(10, min_periods=1), RSI(7, "wilder"), ATR(5)
+    streamed = np.array([(sma.update(c), ema.update(c), rsi.update(c)) for c in close])
+    np.testing.assert_allclose(streamed[:, 0], close.rolling(50).mean(), rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(streamed[:, 1], close.ewm(span=10, adjust=False).mean(), rtol=1e-9)
+    panel = indicators.PricePanel.from_history({"X": bars})
+    np.testing.assert_allclose(streamed[:, 2], wilder_rsi(panel, 7)[0], rtol=1e-9, equal_nan=True)
+    atr_values = [atr.update_hlc(h, l, c) for h, l, c in bars[["High", "Low", "Close"]].to_numpy()]
+    np.testing.assert_allclose(atr_values, compute_atr(bars, 5), rtol=1e-9, equal_nan=True)
+
+
+def test_unknown_rsi_method():
+    with pytest.raises(ValueError):
+        RSI(14, "ema")
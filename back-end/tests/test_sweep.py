@@ -0,0 +1,127 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.sweep import Split, SweepRunner, _run_key, param_grid, walk_forward_splits
+
+
+def _bars(n=300):
+    index = pd.date_range("2026-01-05 14:30", periods=n, freq="5min", tz="UTC", name="Date")
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 0.2, n))
+    return pd.DataFrame({"Open": close, "High": close + 0.1, "Low": close - 0.1, "Close": close}, index=index)
+
+
+def mean_return_strategy(train, test, params):
+    # Module level so the process pool can pickle it
+    if os.environ.get("SWEEP_TEST_FAIL") and params.get("window") == 5:
+        raise RuntimeError("data vendor timeout")
+    ret = test["Close"].pct_change(params["window"])
+    return {"trades": int(ret.notna().sum()), "mean": float(ret.mean()), "train_bars": len(train)}
+
+
+def reserved_strategy(train, test, params):
+    return {"train_start": -1, "trades": 1}
+
+
+def test_rolling_and_anchored_splits():
+    assert walk_forward_splits(100, train=40, test=20) == [Split(0, 40, 40, 60), Split(20, 60, 60, 80),
+                                                           Split(40, 80, 80, 100)]
+    assert walk_forward_splits(100, train=40, test=20, step=30) == [Split(0, 40, 40, 60), Split(30, 70, 70, 90)]
+    anchored = walk_forward_splits(100, train=40, test=20, anchored=True)
+    assert [(s.train_start, s.train_end) for s in anchored] == [(0, 40), (0, 60), (0, 80)]
+    assert walk_forward_splits(50, train=40, test=20) == []
+    with pytest.raises(ValueError):
+        walk_forward_splits(100, train=0, test=20)
+
+
+def test_run_keys_dedup_identical_runs_only():
+    split = Split(0, 40, 40, 60)
+    key = _run_key("s", {"a": 1, "b": 2}, split, "data")
+    assert key == _run_key("s", {"b": 2, "a": 1}, split, "data")
+    others = [
+        _run_key("s", {"a": 1, "b": 3}, split, "data"),
+        _run_key("s", {"a": 1, "b": 2}, split, "other"),
+        _run_key("t", {"a": 1, "b": 2}, split, "data"),
+        _run_key("s", {"a": 1, "b": 2}, Split(0, 40, 40, 61), "data"),
+    ]
+    assert len({key, *others}) == 5
+
+
+def _rows(runner):
+    # Parseable lines of results.jsonl (a torn line is skipped)
+    rows = []
+    with open(runner.results_path) as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+    return rows
+
+
+def test_duplicate_grid_entries_run_once(tmp_path):
+    df = _bars()
+    splits = walk_forward_splits(len(df), train=100, test=50)
+    runner = SweepRunner(df, mean_return_strategy, str(tmp_path), max_workers=2)
+    grid = param_grid({"window": [1, 3]}) + [{"window": 3}]
+    table = runner.run(grid, splits)
+
+    assert len(table) == 2 * len(splits) == len(_rows(runner))
+    assert table["key"].is_unique
+    # Each row's metrics are from its own test window
+    for _, row in table.iterrows():
+        test = df.iloc[row["test_start"]:row["test_end"]]
+        assert row["mean"] == pytest.approx(test["Close"].pct_change(row["param_window"]).mean())
+        assert row["train_bars"] == row["train_end"] - row["train_start"]
+
+
+def test_params_never_overwrite_split_or_metric_columns(tmp_path):
+    df = _bars()
+    splits = walk_forward_splits(len(df), train=100, test=50)
+    runner = SweepRunner(df, mean_return_strategy, str(tmp_path), max_workers=1)
+    table = runner.run([{"window": 2, "trades": "many", "train_start": 999, "split": "x"}], splits)
+
+    assert (table["param_trades"] == "many").all() and (table["param_train_start"] == 999).all()
+    assert table["trades"].dtype.kind == "i"
+    assert list(table["split"]) == list(range(len(splits)))
+    assert list(table["train_start"]) == [s.train_start for s in splits]
+
+    runner = SweepRunner(df, reserved_strategy, str(tmp_path / "reserved"), max_workers=1)
+    table = runner.run([{"window": 2}], splits[:1])
+    assert "train_start" in table["error"].iloc[0] and table["train_start"].iloc[0] == 0
+
+
+def test_resume_skips_finished_runs_and_retries_errors(tmp_path, monkeypatch):
+    df = _bars()
+    splits = walk_forward_splits(len(df), train=100, test=50)
+    grid = param_grid({"window": [1, 5]})
+
+    monkeypatch.setenv("SWEEP_TEST_FAIL", "1")
+    first = SweepRunner(df, mean_return_strategy, str(tmp_path), max_workers=2).run(grid, splits)
+    failed = first[first["param_window"] == 5]
+    assert failed["error"].str.contains("RuntimeError").all()
+    assert first[first["param_window"] == 1]["error"].isna().all()
+
+    # A crash mid-write leaves a torn last line: it is ignored, and new rows
+    # are not appended onto it
+    runner = SweepRunner(df, mean_return_strategy, str(tmp_path), max_workers=2)
+    with open(runner.results_path, "a") as f:
+        f.write('{"key": "torn')
+    assert set(runner.completed()) == set(first.loc[first["param_window"] == 1, "key"])
+    assert len(runner.completed(include_errors=True)) == len(first)
+
+    monkeypatch.delenv("SWEEP_TEST_FAIL")
+    before = len(_rows(runner))
+    second = runner.run(grid, splits)
+    assert len(_rows(runner)) == before + len(failed)
+    assert "error" not in second or second["error"].isna().all()
+    pd.testing.assert_frame_equal(second[second["param_window"] == 1].drop(columns="error", errors="ignore"),
+                                  first[first["param_window"] == 1].drop(columns="error"), check_dtype=False)
+
+    # Everything is finished now: nothing reruns
+    runner.run(grid, splits)
+    assert len(_rows(runner)) == before + len(failed)
+
@@ -0,0 +1,50 @@
+import dataclasses
+import os
+
+import numpy as np
+import pytest
+
+from backtester.zone_index import PointInTimeZones, ZoneIndex
+from backtester.zones import build_sr_zones, nearest_zone
+from marketdata.prices import load_prices_from_csv
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backtester", "data")
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return load_prices_from_csv(os.path.join(DATA_DIR, "spy_hourly.csv"))
+
+
+def _as_tuples(zones):
+    return sorted(dataclasses.astuple(z) for z in zones)
+
+
+@pytest.mark.parametrize("left,right", [(5, 5), (3, 5), (6, 2)])
+def test_versions_match_batch_zones_on_the_known_history(bars, left, right):
+    pit = PointInTimeZones.from_frame(bars, left=left, right=right)
+    assert len(pit.starts) > 10
+    for v in range(1, len(pit.starts), 5):
+        t = int(pit.starts[v])
+        expected = build_sr_zones(bars.iloc[:t + 1], left=left, right=right)
+        assert _as_tuples(pit.indexes[v].zones) == _as_tuples(expected["support"] + expected["resistance"])
+
+
+def test_no_version_sees_future_bars(bars):
+    # Changing bars after t must not change the zones live at t
+    pit = PointInTimeZones.from_frame(bars, left=6, right=2)
+    t = int(pit.starts[len(pit.starts) // 2])
+    shocked = bars.copy()
+    shocked.iloc[t + 1:, :] *= 1.5
+    other = PointInTimeZones.from_frame(shocked, left=6, right=2)
+    assert _as_tuples(other.version_at(t).zones) == _as_tuples(pit.version_at(t).zones)
+
+
+def test_nearest_matches_brute_force(bars):
+    zones = build_sr_zones(bars)
+    index = ZoneIndex(zones)
+    closes = bars["Close"].to_numpy()
+    nearest = index.nearest(closes)
+    everything = zones["support"] + zones["resistance"]
+    for price, pos in zip(closes[::25], nearest[::25]):
+        assert index.zones[pos].level == nearest_zone(price, everything).level
@@ -0,0 +1,53 @@
+import dataclasses
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester.zone_tracker import SRZoneTracker
+from backtester.zones import build_sr_zones, find_pivots
+from marketdata.prices import load_prices_from_csv
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backtester", "data")
+WINDOWS = [(5, 5), (3, 5), (5, 3), (1, 7), (8, 2)]
+
+
+def _as_tuples(zones):
+    return {kind: [dataclasses.astuple(z) for z in zones[kind]] for kind in ("support", "resistance")}
+
+
+@pytest.fixture(scope="module", params=["spy_5min.csv", "spy_hourly.csv"])
+def bars(request):
+    path = os.path.join(DATA_DIR, request.param)
+    if not os.path.exists(path):
+        pytest.skip(f"{request.param} not available")
+    return load_prices_from_csv(path)
+
+
+@pytest.mark.parametrize("left,right", [(3, 5), (5, 3), (1, 4)])
+def test_find_pivots_uses_the_left_right_window(left, right):
+    rng = np.random.default_rng(7)
+    high = pd.Series(rng.integers(0, 20, size=300).astype(float))
+    df = pd.DataFrame({"High": high, "Low": high - 1})
+    ph, _ = find_pivots(df, left=left, right=right)
+
+    h = high.to_numpy()
+    for i in range(len(h)):
+        expected = left <= i < len(h) - right and h[i] == h[i - left:i + right + 1].max()
+        assert (not np.isnan(ph.iloc[i])) == expected, i
+
+
+@pytest.mark.parametrize("left,right", WINDOWS)
+def test_replay_matches_batch_zones(bars, left, right):
+    tracker = SRZoneTracker.replay(bars, left=left, right=right)
+    assert _as_tuples(tracker.zones()) == _as_tuples(build_sr_zones(bars, left=left, right=right))
+
+
+def test_zones_match_batch_at_every_prefix():
+    bars = load_prices_from_csv(os.path.join(DATA_DIR, "spy_hourly.csv")).iloc[:200]
+    tracker = SRZoneTracker(left=4, right=2)
+    for n, (_, row) in enumerate(bars.iterrows(), start=1):
+        tracker.update(row)
+        if n >= 10 and n % 7 == 0:
+            assert _as_tuples(tracker.zones()) == _as_tuples(build_sr_zones(bars.iloc[:n], left=4, right=2))